@@ -1,12 +1,10 @@
 #! /bin/bash
 
 source=$(dirname $0)
-experiment_folder=$source/experiment_data/*/*
 
-for folder in $(ls $experiment_folder -d); do
-    if [[ -d $folder ]]; then
-        echo "Running $folder"
-        ./run.sh $folder > /dev/null
-    fi
-done
+source $source/.venv/bin/activate
 
+python $source/src/run_all.py \
+    --data=$source/experiment_data \
+    --output=$source/experiment_data_results \
+    "$@"
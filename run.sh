@@ -28,7 +28,8 @@ if [[ -d $dir ]]; then
         --output-image="$out_dir/$name.png" \
         --output-graph=rain,kalman-delta,kalman,control \
         --output-suffix=true \
-        --show=false
+        --show=false \
+        --result-cache="$out_dir/result-cache"
 else
     echo "'$dir' is not a directory"
 fi
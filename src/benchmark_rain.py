@@ -0,0 +1,82 @@
+"COMPARES THE TIME IT TAKES TO LOAD RAIN FILES POINT BY POINT AND AS ARRAYS"
+
+from datetime import timedelta
+import glob
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, List
+import numpy as np
+from python_package.rain.artificial_rain import ArtificialVariableRainPrediction
+from python_package.rain.rain_data import save_rain_data
+
+SOURCE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATA = os.path.join(SOURCE, "experiment_data")
+DEFAULT_ROWS = 1_000_000
+DEFAULT_REPEAT = 3
+
+HELP = f"""USAGE python src/benchmark_rain.py ([ARGUMENT]=[VALUE])*
+    [-d  | --data]=/path/to/folder           -- Folder searched for Rain.csv files
+                                                (default={DEFAULT_DATA})
+    [-r  | --rows]=number                    -- Rows of the generated rain file, 10 seconds apart
+                                                (default={DEFAULT_ROWS})
+    [-n  | --repeat]=number                  -- How many times every file is loaded, the fastest time is shown
+                                                (default={DEFAULT_REPEAT})
+    """
+
+
+def load_points(file: str) -> ArtificialVariableRainPrediction:
+    "Loads a rain file one point at a time, like before the array loader"
+    prediction = ArtificialVariableRainPrediction()
+    with open(file, "r", encoding="utf-8") as rain_file:
+        for line in rain_file:
+            seconds, rain = line.split(",")
+            prediction.add_point(timedelta(seconds=float(seconds)), float(rain))
+    return prediction
+
+
+def best_time(load: Callable[[str], ArtificialVariableRainPrediction], rain_files: List[str], runs: int) -> float:
+    "The fastest time of loading and compiling every file"
+    times = []
+    for _ in range(runs):
+        begin = time.perf_counter()
+        for file in rain_files:
+            load(file).compile()
+        times.append(time.perf_counter() - begin)
+    return min(times)
+
+
+if __name__ == "__main__":
+    data, rows, repeat = DEFAULT_DATA, DEFAULT_ROWS, DEFAULT_REPEAT
+    try:
+        for arg in sys.argv[1:]:
+            if arg in ("-h", "--help"):
+                print(HELP)
+                sys.exit(0)
+
+            cmd_argument, value = arg.split("=")
+            match cmd_argument:
+                case "-d" | "--data":
+                    data = value
+                case "-r" | "--rows":
+                    rows = int(value)
+                case "-n" | "--repeat":
+                    repeat = int(value)
+                case _:
+                    raise ValueError(f"{cmd_argument} is not a valid argument")
+    except ValueError as e:
+        print(e)
+        print("\n" + HELP)
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as folder:
+        generated = os.path.join(folder, "Rain.csv")
+        amounts = np.random.default_rng(0).random(rows)
+        np.savetxt(generated, np.column_stack([np.arange(rows) * 10, amounts]), delimiter=",", fmt=["%d", "%.4f"])
+
+        experiments = sorted(glob.glob(os.path.join(data, "**", "Rain.csv"), recursive=True))
+        for name, files in ((f"{len(experiments)} experiment files", experiments), (f"{rows} rows", [generated])):
+            points = best_time(load_points, files, repeat)
+            arrays = best_time(save_rain_data, files, repeat)
+            print(f"{name}: point by point {points:.3f} s, arrays {arrays:.3f} s, {points / arrays:.1f} times faster")
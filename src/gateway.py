@@ -0,0 +1,105 @@
+"RUNS THE CONTROL LOOPS OF MANY PHYSICAL SETUPS FROM ONE PROCESS"
+
+import asyncio
+import math
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from python_package.args import DEFAULT_CONTROLER_CACHE, DEFAULT_TIME
+from python_package.config import TIME_DELTA, ExperimentConfig
+from python_package.output import OutputSink
+from python_package.rain import artificial_rain as ar, rain_data as rd
+from python_package.runtime import TickScheduler
+from python_package.runtime.gateway import MAX_BACKOFF, Device, SerialGateway
+from python_package.runtime.pipeline import PondPipeline
+from python_package.serial import SerialCom
+from python_package.time import RealtimeClock, Time, parse_clock
+
+DEFAULT_OUT = os.path.join(tempfile.gettempdir(), "gateway")
+DEFAULT_RAIN = 10
+
+HELP = f"""USAGE python src/gateway.py ([ARGUMENT]=[VALUE])*
+    [-p  | --port]=name:port                 -- A pond and the serial port of its controller.
+                                                Can be given multiple times
+    [-r  | --rain]=/path/to/file             -- Location of the file that contains the raindata of the ponds
+    [-cr | --constant-rain]=number           -- Specify a constant amount of rain in mm
+                                                (default={DEFAULT_RAIN})
+    [-o  | --output]=/path/to/folder         -- Folder the output <name>.csv and kalman bank <name>.kalman.csv
+                                                of every pond are saved to
+                                                (default={DEFAULT_OUT})
+    [-cc | --controler-cache]=/path/to/folder -- Folder the controlers log their errors to, in a folder per pond
+                                                (default={DEFAULT_CONTROLER_CACHE})
+    [-t  | --time]=time                      -- For how long should the ponds be controlled in seconds.
+                                                (default={DEFAULT_TIME})
+    [-cl | --clock]=clock                    -- How fast time passes, realtime or scaled:<factor> to pass factor times
+                                                faster than the wall clock
+                                                (default=realtime)
+    [-mb | --max-backoff]=seconds            -- The longest time between attempts to reconnect a failed port
+                                                (default={MAX_BACKOFF})
+    """
+
+
+if __name__ == "__main__":
+    start = datetime.now()
+    ports: dict = {}
+    rain = ar.ArtificialConstRain(DEFAULT_RAIN)
+    out, controler_cache, duration, max_backoff = DEFAULT_OUT, DEFAULT_CONTROLER_CACHE, DEFAULT_TIME, MAX_BACKOFF
+    clock = RealtimeClock(start)
+    try:
+        for arg in sys.argv[1:]:
+            if arg in ("-h", "--help"):
+                print(HELP)
+                sys.exit(0)
+
+            cmd_argument, value = arg.split("=", 1)
+            match cmd_argument:
+                case "-p" | "--port":
+                    name, port = value.split(":", 1)
+                    ports[name] = port
+                case "-r" | "--rain":
+                    rain = ar.ArtificialVariableRain(start, rd.save_rain_data(value))
+                case "-cr" | "--constant-rain":
+                    rain = ar.ArtificialConstRain(int(value))
+                case "-o" | "--output":
+                    out = value
+                case "-cc" | "--controler-cache":
+                    controler_cache = value
+                case "-t" | "--time":
+                    duration = int(value)
+                case "-cl" | "--clock":
+                    clock = parse_clock(value, start)
+                case "-mb" | "--max-backoff":
+                    max_backoff = float(value)
+                case _:
+                    raise ValueError(f"{cmd_argument} is not a valid argument")
+        if not ports:
+            raise ValueError("At least one --port must be given")
+    except ValueError as e:
+        print(e)
+        print("\n" + HELP)
+        sys.exit(1)
+
+    os.makedirs(out, exist_ok=True)
+    time = Time(start=start, current_time=timedelta(seconds=0), delta=timedelta(seconds=TIME_DELTA), clock=clock)
+    devices = []
+    for name, port in ports.items():
+        log_folder = os.path.join(controler_cache, name)
+        os.makedirs(log_folder, exist_ok=True)
+        kalman_sink = OutputSink(os.path.join(out, f"{name}.kalman.csv"))
+        pipeline = PondPipeline.from_config(ExperimentConfig(), rain, time, kalman_sink, vector=True)
+        out_sink = OutputSink(os.path.join(out, f"{name}.csv"))
+        devices.append(Device(name, SerialCom(log_folder, port, clock=clock), pipeline, out_sink))
+
+    gateway = SerialGateway(
+        devices,
+        time,
+        TickScheduler(TIME_DELTA, clock),
+        max_backoff=max_backoff,
+        on_disconnect=lambda device, error: print(f"{device.name} disconnected: {error}"),
+    )
+    print(f"Controlling {len(devices)} ponds")
+    asyncio.run(gateway.run(math.ceil(duration / TIME_DELTA)))
+    for device in devices:
+        device.pipeline.kalman_bank.out_file.close()
+        print(f"{device.name}: connected {device.connects} times, mode changes {device.pipeline.change_array}")
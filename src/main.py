@@ -1,38 +1,44 @@
 "THIS IS THE MAIN FILE"
 
+import asyncio
+import copy
+import math
 import os
+import sys
 from datetime import timedelta, datetime
-import pause
 from python_package.plotter import plotting
 from python_package.logger import LogLevel, PrintLogger
 from python_package.serial import SerialCom, serial_exceptions
 from python_package.serial.headless import Headless
-from python_package.kalman_filter.kalman_bank import KalmanBank, Fault, KalmanError, FaultType
-from python_package.kalman_filter.kalman import MeasurementData, PondState
+from python_package.kalman_filter.kalman_bank import KalmanBank, KalmanError
+from python_package.kalman_filter.vector_kalman_bank import VectorKalmanBank
+from python_package.kalman_filter.trace import BinaryTraceSink
 from python_package.time import Time
 from python_package.virtual_pond import VirtualPond
 from python_package.args import ARGS, Mode
-from python_package.out_mode import OutMode
+from python_package.replay import Replay
+from python_package.output import OutputSink, close_all
+from python_package.result_cache import ResultCache
+from python_package.runtime import PondPipeline, Reading, TickScheduler, run_async
+from python_package.config import (
+    FAULTS,
+    URBAN_CATCHMENT_AREA,
+    SURFACE_REACTION_FACTOR,
+    DISCHARGE_COEFICENT,
+    POND_AREA,
+    WATER_LEVEL,
+    WATER_LEVEL_MIN,
+    WATER_LEVEL_MAX,
+    ORIFICE,
+    KALMAN_INITIAL_VARIANCE,
+    KALMAN_NOICE,
+    KALMAN_DELAY,
+    TIME_DELTA,
+    ExperimentConfig,
+)
 
 
 LOGGER = PrintLogger()
-FAULTS = [
-    Fault(lambda x: x + 50.0, "higher", FaultType.ADD),
-    Fault(lambda x: x - 50.0, "lower", FaultType.SUBTRACT),
-    Fault(lambda x: x * 1.15, "higher", FaultType.MULTIPLY),
-    Fault(lambda x: x * 0.85, "lower", FaultType.MULTIPLY),
-]
-
-# -- POND DATA
-URBAN_CATCHMENT_AREA = 1.85
-SURFACE_REACTION_FACTOR = 0.25
-DISCHARGE_COEFICENT = 0.6
-POND_AREA = 5572
-WATER_LEVEL_MIN = 100
-WATER_LEVEL_MAX = 850
-
-# -- DELAY
-KALMAN_DELAY = 50
 
 
 def handle_controler_exception(exception: serial_exceptions.Exceptions):
@@ -67,28 +73,67 @@ if __name__ == "__main__":
     try:
         LOGGER.log("SETUP")
         # SETUP
-        CHANGE_MODE_TIME = 0
-        change_array = []
-
-        # -- TIME
-        START = datetime.now()
-        TIME = Time(start=START, current_time=timedelta(seconds=0), delta=timedelta(seconds=11))
 
         # -- ARGUMENTS
+        START = datetime.now()
         args = ARGS(START)
 
-        # -- TRUNCATE OUTPUT
-        with open(args.out, "w", -1, "UTF-8") as f:
-            f.truncate()
+        # -- TIME
+        TIME = Time(
+            start=START, current_time=timedelta(seconds=0), delta=timedelta(seconds=TIME_DELTA), clock=args.clock
+        )
+
+        # -- RESULT CACHE
+        result_cache = None
+        if args.result_cache is not None and args.mode is not Mode.SERIEL and not args.show:
+            result_cache = ResultCache(args.result_cache)
+            cache_key = result_cache.key(args, ExperimentConfig())
+            if result_cache.restore(cache_key, args) is not None:
+                LOGGER.log("Reusing the cached result of an identical run")
+                sys.exit(0)
+
+        # -- REPLAY
+        if args.mode is Mode.REPLAY:
+            replay = Replay(START, ExperimentConfig(), args.rain, args.data)
+            result = replay.run(args.time)
+            for _ in range(int(result.overflow.sum())):
+                LOGGER.log("Pond is overflowing", LogLevel.WARNING)
+            for _, kalman_error in result.kalman_errors:
+                handle_kalman_exception(kalman_error)
+            if result.sensor_error is not None:
+                handle_controler_exception(result.sensor_error)
+            result.write_output(args.out)
+            result.write_kalman(args.kalman, binary=args.kalman_format == "binary")
+            plotting(args, WATER_LEVEL_MIN, WATER_LEVEL_MAX, result.change_array)
+            if result_cache is not None:
+                sensor_error = "" if result.sensor_error is None else result.sensor_error.name
+                result_cache.store(
+                    cache_key, args, {"mode_changes": len(result.change_array), "sensor_error": sensor_error}
+                )
+            sys.exit(0)
+
+        # -- OUTPUT
+        out_sink = OutputSink(args.out, args.flush_size, args.flush_interval)
+        if args.kalman_format == "binary":
+            kalman_sink = BinaryTraceSink(args.kalman, len(FAULTS) + 1, args.flush_size, args.flush_interval)
+        else:
+            kalman_sink = OutputSink(args.kalman, args.flush_size, args.flush_interval)
+
+        # -- TIME OF EACH TASK
+        if args.runtime == "async":
+            # The tasks of the asyncio runtime step their time independently
+            pond_time, bank_time, controler_time = copy.copy(TIME), copy.copy(TIME), copy.copy(TIME)
+        else:
+            pond_time = bank_time = controler_time = TIME
 
         # -- CONTROLER
         os.makedirs(args.controler_cache, exist_ok=True)
-        controler = SerialCom(args.controler_cache)
+        controler = SerialCom(args.controler_cache, args.port, clock=TIME.get_clock)
         match args.mode:
             case Mode.SERIEL:
                 controler.begin()
             case Mode.HEADLESS:
-                controler.arduino = Headless(args.data, TIME)
+                controler.arduino = Headless(args.data, controler_time)
 
         # -- RAIN
         rain = args.rain
@@ -99,76 +144,74 @@ if __name__ == "__main__":
             surface_reaction_factor=SURFACE_REACTION_FACTOR,
             discharge_coeficent=DISCHARGE_COEFICENT,
             pond_area_m2=POND_AREA,
-            water_level_cm=700,
+            water_level_cm=WATER_LEVEL,
             water_level_min_cm=WATER_LEVEL_MIN,
             water_level_max_cm=WATER_LEVEL_MAX,
-            time=TIME,
+            time=pond_time,
             rain_data_mm=rain,
         )
-        virtual_pond.set_orifice("med")
+        virtual_pond.set_orifice(ORIFICE)
 
         # -- KALMAN BANK
-        kalman_bank = KalmanBank(
-            faults=FAULTS, time=TIME, initial_state=700, initial_variance=100, noice=0.1, out_file=args.kalman
+        kalman_bank = (VectorKalmanBank if args.kalman_engine == "vector" else KalmanBank)(
+            faults=FAULTS,
+            time=bank_time,
+            initial_state=WATER_LEVEL,
+            initial_variance=KALMAN_INITIAL_VARIANCE,
+            noice=KALMAN_NOICE,
+            out_file=kalman_sink,
         )
 
-        AVG_DIST = 0
-        OUT = 0
-
-        out_mode = OutMode.SENSOR
-
-        # LOOP
-        while TIME.get_current_time.total_seconds() < args.time:
-            # STEP VIRTUAL POND
-            pond_data = virtual_pond.generate_virtual_sensor_reading()
-            virtual_pond.water_level = pond_data.height
-            if pond_data.overflow:
-                LOGGER.log("Pond is overflowing", LogLevel.WARNING)
+        # -- PIPELINE
+        pipeline = PondPipeline(
+            virtual_pond,
+            kalman_bank,
+            pond_area=POND_AREA,
+            kalman_delay=KALMAN_DELAY,
+            on_sensor_error=handle_controler_exception,
+            on_kalman_error=handle_kalman_exception,
+            on_overflow=lambda _: LOGGER.log("Pond is overflowing", LogLevel.WARNING),
+        )
 
-            if out_mode is not OutMode.SENSOR_ERROR:
-                try:
-                    # READ SENSOR
-                    AVG_DIST, invariance = controler.read_sensor()
-                    OUT = AVG_DIST
-
-                    # STEP FILTERS
-                    kalman_bank.step_filters(
-                        PondState(q_in=pond_data.volume_in, q_out=pond_data.volume_out, ap=POND_AREA),
-                        MeasurementData(AVG_DIST, invariance),
-                        virtual_pond.water_level,
-                    )
-
-                except serial_exceptions.Exceptions as e:
-                    if out_mode != OutMode.SENSOR_ERROR:
-                        out_mode = OutMode.SENSOR_ERROR
-                        CHANGE_MODE_TIME = TIME.get_current_time.total_seconds()
-                        change_array.append([out_mode, CHANGE_MODE_TIME])
-                    handle_controler_exception(e)
-                except KalmanError as e:
-                    if TIME.get_current_time.total_seconds() > KALMAN_DELAY:
-                        handle_kalman_exception(e)
-                        if out_mode != OutMode.VIRTUAL:
-                            out_mode = OutMode.VIRTUAL
-                            change_mode_time = TIME.get_current_time.total_seconds()
-                            change_array.append([out_mode, change_mode_time])
-
-            if out_mode is OutMode.VIRTUAL:
-                OUT = virtual_pond.water_level
-            elif out_mode is OutMode.SENSOR_ERROR:
-                OUT = virtual_pond.water_level
-
-            # OUTPUT
-            with open(args.out, "a", -1, "UTF-8") as f:
-                f.write(f"{TIME.get_current_time.total_seconds()},{OUT}\n")
-
-            # STEP TIME AND WAIT
-            TIME.step()
-            if args.mode == Mode.SERIEL:
-                pause.until(START + TIME.get_current_time)
+        if args.runtime == "async":
+            scheduler = TickScheduler(TIME_DELTA, TIME.get_clock)
+            ticks = math.ceil(args.time / TIME_DELTA)
+            asyncio.run(run_async(pipeline, controler, controler_time, out_sink, ticks, scheduler))
+            if scheduler.late > 0:
+                LOGGER.log(f"{scheduler.late} ticks started after their deadline", LogLevel.WARNING)
+        else:
+            # LOOP
+            while TIME.get_current_time.total_seconds() < args.time:
+                # STEP VIRTUAL POND
+                pond_data = pipeline.step_pond()
+
+                # READ SENSOR
+                reading: Reading = None
+                if pipeline.reads_sensor:
+                    try:
+                        reading = controler.read_sensor()
+                    except serial_exceptions.Exceptions as e:
+                        reading = e
+
+                # STEP FILTERS
+                OUT = pipeline.step_filters(TIME.get_current_time.total_seconds(), pond_data, reading)
+
+                # OUTPUT
+                out_sink.write(f"{TIME.get_current_time.total_seconds()},{OUT}\n")
+
+                # STEP TIME AND WAIT
+                TIME.step()
+                TIME.wait()
 
         # END LOOP
-        plotting(args, WATER_LEVEL_MIN, WATER_LEVEL_MAX, change_array)
+        controler.close()
+        out_sink.close()
+        kalman_sink.close()
+        plotting(args, WATER_LEVEL_MIN, WATER_LEVEL_MAX, pipeline.change_array)
+        if result_cache is not None:
+            result_cache.store(cache_key, args, {"mode_changes": len(pipeline.change_array)})
     except Exception as e:
+        close_all()
         print(e)
         LOGGER.log("Fatal error shutting down", level=LogLevel.CRITICAL_ERROR)
         raise e
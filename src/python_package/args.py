@@ -1,12 +1,14 @@
 """File for defining Executable file arguments"""
 
-from typing import List
+from typing import List, Tuple
 from datetime import datetime
 from enum import Enum
 import sys
 import tempfile
 import os
 
+from .output import DEFAULT_FLUSH_SIZE, DEFAULT_FLUSH_INTERVAL
+from .time import Clock, parse_clock
 from .rain import artificial_rain as ar, rain_data as rd
 
 
@@ -39,6 +41,7 @@ def out_graph_to_string(graph: OutGraph) -> str:
 
 DEFAULT_RAIN = 10
 DEFAULT_TIME = 100
+DEFAULT_PORT = "COM3"
 DEFAULT_CONTROLER_CACHE = os.path.join(tempfile.gettempdir(), "virtual-pond-controler-errors")
 DEFAULT_OUT = os.path.join(tempfile.gettempdir(), "out.csv")
 DEFAULT_KALMAN = os.path.join(tempfile.gettempdir(), "kalman.csv")
@@ -47,6 +50,9 @@ DEFAULT_OUT_SHOW = False
 DEFAULT_OUT_TYPE = OutType.PNG
 DEFAULT_OUT_GRAPH = OutGraph.RAIN
 DEFAULT_OUT_SUFFIX = False
+DEFAULT_KALMAN_ENGINE = "list"
+DEFAULT_KALMAN_FORMAT = "csv"
+DEFAULT_RUNTIME = "sequential"
 
 HELP = f"""USAGE python <name_of_our_tool> ([ARGUMENT]=[VALUE])*
     [-n  | --name]=string                    -- The name of the experiment
@@ -57,10 +63,13 @@ HELP = f"""USAGE python <name_of_our_tool> ([ARGUMENT]=[VALUE])*
     [-s  | --strategy]=/path/to/file         -- Location of the file that contains the strategy used by the pond
     [-cc | --controler-cache]=/path/to/file  -- Location of the file that the filter may chace to,
                                                 (default={DEFAULT_CONTROLER_CACHE})
+    [-p  | --port]=port                      -- The serial port of the controller, if mode is seriel
+                                                (default={DEFAULT_PORT})
     [-m  | --mode]=mode                      -- What mode is the setup working in, headless there is no real world
                                                 connection to a setup. Seriel there is a connection to a real world
-                                                setup.
-                                                (supporteed mode=[headless | seriel])
+                                                setup. Replay runs the headless experiment in one batched pass
+                                                without the real time loop.
+                                                (supporteed mode=[headless | seriel | replay])
                                                 (default=seriel)
     [-d  | --data]=/path/to/file             -- Location of the file that contains the moched data from the sensor,
                                                 If mode is headless, otherwise this is ignored
@@ -83,15 +92,73 @@ HELP = f"""USAGE python <name_of_our_tool> ([ARGUMENT]=[VALUE])*
                                                 (default={DEFAULT_OUT_SHOW})
     [-k  | --kalman-bank]=/path/to/file      -- Specifies the output file for the kalman banks
                                                 (default={DEFAULT_KALMAN})
+    [-ke | --kalman-engine]=engine           -- Which implementation of the kalman bank is used, list steps each
+                                                filter on its own, vector steps the whole bank as arrays.
+                                                (supported engines=[list | vector])
+                                                (default={DEFAULT_KALMAN_ENGINE})
+    [-kf | --kalman-format]=format           -- The file format of the kalman bank output, binary is a compact
+                                                format of float64 records that can be memory mapped.
+                                                (supported formats=[csv | binary])
+                                                (default={DEFAULT_KALMAN_FORMAT})
+    [-fs | --flush-size]=number              -- How many rows of output are buffered before they are written
+                                                (default={DEFAULT_FLUSH_SIZE})
+    [-fi | --flush-interval]=seconds         -- The longest time output is buffered before it is written
+                                                (default={DEFAULT_FLUSH_INTERVAL})
+    [-rc | --result-cache]=/path/to/folder   -- Folder where the results of headless and replay runs are cached,
+                                                a run with the same inputs, arguments and code reuses the output
+                                                files of the cached run. Runs that show the graphs are not cached.
+                                                (default=no cache)
+    [-rt | --runtime]=runtime                -- How the control loop is run, sequential runs the steps of a tick one
+                                                after the other, async runs reading the sensor, the virtual pond,
+                                                the kalman bank and the output as concurrent asyncio tasks.
+                                                (supported runtimes=[sequential | async])
+                                                (default={DEFAULT_RUNTIME})
+    [-cl | --clock]=clock                    -- How fast time passes, realtime waits for every time step on the wall
+                                                clock, scaled:<factor> passes factor times faster than the wall
+                                                clock and fast does not wait. Timeouts of a headless device and the
+                                                timestamps of the controler cache follow the clock.
+                                                (supported clocks=[realtime | scaled:<factor> | fast])
+                                                (default=realtime if mode is seriel, otherwise fast)
     """
 
 
-class ARGS:
+def parse_out_graph(value: str) -> List[OutGraph]:
+    "Parses a comma separated list of graphs"
+    graphs = []
+    for graph in value.split(","):
+        match graph:
+            case "rain":
+                graphs.append(OutGraph.RAIN)
+            case "control":
+                graphs.append(OutGraph.CONTROL)
+            case "kalman-delta":
+                graphs.append(OutGraph.KALMAN_DELTA)
+            case "kalman":
+                graphs.append(OutGraph.KALMAN)
+            case _:
+                raise ValueError(f"{graph} is not a valid --output-graph")
+    return graphs
+
+
+def parse_choice(option: str, value: str, choices: Tuple[str, ...]) -> str:
+    "Checks that the value of an option is one of its choices"
+    if value not in choices:
+        raise ValueError(f"{value} is not a valid {option}")
+    return value
+
+
+# Every command line option has a property, so ARGS has more public methods than pylint allows
+class ARGS:  # pylint: disable=too-many-public-methods
     """Class for defining executable arguments"""
 
-    def __init__(self, start: datetime):
-        args = list(sys.argv)  # [x for x in sys.argv]
-        args.pop(0)
+    def __init__(self, start: datetime, argv: List[str] | None = None):
+        "Parses argv, if argv is None the arguments of the executable are used"
+        self._start = start
+        if argv is None:
+            args = list(sys.argv)  # [x for x in sys.argv]
+            args.pop(0)
+        else:
+            args = list(argv)
         try:
             for arg in args:
                 if arg in ("-h", "--help"):
@@ -114,6 +181,8 @@ class ARGS:
                         self._file_cache = value
                     case "-cc" | "--controler-cache":
                         self._controler_cache = value
+                    case "-p" | "--port":
+                        self._port = value
                     case "-m" | "--mode":
                         self._mode = value
                     case "-dc" | "--data-control":
@@ -125,25 +194,19 @@ class ARGS:
                     case "-oi" | "--output-image":
                         self._out_image = value
                     case "-og" | "--output-graph":
-                        self._out_graph = []
-                        for graph in value.split(","):
-                            match graph:
-                                case "rain":
-                                    self._out_graph.append(OutGraph.RAIN)
-                                case "control":
-                                    self._out_graph.append(OutGraph.CONTROL)
-                                case "kalman-delta":
-                                    self._out_graph.append(OutGraph.KALMAN_DELTA)
-                                case "kalman":
-                                    self._out_graph.append(OutGraph.KALMAN)
-                                case _:
-                                    raise ValueError(f"{graph} is not a valid --output-graph")
+                        self._out_graph = parse_out_graph(value)
                     case "-os" | "--out-suffix":
                         self._out_suffix = value.lower() == "true"
                     case "-s" | "--show":
                         self._show = value.lower() == "true"
                     case "-k" | "--kalman-bank":
                         self._kalman = value
+                    case "-ke" | "--kalman-engine" | "-kf" | "--kalman-format":
+                        self._parse_kalman_option(cmd_argument, value)
+                    case "-fs" | "--flush-size" | "-fi" | "--flush-interval" | "-rc" | "--result-cache":
+                        self._parse_output_option(cmd_argument, value)
+                    case "-cl" | "--clock" | "-rt" | "--runtime":
+                        self._parse_runtime_option(cmd_argument, value)
                     case "-n" | "--name":
                         self._name = value
         except ValueError as e:
@@ -151,6 +214,32 @@ class ARGS:
             print("\n" + HELP)
             sys.exit(1)
 
+    def _parse_kalman_option(self, option: str, value: str) -> None:
+        "Parses the options of the kalman bank"
+        match option:
+            case "-ke" | "--kalman-engine":
+                self._kalman_engine = parse_choice("--kalman-engine", value, ("list", "vector"))
+            case "-kf" | "--kalman-format":
+                self._kalman_format = parse_choice("--kalman-format", value, ("csv", "binary"))
+
+    def _parse_output_option(self, option: str, value: str) -> None:
+        "Parses the options of how output is written and cached"
+        match option:
+            case "-fs" | "--flush-size":
+                self._flush_size = int(value)
+            case "-fi" | "--flush-interval":
+                self._flush_interval = float(value)
+            case "-rc" | "--result-cache":
+                self._result_cache = value
+
+    def _parse_runtime_option(self, option: str, value: str) -> None:
+        "Parses the options of how the control loop is run"
+        match option:
+            case "-cl" | "--clock":
+                self._clock = parse_clock(value, self._start)
+            case "-rt" | "--runtime":
+                self._runtime = parse_choice("--runtime", value, ("sequential", "async"))
+
     @property
     def rain(self):
         """Gets the rain object for the experiemt"""
@@ -186,6 +275,14 @@ class ARGS:
         except AttributeError:
             return DEFAULT_CONTROLER_CACHE
 
+    @property
+    def port(self) -> str:
+        """The serial port of the controller"""
+        try:
+            return self._port
+        except AttributeError:
+            return DEFAULT_PORT
+
     @property
     def time(self):
         """The allotet time the experiment should run"""
@@ -195,10 +292,15 @@ class ARGS:
 
     @property
     def mode(self):
-        """Should the mode be headless or serial"""
+        """Should the mode be headless, serial or replay"""
         try:
-            if self._mode != "headless":
-                return Mode.SERIEL
+            match self._mode:
+                case "headless":
+                    return Mode.HEADLESS
+                case "replay":
+                    return Mode.REPLAY
+                case _:
+                    return Mode.SERIEL
         except AttributeError:
             pass
         return Mode.HEADLESS
@@ -254,6 +356,64 @@ class ARGS:
         except AttributeError:
             return DEFAULT_KALMAN
 
+    @property
+    def kalman_engine(self) -> str:
+        """The implementation of the kalman bank that should be used"""
+        try:
+            return self._kalman_engine
+        except AttributeError:
+            return DEFAULT_KALMAN_ENGINE
+
+    @property
+    def kalman_format(self) -> str:
+        """The file format of the kalman bank output"""
+        try:
+            return self._kalman_format
+        except AttributeError:
+            return DEFAULT_KALMAN_FORMAT
+
+    @property
+    def flush_size(self) -> int:
+        """How many rows of output are buffered before they are written"""
+        try:
+            return self._flush_size
+        except AttributeError:
+            return DEFAULT_FLUSH_SIZE
+
+    @property
+    def flush_interval(self) -> float:
+        """The longest time in seconds output is buffered before it is written"""
+        try:
+            return self._flush_interval
+        except AttributeError:
+            return DEFAULT_FLUSH_INTERVAL
+
+    @property
+    def result_cache(self) -> str | None:
+        """The folder where results are cached, None if results are not cached"""
+        try:
+            return self._result_cache
+        except AttributeError:
+            return None
+
+    @property
+    def runtime(self) -> str:
+        """How the control loop is run"""
+        try:
+            return self._runtime
+        except AttributeError:
+            return DEFAULT_RUNTIME
+
+    @property
+    def clock(self) -> Clock:
+        """The clock that the run waits on"""
+        try:
+            return self._clock
+        except AttributeError:
+            # The default clock is only created once, so every part of the run waits on the same clock
+            self._clock = parse_clock("realtime" if self.mode is Mode.SERIEL else "fast", self._start)
+            return self._clock
+
     @property
     def name(self):
         """Indicates the name of the experiment"""
@@ -290,3 +450,4 @@ class Mode(Enum):
 
     SERIEL = 0
     HEADLESS = 1
+    REPLAY = 2
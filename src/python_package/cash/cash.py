@@ -3,7 +3,11 @@
 from abc import abstractmethod
 from datetime import datetime
 from typing import Any, List, Self
+import bisect
 import io
+import itertools
+import mmap
+import os
 
 DATE_STRING_FORMAT = "%Y-%m-%d %H:%M:%S"
 
@@ -63,111 +67,207 @@ class Cache:
     def __iter__(self) -> CacheIter: ...
 
 
-class FileCache(Cache):
-    """Class for defineing a file for writing and reading data"""
+def _parse_line(line: str) -> CacheData:
+    "Parses a line written by FileCache.insert"
+    s = line.rstrip("\n").split("#", 2)
+    return CacheData(int(s[0]), datetime.fromisoformat(s[1]), s[2].split(";"))
+
 
-    def __init__(self, file_name: str):
-        self.file_name = file_name  # open(file_name, "a+", -1, "UTF-8")
-        self._index = self._get_index_at_end_of_file()
+class FileCache(Cache):
+    """
+    Class for defineing a file for writing and reading data.
+    The byte offset of every line is indexed by id and by timestamp, so a lookup is a bisect and a single read.
+    If persist_index is True the index is also kept in a sidecar file next to the cache,
+    so opening a large cache does not have to parse the whole file.
+    """
+
+    def __init__(self, file_name: str, persist_index: bool = False):
+        self.file_name = file_name
+        self.index_file = f"{file_name}.idx" if persist_index else None
+        self._id_offsets: dict[int, int] = {}
+        self._times: list[datetime] = []
+        self._time_offsets: list[int] = []
+        self._index = 0
+        self._build_index()
 
     def __iter__(self) -> CacheIter:
-        with open(self.file_name, "a+", -1, "UTF-8") as file:
-            file.seek(0)
-            return FileCacheIter(file.readlines())
-
-    def _get_index_at_end_of_file(self):
-        with open(self.file_name, "a+", -1, "UTF-8") as file:
-            file.seek(0, io.SEEK_END)
-            end = file.tell()
-            if end <= 3:
-                return 0
-
-            file.seek(end - 3)
-            while file.read(1) != "\n":
-                new_pos = file.tell() - 2
-                if new_pos < 0:
-                    return 1
-                print(new_pos)
-                file.seek(new_pos, io.SEEK_SET)
-            last = file.read()
-            print(last.split("#")[0])
-            return int(last.split("#")[0])
+        return FileCacheIter(self.file_name)
+
+    def iter_from(self, time: datetime | None = None, data_id: int | None = None, reverse: bool = False) -> CacheIter:
+        """
+        Iterates over the entries in the order they were written, starting at the entry with the id 'data_id'
+        or the first entry at or after 'time'. If 'reverse' is True the entries are iterated towards the start
+        of the file, starting at the entry with the id 'data_id' or the last entry at or before 'time'.
+        """
+        offset: int | None = None
+        if data_id is not None:
+            offset = self._id_offsets.get(data_id, -1)
+        elif time is not None:
+            i = bisect.bisect_right(self._times, time) - 1 if reverse else bisect.bisect_left(self._times, time)
+            offset = self._time_offsets[i] if 0 <= i < len(self._time_offsets) else -1
+
+        iterator = FileCacheIter(self.file_name, offset, reverse)
+        if offset == -1:
+            iterator.close()  # There is nothing to iterate over
+        return iterator
+
+    def latest(self, count: int) -> List[CacheData]:
+        """The newest 'count' entries in the file, newest first"""
+        return list(itertools.islice(self.iter_from(reverse=True), count))
+
+    def __len__(self) -> int:
+        return len(self._time_offsets)
+
+    def _add_to_index(self, data_id: int, time: datetime, offset: int) -> None:
+        "Adds a line to the index, the timestamps are kept sorted"
+        self._id_offsets[data_id] = offset
+        self._index = max(self._index, data_id)
+        if not self._times or self._times[-1] <= time:
+            self._times.append(time)
+            self._time_offsets.append(offset)
+        else:
+            i = bisect.bisect_right(self._times, time)
+            self._times.insert(i, time)
+            self._time_offsets.insert(i, offset)
+
+    def _build_index(self) -> None:
+        "Loads the sidecar index if it is valid and indexes the lines that are not in it"
+        with open(self.file_name, "ab") as file:
+            size = file.tell()
+
+        start = self._load_index_file(size)
+        sidecar = None
+        if self.index_file is not None:
+            sidecar = open(self.index_file, "a" if start else "w", -1, "UTF-8")  # pylint: disable=consider-using-with
+        try:
+            with open(self.file_name, "rb") as file:
+                file.seek(start)
+                offset = start
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        break  # A line that is still being written
+                    data_id, time, _ = line.decode("UTF-8").split("#", 2)
+                    self._add_to_index(int(data_id), datetime.fromisoformat(time), offset)
+                    if sidecar is not None:
+                        sidecar.write(f"{data_id}#{time}#{offset}\n")
+                    offset += len(line)
+        finally:
+            if sidecar is not None:
+                sidecar.close()
+
+    def _load_index_file(self, size: int) -> int:
+        "Reads the sidecar index, returns the offset of the first line that is not indexed"
+        if self.index_file is None or not os.path.isfile(self.index_file):
+            return 0
+
+        entries = []
+        with open(self.index_file, "r", -1, "UTF-8") as file:
+            for line in file:
+                try:
+                    data_id, time, offset = line.split("#")
+                    entries.append((int(data_id), datetime.fromisoformat(time), int(offset)))
+                except ValueError:
+                    return 0
+        if not entries:
+            return 0
+
+        # The sidecar is only trusted if its last entry still points at the start of its line in the cache
+        last_id, _, last_offset = entries[-1]
+        if last_offset >= size:
+            return 0
+        with open(self.file_name, "rb") as file:
+            file.seek(last_offset)
+            last = file.readline()
+        if not last.startswith(f"{last_id}#".encode()) or not last.endswith(b"\n"):
+            return 0
+
+        for data_id, time, offset in entries:
+            self._add_to_index(data_id, time, offset)
+        return last_offset + len(last)
+
+    def _read_at(self, offset: int) -> CacheData:
+        "Reads the line starting at offset"
+        with open(self.file_name, "rb") as file:
+            file.seek(offset)
+            return _parse_line(file.readline().decode("UTF-8"))
 
     def insert(self, data: CacheData):
-        with open(self.file_name, "a+", -1, "UTF-8") as file:
-            self._index += 1
-            file.seek(0, io.SEEK_END)
-            file_data = ";".join([str(x) for x in data.data_list])
-            file.write(f"{self._index}#{data.time.strftime(DATE_STRING_FORMAT)}#{file_data}\n")
+        self._index += 1
+        time = data.time.strftime(DATE_STRING_FORMAT)
+        file_data = ";".join([str(x) for x in data.data_list])
+        with open(self.file_name, "ab") as file:
+            offset = file.tell()
+            file.write(f"{self._index}#{time}#{file_data}\n".encode("UTF-8"))
+        if self.index_file is not None:
+            with open(self.index_file, "a", -1, "UTF-8") as file:
+                file.write(f"{self._index}#{time}#{offset}\n")
+        self._add_to_index(self._index, datetime.fromisoformat(time), offset)
 
     def get(self, data_id: int) -> CacheData | None:
-        with open(self.file_name, "a+", -1, "UTF-8") as file:
-            file.seek(0)
-            for line in file.readlines():
-                s = line.split("#")
-                if int(s[0]) == data_id:
-                    return CacheData(data_id, datetime.strptime(s[1], DATE_STRING_FORMAT), s[2].split(";"))
+        offset = self._id_offsets.get(data_id)
+        if offset is None:
             return None
+        return self._read_at(offset)
 
     def get_nearest_before(self, time: datetime) -> CacheData | None:
-        with open(self.file_name, "a+", -1, "UTF-8") as file:
-            file.seek(0)
-            lines = file.readlines()
-            before_line = None
-            for line in lines:
-                s = line.split("#")
-                time_now = datetime.strptime(s[1], DATE_STRING_FORMAT)
-                if time <= time_now:
-                    if before_line is not None:
-                        return CacheData(
-                            int(before_line[0]),
-                            datetime.strptime(before_line[1], DATE_STRING_FORMAT),
-                            before_line[2].split(";"),
-                        )
-
-                    return None
-            before_line = s
-        return None
-
-    def get_nearest_after(self, time: datetime) -> CacheData | None:
-        with open(self.file_name, "a+", -1, "UTF-8") as file:
-            file.seek(0)
-            lines = file.readlines()
-            for line in lines:
-                s = line.split("#")
-                time_now = datetime.strptime(s[1], DATE_STRING_FORMAT)
-                if time <= time_now:
-                    return CacheData(int(s[0]), time_now, s[2].split(";"))
+        i = bisect.bisect_left(self._times, time)
+        if i == 0:
             return None
+        return self._read_at(self._time_offsets[i - 1])
 
-    def get_nearest(self, time: datetime) -> CacheData | None:
-        with open(self.file_name, "a+", -1, "UTF-8") as file:
-            file.seek(0)
-            lines = file.readlines()
-            lines = iter(lines)
-            # lines = lines.__iter__()
-            for line in lines:
-                s = line.split("#")
-                time_now = datetime.strptime(s[1], DATE_STRING_FORMAT)
-                if time <= time_now:
-                    s_after = next(lines).split("#")
-                    # s_after = lines.__next__().split("#")
-                    time_after = datetime.strptime(s_after[1], DATE_STRING_FORMAT)
-
-                    if abs((time_after - time).total_seconds() > abs((time_now - time).total_seconds())):
-                        return CacheData(int(s[0]), time_now, s[2].split(";"))
-
-                    return CacheData(int(s_after[0]), time_after, s_after[2].split(";"))
+    def get_nearest_after(self, time: datetime) -> CacheData | None:
+        i = bisect.bisect_left(self._times, time)
+        if i == len(self._times):
             return None
+        return self._read_at(self._time_offsets[i])
 
 
 class FileCacheIter(CacheIter):
-    """Iterater for cache files"""
-
-    def __init__(self, lines: list[str]):
-        self.lines = lines.__iter__()
+    """
+    Iterater for cache files.
+    The file is memory mapped and the lines are parsed one at a time, so only the current entry is kept in memory.
+    Entries written after the iterator was created are not included.
+    """
+
+    def __init__(self, file_name: str, offset: int | None = None, reverse: bool = False):
+        "Iterates from the line starting at 'offset', or from the start (end if 'reverse') of the file"
+        self.reverse = reverse
+        self._map: mmap.mmap | None = None
+        self._position = 0
+        with open(file_name, "rb") as file:
+            if file.seek(0, io.SEEK_END) == 0:
+                return  # Empty files can not be memory mapped
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if not reverse:
+            self._position = offset or 0
+        elif offset is None:
+            self._position = self._map.rfind(b"\n") + 1
+        else:
+            self._position = self._map.find(b"\n", offset) + 1
 
     def __next__(self) -> CacheData:
-        line = self.lines.__next__()
-        s = line.split("#")
-        return CacheData(int(s[0]), datetime.strptime(s[1], DATE_STRING_FORMAT), s[2].split(";"))
+        if self._map is None:
+            raise StopIteration
+
+        if self.reverse:
+            end = self._position
+            if end <= 0:
+                self.close()
+                raise StopIteration
+            self._position = self._map.rfind(b"\n", 0, end - 1) + 1
+            line = self._map[self._position : end]
+        else:
+            end = self._map.find(b"\n", self._position)
+            if end == -1:  # End of file or a line that is still being written
+                self.close()
+                raise StopIteration
+            line = self._map[self._position : end + 1]
+            self._position = end + 1
+        return _parse_line(line.decode("UTF-8"))
+
+    def close(self) -> None:
+        "Unmaps the file, the iterator is exhausted afterwards"
+        if self._map is not None:
+            self._map.close()
+            self._map = None
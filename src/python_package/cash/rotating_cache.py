@@ -0,0 +1,248 @@
+"""
+Contains a cache that is split into segment files by time and size.
+The segments are listed in a json manifest in the cache folder, together with the time span and ids they contain,
+so lookups only open the segments that can contain the result. Old segments are deleted by the retention limits.
+"""
+
+from datetime import datetime, timedelta
+from typing import Iterator, List
+import bisect
+import itertools
+import json
+import os
+from .cash import Cache, CacheData, CacheIter, FileCache
+
+MANIFEST = "manifest.json"
+DEFAULT_SEGMENT_DURATION = timedelta(hours=1)
+DEFAULT_SEGMENT_SIZE = 1024 * 1024
+DEFAULT_MAX_SEGMENTS = 24 * 7
+
+
+class Segment:
+    """A segment file, the ids in the file are offset by first_id - 1"""
+
+    def __init__(
+        self,
+        file: str,
+        bucket: datetime,
+        first_id: int,
+        count: int = 0,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ):
+        self.file = file
+        self.bucket = bucket
+        self.first_id = first_id
+        self.count = count
+        self.start = start
+        self.end = end
+
+    def to_json(self) -> dict:
+        "The segment as an entry in the manifest"
+        return {
+            "file": self.file,
+            "bucket": self.bucket.isoformat(),
+            "first_id": self.first_id,
+            "count": self.count,
+            "start": None if self.start is None else self.start.isoformat(),
+            "end": None if self.end is None else self.end.isoformat(),
+        }
+
+    @staticmethod
+    def from_json(entry: dict) -> "Segment":
+        "Reads a segment from an entry in the manifest"
+        return Segment(
+            entry["file"],
+            datetime.fromisoformat(entry["bucket"]),
+            entry["first_id"],
+            entry["count"],
+            None if entry["start"] is None else datetime.fromisoformat(entry["start"]),
+            None if entry["end"] is None else datetime.fromisoformat(entry["end"]),
+        )
+
+
+class RotatingFileCacheIter(CacheIter):
+    """Iterator over the entries of a rotating cache"""
+
+    def __init__(self, entries: Iterator[CacheData]):
+        self.entries = entries
+
+    def __next__(self) -> CacheData:
+        return next(self.entries)
+
+
+class RotatingFileCache(Cache):
+    """
+    A cache stored as a folder of segment files.
+    A new segment is started when an entry belongs to a later time bucket than the current segment,
+    or when the current segment is larger than segment_size bytes.
+    Entries are expected to be inserted in time order, the ids continue across segments.
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        segment_duration: timedelta = DEFAULT_SEGMENT_DURATION,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        max_segments: int | None = DEFAULT_MAX_SEGMENTS,
+        max_age: timedelta | None = None,
+    ):
+        self.folder = folder
+        self.segment_duration = segment_duration
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        self.max_age = max_age
+        self._segments: List[Segment] = []
+        self._caches: dict[str, FileCache] = {}
+        self._sequence = 0
+        os.makedirs(folder, exist_ok=True)
+        self._load_manifest()
+
+    def __len__(self) -> int:
+        return sum(segment.count for segment in self._segments)
+
+    def __iter__(self) -> CacheIter:
+        return self.query()
+
+    def _load_manifest(self) -> None:
+        "Reads the manifest, the last segment is recounted as entries may have been written after the manifest"
+        path = os.path.join(self.folder, MANIFEST)
+        if not os.path.isfile(path):
+            return
+        with open(path, "r", -1, "UTF-8") as file:
+            manifest = json.load(file)
+        self._sequence = manifest["sequence"]
+        self._segments = [Segment.from_json(entry) for entry in manifest["segments"]]
+        self._segments = [segment for segment in self._segments if os.path.isfile(self._path(segment))]
+        if self._segments:
+            self._refresh(self._segments[-1])
+
+    def _write_manifest(self) -> None:
+        "Replaces the manifest, a reader never sees a partially written manifest"
+        path = os.path.join(self.folder, MANIFEST)
+        with open(path + ".tmp", "w", -1, "UTF-8") as file:
+            json.dump({"sequence": self._sequence, "segments": [s.to_json() for s in self._segments]}, file)
+        os.replace(path + ".tmp", path)
+
+    def _path(self, segment: Segment) -> str:
+        return os.path.join(self.folder, segment.file)
+
+    def _cache(self, segment: Segment) -> FileCache:
+        "The cache of a segment, the segment is indexed the first time it is used"
+        cache = self._caches.get(segment.file)
+        if cache is None:
+            cache = FileCache(self._path(segment))
+            self._caches[segment.file] = cache
+        return cache
+
+    def _refresh(self, segment: Segment) -> None:
+        "Updates the count and time span of a segment from its file"
+        cache = self._cache(segment)
+        segment.count = len(cache)
+        latest = cache.latest(1)
+        if latest:
+            segment.start = segment.start or next(iter(cache)).time
+            segment.end = latest[0].time
+
+    def _bucket(self, time: datetime) -> datetime:
+        "The start of the time bucket that 'time' belongs to"
+        return datetime.min + (time - datetime.min) // self.segment_duration * self.segment_duration
+
+    def _should_rotate(self, bucket: datetime) -> bool:
+        if not self._segments:
+            return True
+        current = self._segments[-1]
+        if current.bucket != bucket:
+            return True
+        return os.path.getsize(self._path(current)) >= self.segment_size
+
+    def _rotate(self, bucket: datetime) -> None:
+        "Starts a new segment and applies the retention limits"
+        first_id = self._segments[-1].first_id + self._segments[-1].count if self._segments else 1
+        self._sequence += 1
+        self._segments.append(Segment(f"segment-{bucket:%Y%m%d-%H%M%S}-{self._sequence}.log", bucket, first_id))
+
+        expired = 0
+        if self.max_segments is not None:
+            expired = max(0, len(self._segments) - self.max_segments)
+        if self.max_age is not None:
+            oldest = bucket - self.max_age
+            while expired < len(self._segments) - 1 and (self._segments[expired].end or bucket) < oldest:
+                expired += 1
+        for segment in self._segments[:expired]:
+            self._caches.pop(segment.file, None)
+            if os.path.isfile(self._path(segment)):
+                os.remove(self._path(segment))
+        del self._segments[:expired]
+        self._write_manifest()
+
+    def _global(self, segment: Segment, data: CacheData | None) -> CacheData | None:
+        "Converts an entry read from a segment to the ids of the whole cache"
+        if data is None:
+            return None
+        return CacheData(data.data_id + segment.first_id - 1, data.time, data.data_list)
+
+    def insert(self, data: CacheData):
+        bucket = self._bucket(data.time)
+        if self._should_rotate(bucket):
+            self._rotate(bucket)
+        segment = self._segments[-1]
+        self._cache(segment).insert(data)
+        segment.count += 1
+        time = data.time.replace(microsecond=0)  # The segment files store whole seconds
+        segment.start = segment.start or time
+        segment.end = time
+
+    def get(self, data_id: int) -> CacheData | None:
+        i = bisect.bisect_right([segment.first_id for segment in self._segments], data_id) - 1
+        if i < 0:
+            return None
+        segment = self._segments[i]
+        return self._global(segment, self._cache(segment).get(data_id - segment.first_id + 1))
+
+    def get_nearest_before(self, time: datetime) -> CacheData | None:
+        for segment in reversed(self._segments):
+            if segment.start is not None and segment.start < time:
+                return self._global(segment, self._cache(segment).get_nearest_before(time))
+        return None
+
+    def get_nearest_after(self, time: datetime) -> CacheData | None:
+        for segment in self._segments:
+            if segment.end is not None and segment.end >= time:
+                return self._global(segment, self._cache(segment).get_nearest_after(time))
+        return None
+
+    def query(self, start: datetime | None = None, end: datetime | None = None) -> CacheIter:
+        """Iterates over the entries with start <= time < end, segments outside the span are not opened"""
+        segments = [
+            segment
+            for segment in self._segments
+            if segment.count
+            and (start is None or segment.end is None or segment.end >= start)
+            and (end is None or segment.start is None or segment.start < end)
+        ]
+        entries = itertools.chain.from_iterable(
+            (self._global(segment, data) for data in self._cache(segment).iter_from(time=start)) for segment in segments
+        )
+        if end is not None:
+            entries = itertools.takewhile(lambda data: data.time < end, entries)
+        return RotatingFileCacheIter(entries)
+
+    def latest(self, count: int) -> List[CacheData]:
+        """The newest 'count' entries across all segments, newest first"""
+        result: List[CacheData] = []
+        for segment in reversed(self._segments):
+            if len(result) >= count:
+                break
+            result += [self._global(segment, data) for data in self._cache(segment).latest(count - len(result))]
+        return result
+
+    def close(self) -> None:
+        """Records the current segment in the manifest"""
+        if self._segments:
+            self._write_manifest()
+
+    @property
+    def get_segments(self) -> List[Segment]:
+        "The segments from oldest to newest"
+        return list(self._segments)
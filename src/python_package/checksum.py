@@ -0,0 +1,78 @@
+"THIS FILE CONTAINS CHECKSUMS OF INPUT FILES, EXPERIMENT CONFIGURATIONS AND THE PACKAGE SOURCE"
+
+from functools import lru_cache
+from typing import Iterable
+import hashlib
+import json
+import os
+from .config import ExperimentConfig
+
+_CHUNK_SIZE = 1024 * 1024
+# The scripts in the folder of the package that run experiments and write their results
+ENTRY_SCRIPTS = ("main.py", "run_all.py", "sweep.py", "gateway.py")
+
+
+def file_checksum(file: str) -> str:
+    "The sha256 of the content of a file"
+    digest = hashlib.sha256()
+    with open(file, "rb") as f:
+        while chunk := f.read(_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def files_checksum(files: Iterable[str]) -> str:
+    "A checksum of the names and contents of the files, renaming a file changes the checksum"
+    digest = hashlib.sha256()
+    for file in files:
+        digest.update(os.path.basename(file).encode("utf-8") + b"\0")
+        digest.update(file_checksum(file).encode("ascii"))
+    return digest.hexdigest()
+
+
+def value_checksum(value) -> str:
+    "The sha256 of a json serializable value, dictionaries are hashed independent of key order"
+    text = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def config_values(config: ExperimentConfig) -> dict:
+    "The parameters of an experiment config as a json serializable dictionary"
+    values = {key: value for key, value in vars(config).items() if key != "faults"}
+    values["faults"] = [
+        [fault.get_value, fault.get_classification, fault.get_fault_type.name] for fault in config.faults
+    ]
+    return values
+
+
+def config_checksum(config: ExperimentConfig) -> str:
+    "A checksum of every parameter of an experiment config"
+    return value_checksum(config_values(config))
+
+
+def tree_checksum(package: str, scripts: Iterable[str] = ()) -> str:
+    "A checksum of the python files of a package folder and of the scripts, scripts that do not exist are skipped"
+    files = []
+    for folder, folders, names in os.walk(package):
+        folders[:] = sorted(f for f in folders if f != "__pycache__")
+        files += [os.path.join(folder, name) for name in sorted(names) if name.endswith(".py")]
+
+    digest = hashlib.sha256()
+    for file in files:
+        digest.update(os.path.relpath(file, package).encode("utf-8") + b"\0")
+        digest.update(file_checksum(file).encode("ascii"))
+    for script in scripts:
+        if os.path.isfile(script):
+            digest.update(b"script:" + os.path.basename(script).encode("utf-8") + b"\0")
+            digest.update(file_checksum(script).encode("ascii"))
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def source_checksum() -> str:
+    """
+    A checksum of the python source of this package and of the scripts next to it that run experiments,
+    it changes whenever the code changes
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    return tree_checksum(root, [os.path.join(os.path.dirname(root), script) for script in ENTRY_SCRIPTS])
@@ -0,0 +1,65 @@
+"THIS FILE CONTAINS THE CONSTANTS DESCRIBING THE POND AND THE KALMAN BANK OF AN EXPERIMENT"
+
+from typing import List
+from .kalman_filter.fault import ConstantFault, FaultType
+
+FAULTS = [
+    ConstantFault(50.0, "higher", FaultType.ADD),
+    ConstantFault(50.0, "lower", FaultType.SUBTRACT),
+    ConstantFault(1.15, "higher", FaultType.MULTIPLY),
+    ConstantFault(0.85, "lower", FaultType.MULTIPLY),
+]
+
+# -- POND DATA
+URBAN_CATCHMENT_AREA = 1.85
+SURFACE_REACTION_FACTOR = 0.25
+DISCHARGE_COEFICENT = 0.6
+POND_AREA = 5572
+WATER_LEVEL = 700
+WATER_LEVEL_MIN = 100
+WATER_LEVEL_MAX = 850
+ORIFICE = "med"
+
+# -- KALMAN BANK
+KALMAN_INITIAL_VARIANCE = 100
+KALMAN_NOICE = 0.1
+
+# -- DELAY
+KALMAN_DELAY = 50
+
+# -- TIME
+TIME_DELTA = 11
+
+
+class ExperimentConfig:
+    "The pond and kalman bank parameters of an experiment, defaults to the constants in this file"
+
+    def __init__(
+        self,
+        urban_catchment_area: float = URBAN_CATCHMENT_AREA,
+        surface_reaction_factor: float = SURFACE_REACTION_FACTOR,
+        discharge_coeficent: float = DISCHARGE_COEFICENT,
+        pond_area: float = POND_AREA,
+        water_level: float = WATER_LEVEL,
+        water_level_min: float = WATER_LEVEL_MIN,
+        water_level_max: float = WATER_LEVEL_MAX,
+        orifice: str = ORIFICE,
+        kalman_initial_variance: float = KALMAN_INITIAL_VARIANCE,
+        kalman_noice: float = KALMAN_NOICE,
+        kalman_delay: float = KALMAN_DELAY,
+        time_delta: int = TIME_DELTA,
+        faults: List[ConstantFault] | None = None,
+    ):
+        self.urban_catchment_area = urban_catchment_area
+        self.surface_reaction_factor = surface_reaction_factor
+        self.discharge_coeficent = discharge_coeficent
+        self.pond_area = pond_area
+        self.water_level = water_level
+        self.water_level_min = water_level_min
+        self.water_level_max = water_level_max
+        self.orifice = orifice
+        self.kalman_initial_variance = kalman_initial_variance
+        self.kalman_noice = kalman_noice
+        self.kalman_delay = kalman_delay
+        self.time_delta = time_delta
+        self.faults = FAULTS if faults is None else faults
@@ -0,0 +1,48 @@
+"""
+Contains streaming readers of the csv files of numbers that sensor readings and rain are recorded in.
+A file is parsed a chunk of rows at a time, so a recording does not have to fit in memory to be read.
+"""
+
+from typing import Iterator, Tuple
+import itertools
+import warnings
+import numpy as np
+
+CHUNK_SIZE = 65536
+
+
+def read_chunks(file: str, columns: int = 2, chunk_size: int = CHUNK_SIZE) -> Iterator[np.ndarray]:
+    """
+    Reads the first columns of a comma separated file of numbers.
+    Yields float arrays of shape (rows, columns) of at most chunk_size rows, blank lines are skipped.
+    """
+    with open(file, "r", encoding="utf-8") as csvfile:
+        while lines := list(itertools.islice(csvfile, chunk_size)):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", UserWarning)  # A chunk of blank lines is empty
+                chunk = np.loadtxt(lines, delimiter=",", dtype=np.float64, usecols=range(columns), ndmin=2)
+            if len(chunk) > 0:
+                yield chunk
+
+
+def read_columns(file: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    "Reads a file of 'time,value' rows as chunks of times and values"
+    for chunk in read_chunks(file, 2, chunk_size):
+        yield chunk[:, 0], chunk[:, 1]
+
+
+def load_columns(file: str) -> Tuple[np.ndarray, np.ndarray]:
+    "Reads a whole file of 'time,value' rows in one pass as float arrays of times and values"
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)  # Empty files are allowed
+        data = np.loadtxt(file, delimiter=",", dtype=np.float64, usecols=(0, 1), ndmin=2)
+    if len(data) == 0:
+        return np.zeros(0), np.zeros(0)
+    return data[:, 0], data[:, 1]
+
+
+def is_sorted(times: np.ndarray, previous: float | None = None) -> bool:
+    "Are the times of a chunk in order, and not before previous, the last time of the chunk before"
+    if len(times) == 0:
+        return True
+    return bool((previous is None or previous <= times[0]) and np.all(times[1:] >= times[:-1]))
@@ -55,3 +55,34 @@ class Fault:
     def get_fault_type(self) -> FaultType:
         "Returns the fault type"
         return self._fault_type
+
+
+def _constant_fault_function(value: float, fault_type: FaultType) -> Callable[[MeasurementData], MeasurementData]:
+    "Creates the fault function applying value to the measured height according to fault_type"
+    match fault_type:
+        case FaultType.ADD:
+            return lambda x: MeasurementData(x.height() + value, x.variance_height())
+        case FaultType.SUBTRACT:
+            return lambda x: MeasurementData(x.height() - value, x.variance_height())
+        case FaultType.MULTIPLY:
+            return lambda x: MeasurementData(x.height() * value, x.variance_height())
+        case FaultType.DIVIDE:
+            return lambda x: MeasurementData(x.height() / value, x.variance_height())
+        case _:
+            return lambda x: x
+
+
+class ConstantFault(Fault):
+    """
+    A fault described by its fault type and a constant value instead of a function.
+    Because the fault is declarative it can be applied to a whole bank of filters at once.
+    """
+
+    def __init__(self, value: float, classification: str, fault_type: FaultType) -> None:
+        super().__init__(_constant_fault_function(value, fault_type), classification, fault_type)
+        self._value = value
+
+    @property
+    def get_value(self) -> float:
+        "Returns the constant that is applied to the measured height"
+        return self._value
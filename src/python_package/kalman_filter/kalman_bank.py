@@ -4,6 +4,7 @@ from enum import Enum
 from .kalman import Kalman, MeasurementData, PondState
 from ..time import Time
 from .fault import Fault, FaultType
+from ..output import OutputSink, Sink
 
 DEBUG_MODE = False
 
@@ -24,7 +25,7 @@ class KalmanBank:
         initial_variance: float,
         time: Time,
         noice: float,
-        out_file: str,
+        out_file: str | Sink,
     ):
         self.faults: List[Fault] = []
         self.initial_state = initial_state
@@ -32,10 +33,7 @@ class KalmanBank:
         self.initial_variance = initial_variance
         self.time = time
         self.noice = noice
-        self.out_file = out_file
-
-        with open(self.out_file, "w", encoding="utf-8"):
-            pass
+        self.out_file = out_file if isinstance(out_file, Sink) else OutputSink(out_file)
 
         self.add_faults(faults)
 
@@ -87,7 +85,7 @@ class KalmanBank:
                 k.step(pond_state, self.faults[i - 1].get_fault(measured_data))
         self._write_to_csv(measured_data, predict_before_step)
         # error reporting
-        if not fault_detection and not len(self.out_file) == 1:
+        if not fault_detection:
             if DEBUG_MODE:
                 filter_report_string = "Waterlevel threshold exceeded in filters: \n"
                 for i, f in enumerate(faulty_filters):
@@ -160,43 +158,23 @@ class KalmanBank:
         """
         Writes kalman filter values to a csv file.
         """
-        current_time = []
-        noice = []
-        current_state = []
-        predicted_state = []
-        variance = []
-        predicted_variance = []
-        delta_to_predicted_state = []
-
+        row = []
         for i, f in enumerate(self.kalman_bank):
-            current_time.append(f.get_time.get_current_time.total_seconds())
-            noice.append(f.get_noice)
-            current_state.append(f.get_state)
-            predicted_state.append(f.get_predicted_state)
-            variance.append(f.get_variance)
-            predicted_variance.append(f.get_predict_variance)
-            delta_to_predicted_state.append(predicted_data[i] - measured_data.height())
-
-        with open(self.out_file, "a", encoding="utf-8") as f:
-            f.write(
-                ",".join(
-                    [
-                        ",".join([str(x) for x in list(p)])
-                        for p in zip(
-                            current_time,
-                            noice,
-                            current_state,
-                            predicted_state,
-                            variance,
-                            predicted_variance,
-                            delta_to_predicted_state,
-                        )
-                    ]
-                )
-                + ","
-                + str(measured_data.height())
-                + "\n"
+            row += (
+                f.get_time.get_current_time.total_seconds(),
+                f.get_noice,
+                f.get_state,
+                f.get_predicted_state,
+                f.get_variance,
+                f.get_predict_variance,
+                predicted_data[i] - measured_data.height(),
             )
+        row.append(measured_data.height())
+        self.out_file.write_row(row)
+
+    def close(self) -> None:
+        "Flushes and closes the output file"
+        self.out_file.close()
 
     @property
     def get_kalman_bank(self) -> List[Kalman]:
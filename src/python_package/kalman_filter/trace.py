@@ -0,0 +1,111 @@
+"""
+THIS FILE CONTAINS A BINARY FORMAT FOR KALMAN BANK TRACES
+
+A trace file starts with a header followed by fixed width records of little endian float64 values.
+The header is the magic bytes, the number of filters, the number of columns and the length of the
+column names as little endian uint32, followed by the comma separated column names padded to 8 bytes.
+The records have the same columns as the csv trace written by the KalmanBank, so they can be appended
+during the run and memory mapped by readers.
+"""
+
+from typing import Iterable, List, Tuple
+import struct
+import sys
+import numpy as np
+from ..output import DEFAULT_FLUSH_INTERVAL, DEFAULT_FLUSH_SIZE, Sink
+
+MAGIC = b"KBTRACE1"
+FILTER_COLUMNS = ["time", "noice", "state", "predicted_state", "variance", "predicted_variance", "delta"]
+RECORD_TYPE = np.dtype("<f8")
+_HEADER = struct.Struct("<III")
+
+
+def trace_columns(filter_count: int) -> List[str]:
+    "The names of the columns of a trace of a bank with filter_count filters"
+    columns = [f"{column}_{i}" for i in range(filter_count) for column in FILTER_COLUMNS]
+    columns.append("measured")
+    return columns
+
+
+def _header(filter_count: int) -> bytes:
+    "Creates the header of a trace file"
+    names = ",".join(trace_columns(filter_count)).encode("utf-8")
+    names += b" " * (-(len(MAGIC) + _HEADER.size + len(names)) % 8)
+    return MAGIC + _HEADER.pack(filter_count, len(FILTER_COLUMNS) * filter_count + 1, len(names)) + names
+
+
+def is_binary_trace(file: str) -> bool:
+    "Does the file start with the magic bytes of a binary trace"
+    with open(file, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class BinaryTraceSink(Sink):
+    """Writes the kalman bank trace as binary records"""
+
+    def __init__(
+        self,
+        file: str,
+        filter_count: int,
+        flush_size: int = DEFAULT_FLUSH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        "Creates the trace file and writes the header"
+        self.file = file
+        self.filter_count = filter_count
+        self.column_count = len(FILTER_COLUMNS) * filter_count + 1
+        handle = open(file, "wb")  # pylint: disable=consider-using-with
+        handle.write(_header(filter_count))
+        super().__init__(handle, flush_size, flush_interval)
+
+    def write_row(self, values: Iterable) -> None:
+        "Writes a record, the record must have a value for every column"
+        self._buffer(values)
+
+    def write_rows(self, rows: np.ndarray) -> None:
+        "Writes a two dimensional array of records at once"
+        self.flush()
+        self._write(rows)
+
+    def _write(self, rows) -> None:
+        records = np.asarray(rows, dtype=RECORD_TYPE)
+        if records.size == 0:
+            return
+        if records.ndim != 2 or records.shape[1] != self.column_count:
+            raise ValueError(f"Trace records must have {self.column_count} columns")
+        self._handle.write(records.tobytes())
+
+
+def read_trace(file: str) -> Tuple[List[str], np.ndarray]:
+    """
+    Memory maps a binary trace.
+    Returns the column names and a read only array with a row per record.
+    A record that was only partially written is ignored.
+    """
+    with open(file, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{file} is not a binary kalman trace")
+        _, column_count, names_length = _HEADER.unpack(f.read(_HEADER.size))
+        columns = f.read(names_length).decode("utf-8").rstrip().split(",")
+        offset = f.tell()
+        size = f.seek(0, 2)
+
+    rows = (size - offset) // (RECORD_TYPE.itemsize * column_count)
+    if rows == 0:
+        return columns, np.zeros((0, column_count), dtype=RECORD_TYPE)
+    return columns, np.memmap(file, dtype=RECORD_TYPE, mode="r", offset=offset, shape=(rows, column_count))
+
+
+def trace_to_csv(file: str, csv_file: str) -> None:
+    "Converts a binary trace to the csv layout written by the KalmanBank"
+    _, records = read_trace(file)
+    with open(csv_file, "w", encoding="utf-8") as f:
+        for start in range(0, len(records), 10_000):
+            f.writelines(",".join(map(str, row)) + "\n" for row in records[start : start + 10_000].tolist())
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("USAGE python -m python_package.kalman_filter.trace /path/to/trace /path/to/output.csv")
+        sys.exit(1)
+    trace_to_csv(sys.argv[1], sys.argv[2])
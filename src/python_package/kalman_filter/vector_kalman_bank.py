@@ -0,0 +1,207 @@
+"THIS FILE CONTAINS A BANK OF KALMAN FILTERS STORED AS ARRAYS"
+
+from typing import List
+import numpy as np
+from .kalman import MeasurementData, PondState
+from .kalman_bank import KalmanError
+from .fault import ConstantFault, FaultType
+from ..time import Time
+from ..output import OutputSink, Sink
+
+
+class VectorKalmanBank:
+    """
+    A bank of Kalman filters where the state of every filter is kept in contiguous arrays.
+    Index 0 is the filter without faults, index i is the filter with fault i - 1.
+    Behaves like KalmanBank, but steps all filters with a few array operations.
+    If out_file is None the trace is not written.
+    """
+
+    def __init__(
+        self,
+        faults: List[ConstantFault],
+        initial_state: float,
+        initial_variance: float,
+        time: Time,
+        noice: float,
+        out_file: str | Sink | None,
+    ):
+        self.faults: List[ConstantFault] = []
+        self.initial_state = initial_state
+        self.initial_variance = initial_variance
+        self.time = time
+        self.noice = noice
+        self.out_file = OutputSink(out_file) if isinstance(out_file, str) else out_file
+
+        # Filter state
+        self.state = np.array([initial_state], dtype=np.float64)
+        self.predict_state = self.state.copy()
+        self.variance = np.array([initial_variance], dtype=np.float64)
+        self.predict_variance = self.variance.copy()
+        # The filters that have not been stepped, and the filters that had not been stepped before the last step,
+        # their predicted state is still the initial state
+        self._initial = np.ones(1, dtype=bool)
+        self._initial_before_step = self._initial
+
+        # Faults, the faulty height of filter i is (height * scale[i] + offset[i]) / divisor[i]
+        self._scale = np.ones(1)
+        self._offset = np.zeros(1)
+        self._divisor = np.ones(1)
+        self._higher = np.zeros(1, dtype=bool)
+        self._lower = np.zeros(1, dtype=bool)
+        self._multiply = np.zeros(1, dtype=bool)
+
+        self.add_faults(faults)
+
+    def __len__(self) -> int:
+        "The number of filters in the bank"
+        return len(self.state)
+
+    def add_faults(self, new_faults: List[ConstantFault]):
+        "Adds new faults and creates filters for them."
+        new_faults = [f for i, f in enumerate(new_faults) if f not in self.faults and f not in new_faults[:i]]
+        if len(new_faults) == 0:
+            return
+
+        for f in new_faults:
+            if not isinstance(f, ConstantFault):
+                raise ValueError("Bad input exception. Faults in a VectorKalmanBank must be ConstantFaults")
+        self.faults.extend(new_faults)
+
+        scale = [f.get_value if f.get_fault_type is FaultType.MULTIPLY else 1.0 for f in new_faults]
+        divisor = [f.get_value if f.get_fault_type is FaultType.DIVIDE else 1.0 for f in new_faults]
+        offset = []
+        for f in new_faults:
+            match f.get_fault_type:
+                case FaultType.ADD:
+                    offset.append(f.get_value)
+                case FaultType.SUBTRACT:
+                    offset.append(-f.get_value)
+                case _:
+                    offset.append(0.0)
+
+        n = len(new_faults)
+        self._scale = np.concatenate([self._scale, scale])
+        self._offset = np.concatenate([self._offset, offset])
+        self._divisor = np.concatenate([self._divisor, divisor])
+        self._higher = np.concatenate([self._higher, [f.get_classification == "higher" for f in new_faults]])
+        self._lower = np.concatenate([self._lower, [f.get_classification == "lower" for f in new_faults]])
+        self._multiply = np.concatenate([self._multiply, [f.get_fault_type is FaultType.MULTIPLY for f in new_faults]])
+        self.state = np.concatenate([self.state, np.full(n, self.initial_state, dtype=np.float64)])
+        self.predict_state = np.concatenate([self.predict_state, np.full(n, self.initial_state, dtype=np.float64)])
+        self.variance = np.concatenate([self.variance, np.full(n, self.initial_variance, dtype=np.float64)])
+        self.predict_variance = np.concatenate(
+            [self.predict_variance, np.full(n, self.initial_variance, dtype=np.float64)]
+        )
+        self._initial = np.concatenate([self._initial, np.ones(n, dtype=bool)])
+
+    def faulty_heights(self, height: float) -> np.ndarray:
+        "Applies every fault in the bank to the measured height"
+        return (height * self._scale + self._offset) / self._divisor
+
+    def step(self, pond_state: PondState, height: float, variance: float) -> None:
+        "Steps every filter in the bank, the measured height is faulted per filter"
+        # Update
+        kalman_gain = self.predict_variance / (self.predict_variance + variance)
+        new_variance = (1 - kalman_gain) * self.variance
+        state = self.predict_state + kalman_gain * (self.faulty_heights(height) - self.predict_state)
+
+        # Predict
+        t = self.time.get_delta.total_seconds()
+        self.predict_state = t * (pond_state.q_in - pond_state.q_out) / pond_state.ap + state
+        self.predict_variance = new_variance + self.noice
+        self.state = state
+        self.variance = new_variance
+        self._initial_before_step = self._initial
+        self._initial = np.zeros(len(self), dtype=bool)
+
+    def step_filters(
+        self, pond_state: PondState, measured_data: MeasurementData, virtual_pond_water_level: float
+    ) -> None:
+        "Steps all filters with their faults, raises a KalmanError if a threshold was exceeded"
+        error = self.analyze_filters(measured_data.height(), virtual_pond_water_level)
+        predict_before_step = self.predict_state
+        self.step(pond_state, measured_data.height(), measured_data.variance_height())
+        self._write_to_csv(measured_data, predict_before_step)
+        if error is not None:
+            raise error
+
+    def analyze_filters(self, height: float, virtual_pond_water_level: float) -> KalmanError | None:
+        """
+        Analyses the filters in the bank and returns the error of the first filter exceeding its threshold.
+        The thresholds are the same as in KalmanBank.analyze_filters.
+        """
+        exceeded = (self._higher & (self.predict_state < height)) | (self._lower & (self.predict_state > height))
+        if exceeded.any():
+            if self._higher[np.argmax(exceeded)]:
+                return KalmanError.HIGHER_THRESHOLD_EXCEEDED
+            return KalmanError.LOWER_THRESHOLD_EXCEEDED
+
+        # KalmanBank only compares the multiplying filters classified as higher to the virtual pond
+        if (self._higher & self._multiply & (self.predict_state < virtual_pond_water_level)).any():
+            return KalmanError.HIGHER_THRESHOLD_EXCEEDED
+        return None
+
+    def trace_row(self, height: float, predicted_data: np.ndarray) -> List[float]:
+        """
+        Returns a row of the kalman trace of the last step in the same column layout as KalmanBank.
+        The values keep the types KalmanBank writes, e.g. the delta of a filter that was at an integer
+        initial state is an int, so the csv rows are the same.
+        """
+        deltas = (predicted_data - height).tolist()
+        for i in np.flatnonzero(self._initial_before_step):
+            deltas[i] = self.initial_state - height
+        seconds = self.time.get_current_time.total_seconds()
+        row: List[float] = []
+        for state, predicted, variance, predict_variance, delta in zip(
+            self.state.tolist(),
+            self.predict_state.tolist(),
+            self.variance.tolist(),
+            self.predict_variance.tolist(),
+            deltas,
+        ):
+            row += (seconds, self.noice, state, predicted, variance, predict_variance, delta)
+        return row
+
+    def _write_to_csv(self, measured_data: MeasurementData, predicted_data: np.ndarray) -> None:
+        """
+        Writes kalman filter values to a csv file, does nothing if the bank has no out_file.
+        """
+        if self.out_file is None:
+            return
+        self.out_file.write_row(self.trace_row(measured_data.height(), predicted_data) + [measured_data.height()])
+
+    def close(self) -> None:
+        "Flushes and closes the output file"
+        if self.out_file is not None:
+            self.out_file.close()
+
+    @property
+    def get_faults(self) -> List[ConstantFault]:
+        "returns the list of faults"
+        return self.faults
+
+    @property
+    def get_state(self) -> np.ndarray:
+        "returns the state of every filter"
+        return self.state
+
+    @property
+    def get_predicted_state(self) -> np.ndarray:
+        "returns the predicted state of every filter"
+        return self.predict_state
+
+    @property
+    def get_initial_variance(self) -> float:
+        "returns the initial variance as a float"
+        return self.initial_variance
+
+    @property
+    def get_time(self) -> Time:
+        "Returns the time class"
+        return self.time
+
+    @property
+    def get_noice(self) -> float:
+        "Returns the noice as a float"
+        return self.noice
@@ -0,0 +1,116 @@
+"""
+Contains an output sink that keeps a file open for a whole run and writes rows in batches.
+Open sinks are flushed when the interpreter shuts down, also if it shuts down because of an exception.
+"""
+
+from abc import ABC, abstractmethod
+from typing import IO, Iterable
+import atexit
+import time
+import weakref
+
+DEFAULT_FLUSH_SIZE = 100
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+
+class Sink(ABC):
+    """
+    A file that rows are written to, open sinks are closed when the interpreter shuts down.
+    The rows are kept in memory until flush_size rows are buffered or flush_interval seconds have passed.
+    """
+
+    def __init__(self, handle: IO, flush_size: int, flush_interval: float) -> None:
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._rows: list = []
+        self._last_flush = time.monotonic()
+        self._handle = handle
+        _OPEN_SINKS.add(self)
+
+    def __enter__(self) -> "Sink":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        self.close()
+
+    @abstractmethod
+    def write_row(self, values: Iterable) -> None:
+        "Writes a row of values"
+
+    @abstractmethod
+    def _write(self, rows: list) -> None:
+        "Writes the buffered rows to the file"
+
+    def _buffer(self, row) -> None:
+        "Buffers a row and flushes if the buffer is full or old"
+        self._rows.append(row)
+        if len(self._rows) >= self.flush_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        "Writes all buffered rows to the file"
+        if self.closed:
+            return
+        if self._rows:
+            self._write(self._rows)
+            self._rows.clear()
+        self._handle.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        "Flushes and closes the file, closing a closed sink does nothing"
+        if self.closed:
+            return
+        self.flush()
+        self._handle.close()
+        _OPEN_SINKS.discard(self)
+
+    @property
+    def closed(self) -> bool:
+        "Is the file closed"
+        try:
+            return self._handle.closed
+        except AttributeError:
+            return True
+
+
+class OutputSink(Sink):
+    """A text file that comma separated rows are written to"""
+
+    def __init__(
+        self,
+        file: str,
+        flush_size: int = DEFAULT_FLUSH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        append: bool = False,
+    ):
+        "Opens the file, it is truncated unless append is True"
+        self.file = file
+        handle = open(file, "a" if append else "w", -1, "UTF-8")  # pylint: disable=consider-using-with
+        super().__init__(handle, flush_size, flush_interval)
+
+    def write(self, line: str) -> None:
+        "Writes a line, the line should end with a newline"
+        self._buffer(line)
+
+    def write_row(self, values: Iterable) -> None:
+        "Writes the values as a comma separated row"
+        self._buffer(",".join(map(str, values)) + "\n")
+
+    def _write(self, rows: list) -> None:
+        self._handle.writelines(rows)
+
+
+_OPEN_SINKS: "weakref.WeakSet[Sink]" = weakref.WeakSet()
+
+
+def close_all() -> None:
+    "Flushes and closes every open sink"
+    for sink in list(_OPEN_SINKS):
+        sink.close()
+
+
+atexit.register(close_all)
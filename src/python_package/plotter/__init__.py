@@ -1,271 +1,287 @@
-"""Plot data"""
+"""
+Plot data
 
-import csv
-from typing import Any
+Every figure is described by a FigureJob and built with the object oriented matplotlib API, without the global
+pyplot state, so the figures of a run can be rendered in parallel in a pool of processes.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+import os
 import matplotlib
 from matplotlib import pyplot as plt
+from matplotlib.artist import setp
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
 from matplotlib.ticker import MultipleLocator
 from ..args import ARGS, OutType, OutGraph, out_graph_to_string
 from ..out_mode import OutMode
-
-
-def read_csv(file: str) -> list:
-    """Read csv file"""
-    data = []
-    with open(file, "r", encoding="utf-8") as csvfile:
-        reader = csv.reader(csvfile, delimiter="\t")
-        for _, line in enumerate(reader):
-            line = str(line[0]).split(",")
-            data.append([float(line[0]), float(line[1])])
-    return data
-
-
-def find_cords(file: list, scale: float) -> list:
-    """Find coordinates"""
-    cords_x = []
-    cords_y = []
-    for _, f in enumerate(file):
-        cords_x.append(f[0])
-        cords_y.append(f[1] * scale)
-    return [cords_x, cords_y]
-
-
-def plot(file: str, color: str, label: str, scale: float, ax):
-    """Plot csv file"""
-    data = read_csv(file)
-    cords = find_cords(data, scale)
-
-    plots = ax.plot(cords[0], cords[1], color, label=label)
-
-    return plots
-
-
-def read_kalman_csv_delta(file: str, number_of_filters: int) -> list:
-    """Read kalman csv file"""
-    data = []
-    with open(file, "r", encoding="utf-8") as csvfile:
-        reader = csv.reader(csvfile, delimiter="\t")
-        for _, line in enumerate(reader):
-            line = str(line[0]).split(",")
-            temp_list = []  # hack to make data structure work
-            i = 0
-            while i < number_of_filters:
-                temp_list.append(float(line[7 * i]))
-                temp_list.append(float(line[7 * i + 6]))
-                i += 1
-            data.append(temp_list)
-    return data
-
-
-def read_kalman_csv_state_measured(file: str, number_of_filters: int) -> list:
-    """Read kalman csv file"""
-    data = []
-    with open(file, "r", encoding="utf-8") as csvfile:
-        reader = csv.reader(csvfile, delimiter="\t")
-        for _, line in enumerate(reader):
-            line = str(line[0]).split(",")
-            temp_list = []  # hack to make data structure work
-            i = 0
-            while i < number_of_filters:
-                temp_list.append(float(line[7 * i]))
-                temp_list.append(float(line[7 * i + 3]))
-                i += 1
-            temp_list.append(temp_list[0])
-            temp_list.append(float(line[7 * i]))
-            data.append(temp_list)
-    return data
-
-
-def find_kalman_cords(file: list, scale: float, number_of_filters: int) -> list:
-    """Find coordinates"""
-    coord_array = []
-    i = 0
-    while i < number_of_filters:
-        coord_array.append([])
-        coord_array.append([])
-        i += 1
-    for _, line in enumerate(file):  # range(len(file)):
-        for n, j in enumerate(coord_array):
-            if n % 2 == 0:
-                j.append(line[n])
-            else:
-                j.append(line[n] * scale)
-
-    return coord_array
-
-
-def plot_kalman_filters_delta(file: str, color_label_tuples: list[tuple[str, str]], scale: float, axis) -> list:
+from .data import PlotData, Table
+
+GOLDEN_RASIO = 2 / (1 + 5**0.5)
+FONT = {
+    "family": "serif",
+    "color": "black",
+    "weight": "normal",
+    "size": 9,
+}
+# The files of the run that each graph plots, by the name of their ARGS property
+GRAPH_FILES = {
+    OutGraph.RAIN: ("rain_file",),
+    OutGraph.CONTROL: ("data_control", "out", "data"),
+    OutGraph.KALMAN_DELTA: ("kalman",),
+    OutGraph.KALMAN: ("kalman", "out", "data_control"),
+}
+PNG_GRAPHS = [OutGraph.RAIN, OutGraph.CONTROL, OutGraph.KALMAN_DELTA, OutGraph.KALMAN]
+
+
+def plot(series: Table, color: str, label: str, scale: float, ax):
+    """Plot a series of 'time,value' rows"""
+    return ax.plot(series["time"], series["value"] * scale, color, label=label)
+
+
+def plot_kalman_filters_delta(trace: Table, color_label_tuples: list[tuple[str, str]], scale: float, axis) -> list:
     """
     Plot the delta between predicted values and the measured values for each filter.
     This function assumes that the length of color_label_tuples == number of kalman filters
     """
-    data = read_kalman_csv_delta(file, len(color_label_tuples))
-    coords = find_kalman_cords(data, scale, len(color_label_tuples))
-
     plots = []
     for i, f in enumerate(color_label_tuples):
-        plots.append(axis.plot(coords[2 * i], coords[2 * i + 1], f[0], label=f[1]))
+        plots.append(axis.plot(trace[f"time_{i}"], trace[f"delta_{i}"] * scale, f[0], label=f[1]))
     return plots
 
 
 def plot_kalman_filters_state_measured(
-    file: str, color_label_tuples: list[tuple[str, str]], scale: float, axis
+    trace: Table, color_label_tuples: list[tuple[str, str]], scale: float, axis
 ) -> list:
     """
     Plot the measured value and the predicted state for each filter.
     This function assumes that the length of color_label_tuples == number of kalman filters
     """
-    data = read_kalman_csv_state_measured(file, len(color_label_tuples))
-    coords = find_kalman_cords(data, scale, len(color_label_tuples))
-
-    # Adds the measured data values to a list
-    measured_data_coords = []
-    with open(file, "r", encoding="utf-8") as csvfile:
-        reader = csv.reader(csvfile, delimiter="\t")
-        for _, line in enumerate(reader):
-            line = str(line[0]).split(",")
-            measured_data_coords.append(float(line[7 * len(color_label_tuples)]))
-
     plots = []
     for i, f in enumerate(color_label_tuples):
-        plots.append(axis.plot(coords[2 * i], coords[2 * i + 1], f[0], label=f[1]))
-    plots.append(axis.plot(coords[0], measured_data_coords, "red", label="Measured height"))
+        plots.append(axis.plot(trace[f"time_{i}"], trace[f"predicted_state_{i}"] * scale, f[0], label=f[1]))
+    plots.append(axis.plot(trace["time_0"], trace["measured"], "red", label="Measured height"))
     return plots
 
 
-def plotting(plot_args: ARGS, water_level_min: int, water_level_max: int, change_array: list[tuple[OutMode, int]]):
-    """Function for plotting data"""
-    out_type = plot_args.out_type
+def output_images(plot_args: ARGS) -> List[str]:
+    """The image files that plotting saves"""
+    if plot_args.out_image is None:
+        return []
+    if plot_args.out_type is OutType.PGF and plot_args.out_suffix:
+        images = []
+        for graph in plot_args.out_graph:
+            file_name = str(plot_args.out_image).split(".")
+            file_name.insert(len(file_name) - 1, out_graph_to_string(graph))
+            images.append(".".join(file_name))
+        return images
+    return [plot_args.out_image]
 
-    font = {
-        "family": "serif",
-        "color": "black",
-        "weight": "normal",
-        "size": 9,
-    }
 
-    match out_type:
-        case OutType.PGF:
-            plot_pgf(plot_args, water_level_min, water_level_max, font, change_array)
+class FigureJob:
+    """
+    A figure of a run, the graphs it plots and the file it is saved to.
+    A job holds no matplotlib state, so it can be rendered in another process.
+    """
+
+    def __init__(
+        self,
+        plot_args: ARGS,
+        out_type: OutType,
+        graphs: List[OutGraph],
+        file: str | None,
+        water_level_min: float,
+        water_level_max: float,
+        change_array: list[tuple[OutMode, int]],
+        serif_ticks: OutGraph | None = None,
+    ):
+        self.out_type = out_type
+        self.graphs = graphs
+        self.file = file
+        self.name = plot_args.name
+        self.time = plot_args.time
+        self.water_level_min = water_level_min
+        self.water_level_max = water_level_max
+        self.change_array = list(change_array)
+        # The graph whose y ticks are in a serif font
+        self.serif_ticks = serif_ticks
+        self.files: Dict[str, str] = {name: getattr(plot_args, name) for graph in graphs for name in GRAPH_FILES[graph]}
+
+    @property
+    def figsize(self) -> tuple[float, float]:
+        """The size of the figure in inches"""
+        if self.out_type is OutType.PGF:
+            return (3.4, 3.4 * GOLDEN_RASIO)
+        return (30, 10)
+
+    @property
+    def rc(self) -> Dict[str, Any]:
+        """The matplotlib settings the figure is rendered with"""
+        if self.out_type is OutType.PGF:
+            return {"text.usetex": True, "font.family": "sans-serif"}
+        return {}
+
+
+def figure_jobs(
+    plot_args: ARGS, water_level_min: float, water_level_max: float, change_array: list[tuple[OutMode, int]]
+) -> List[FigureJob]:
+    """The figures of a run, png mode has a single figure with all graphs and pgf mode a figure per graph"""
+    match plot_args.out_type:
         case OutType.PNG:
-            plot_png(plot_args, water_level_min, water_level_max, font, change_array)
+            return [
+                FigureJob(
+                    plot_args,
+                    OutType.PNG,
+                    PNG_GRAPHS,
+                    plot_args.out_image,
+                    water_level_min,
+                    water_level_max,
+                    change_array,
+                    OutGraph.KALMAN,
+                )
+            ]
+        case OutType.PGF:
+            graphs = plot_args.out_graph
+            if plot_args.out_suffix:
+                files = output_images(plot_args) or [None] * len(graphs)
+            else:
+                # Without a suffix there is a single file, it gets the last graph
+                graphs, files = graphs[-1:], [plot_args.out_image]
+            return [
+                FigureJob(
+                    plot_args,
+                    OutType.PGF,
+                    [graph],
+                    file,
+                    water_level_min,
+                    water_level_max,
+                    change_array,
+                    graphs[-1],
+                )
+                for graph, file in zip(graphs, files)
+            ]
         case _:
-            return
-
-    if plot_args.show:
-        plt.show()
+            return []
 
 
-def plot_png(
+def plotting(
     plot_args: ARGS,
-    water_level_min: float,
-    water_level_max: float,
-    font: dict[str, Any],
+    water_level_min: int,
+    water_level_max: int,
     change_array: list[tuple[OutMode, int]],
+    workers: int | None = None,
 ):
+    """
+    Function for plotting data.
+    The figures are rendered in a pool of workers processes, defaults to one process per core.
+    """
+    jobs = figure_jobs(plot_args, water_level_min, water_level_max, change_array)
+    if not jobs:
+        return
+
+    if plot_args.show:
+        # Only figures created by pyplot can be shown
+        data = PlotData()
+        for job in jobs:
+            render(job, data, pyplot=True)
+        plt.show()
+    else:
+        render_figures(jobs, workers)
+
+
+def render_figures(jobs: List[FigureJob], workers: int | None = None):
+    """Renders the figures in a pool of workers processes, defaults to one process per core"""
+    workers = min(len(jobs), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        data = PlotData()
+        for job in jobs:
+            render(job, data)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(render_figure, jobs))
+
+
+def render_figure(job: FigureJob) -> str | None:
+    """Renders a figure in a worker process, returns the file it was saved to"""
+    render(job, PlotData())
+    return job.file
+
+
+def render(job: FigureJob, data: PlotData, pyplot: bool = False) -> Figure:
+    """Builds the figure of a job and saves it, the figure is only managed by pyplot if pyplot is set"""
+    with matplotlib.rc_context(job.rc):
+        figure = plt.figure(figsize=job.figsize) if pyplot else Figure(figsize=job.figsize)
+        if job.out_type is OutType.PNG:
+            plot_png(job, figure, data)
+        else:
+            plot_pgf(job, figure, data)
+    return figure
+
+
+def plot_png(job: FigureJob, figure: Figure, data: PlotData):
     "Plot in png mode"
-    i = 1
-    _, axis = plt.subplots(2, 2, figsize=(30, 10), gridspec_kw={"height_ratios": [1, 2]})
-
-    axs: dict[OutGraph, tuple[int, Any]] = {
-        OutGraph.RAIN: (i, axis[0, 0]),
-        OutGraph.CONTROL: (i, axis[0, 1]),
-        OutGraph.KALMAN_DELTA: (i, axis[1, 0]),
-        OutGraph.KALMAN: (i, axis[1, 1]),
+    axis = figure.subplots(2, 2, gridspec_kw={"height_ratios": [1, 2]})
+
+    axs: dict[OutGraph, Axes] = {
+        OutGraph.RAIN: axis[0, 0],
+        OutGraph.CONTROL: axis[0, 1],
+        OutGraph.KALMAN_DELTA: axis[1, 0],
+        OutGraph.KALMAN: axis[1, 1],
     }
 
-    plt.suptitle(f"{plot_args.name}")
+    figure.suptitle(f"{job.name}")
 
-    plot_graphs(plot_args, water_level_min, water_level_max, font, change_array, axs)
+    plot_graphs(job, FONT, axs, data)
 
-    for _, ax in axs.values():
+    for ax in axs.values():
         ax.legend(loc=4)
-    if plot_args.out_image is not None:
-        plt.savefig(plot_args.out_image, bbox_inches="tight")
+    if job.file is not None:
+        figure.savefig(job.file, bbox_inches="tight")
 
 
-def plot_pgf(
-    plot_args: ARGS,
-    water_level_min: float,
-    water_level_max: float,
-    font: dict[str, Any],
-    change_array: list[tuple[OutMode, int]],
-):
+def plot_pgf(job: FigureJob, figure: Figure, data: PlotData):
     "Plot in pgf mode"
-    matplotlib.use("pgf")
-    golden_rasio = 2 / (1 + 5**0.5)
-
-    plt.rcParams.update(
-        {
-            "text.usetex": True,
-            "font.family": "sans-serif",
-        }
-    )
+    axs: dict[OutGraph, Axes] = {graph: figure.subplots() for graph in job.graphs}
 
-    axs: dict[OutGraph, tuple[int, Any]] = {}
-    for i, graph in enumerate(plot_args.out_graph):
-        plt.figure(i, figsize=(3.4, 3.4 * golden_rasio))
-        axs[graph] = (i, plt.gcf().subplots())
+    plot_graphs(job, FONT, axs, data)
 
-    plot_graphs(plot_args, water_level_min, water_level_max, font, change_array, axs)
+    for ax in axs.values():
+        setp(ax.get_lines(), linewidth=0.7)
 
-    for _, ax in axs.values():
-        lines = ax.get_lines()
-        plt.setp(lines, linewidth=0.7)
+    figure.tight_layout()
+    if job.file is not None:
+        figure.savefig(job.file, backend="pgf")
 
-    if plot_args.out_suffix:
-        for i, graph in enumerate(plot_args.out_graph):
-            file_name = str(plot_args.out_image).split(".")
-            suffix = out_graph_to_string(graph)
-            file_name.insert(len(file_name) - 1, suffix)
-            file_name = ".".join(file_name)
-            plt.figure(i)
-            plt.tight_layout()
-            plt.gcf().savefig(file_name, backend="pgf")
-    else:
-        plt.tight_layout()
-        plt.savefig(plot_args.out_image, backend="pgf")
 
-
-def plot_graphs(
-    plot_args: ARGS,
-    water_level_min: float,
-    water_level_max: float,
-    font: dict[str, Any],
-    change_array: list[tuple[OutMode, int]],
-    axs: dict[OutGraph, tuple[int, Any]],
-):
-    "Plots all graphs"
+def plot_graphs(job: FigureJob, font: dict[str, Any], axs: dict[OutGraph, Axes], data: PlotData):
+    "Plots the graphs of a figure, every file is read once"
     fontsize = 7
-    plt.yticks(font="serif", fontsize="9")
+    if job.serif_ticks in axs:
+        setp(axs[job.serif_ticks].get_yticklabels(), font="serif", fontsize="9")
 
     # TOP LEFT PLOT
-    try:
-        i, ax = axs[OutGraph.RAIN]
-        plt.figure(i)
-        plot(plot_args.rain_file, "brown", "Rain", 1, ax)
+    if OutGraph.RAIN in axs:
+        ax = axs[OutGraph.RAIN]
+        plot(data.series(job.files["rain_file"]), "brown", "Rain", 1, ax)
         ax.set_ylabel("Rain [mm]", fontdict=font)
         ax.set_xlabel("Time [sec]", fontdict=font)
-        ax.set_xlim(0, plot_args.time)
-    except KeyError:
-        pass
+        ax.set_xlim(0, job.time)
 
     # TOP RIGHT PLOT
-    try:
-        i, ax = axs[OutGraph.CONTROL]
-        plt.figure(i)
-        plot(plot_args.data_control, "green", "Control height", 1, ax)
-        plot(plot_args.out, "blue", "Estimated height", 1, ax)
-        plot(plot_args.data, "red", "Sensor height", 1, ax)
-        ax.axhline(water_level_max, linestyle="--", color="lightgray")
-        ax.text(700, water_level_max + 50, "Max water", fontsize=fontsize, ha="right", color="lightgray")
-        ax.axhline(water_level_min, linestyle="--", color="lightgray")
-        ax.text(700, water_level_min + 50, "Min water", fontsize=fontsize, ha="right", color="lightgray")
-        ax.set_xlim(0, plot_args.time)
+    if OutGraph.CONTROL in axs:
+        ax = axs[OutGraph.CONTROL]
+        plot(data.series(job.files["data_control"]), "green", "Control height", 1, ax)
+        plot(data.series(job.files["out"]), "blue", "Estimated height", 1, ax)
+        plot(data.series(job.files["data"]), "red", "Sensor height", 1, ax)
+        ax.axhline(job.water_level_max, linestyle="--", color="lightgray")
+        ax.text(700, job.water_level_max + 50, "Max water", fontsize=fontsize, ha="right", color="lightgray")
+        ax.axhline(job.water_level_min, linestyle="--", color="lightgray")
+        ax.text(700, job.water_level_min + 50, "Min water", fontsize=fontsize, ha="right", color="lightgray")
+        ax.set_xlim(0, job.time)
         ax.set_ylabel("Water level [mm]", fontdict=font)
         ax.set_xlabel("Time [sec]", fontdict=font)
-    except KeyError:
-        pass
 
     # BOT LEFT PLOT
 
@@ -276,49 +292,42 @@ def plot_graphs(
         ("cyan", "15% over"),
         ("purple", "15 % under"),
     ]
-    try:
-        i, ax = axs[OutGraph.KALMAN_DELTA]
-        plt.figure(i)
-        plot_kalman_filters_delta(plot_args.kalman, color_label_tuples, 1, ax)
+    if OutGraph.KALMAN_DELTA in axs:
+        ax = axs[OutGraph.KALMAN_DELTA]
+        plot_kalman_filters_delta(data.kalman(job.files["kalman"]), color_label_tuples, 1, ax)
         ax.axhline(0, linestyle="--", color="gray")
         ax.set_ylabel("Water Level [mm] - Messured Level [mm]", fontdict=font)
         ax.set_xlabel("Time [sec]", fontdict=font)
-        ax.set_xlim(0, plot_args.time)
-    except KeyError:
-        pass
+        ax.set_xlim(0, job.time)
 
     # BOT RIGHT PLOT
-    try:
-        i, ax = axs[OutGraph.KALMAN]
-        plt.figure(i)
-        plot_kalman_filters_state_measured(plot_args.kalman, color_label_tuples, 1, ax)
-        plot(plot_args.out, "blue", "Estimated height", 1, ax)
-        plot(plot_args.data_control, "green", "Control height", 1, ax)
+    if OutGraph.KALMAN in axs:
+        ax = axs[OutGraph.KALMAN]
+        plot_kalman_filters_state_measured(data.kalman(job.files["kalman"]), color_label_tuples, 1, ax)
+        plot(data.series(job.files["out"]), "blue", "Estimated height", 1, ax)
+        plot(data.series(job.files["data_control"]), "green", "Control height", 1, ax)
         ax.set_ylabel("Height [mm]", fontdict=font)
         ax.set_xlabel("Time [sec]", fontdict=font)
-        ax.set_xlim(0, plot_args.time)
-    except KeyError:
-        pass
+        ax.set_xlim(0, job.time)
 
-    plot_change_lines(font, change_array, axs)
+    plot_change_lines(font, job.change_array, axs)
 
 
 def plot_change_lines(
     font: dict[str, Any],
     change_array: list[tuple[OutMode, int]],
-    axs: dict[OutGraph, tuple[int, Any]],
+    axs: dict[OutGraph, Axes],
 ):
     "Plots the change list to all plots but RAIN"
     # PRINT CHANGE ARRAYS
-    font["size"] = 7
+    font = dict(font, size=7)
 
     for mode, pos in change_array:
         text = {OutMode.SENSOR: "Sensor", OutMode.VIRTUAL: "Virtual", OutMode.SENSOR_ERROR: "Sensor Error"}[mode]
 
-        for key, (i, ax) in axs.items():
+        for key, ax in axs.items():
             if key is OutGraph.RAIN:
                 continue
-            plt.figure(i)
             ymin, ymax = ax.get_ylim()
             ax.axvline(pos, linestyle="--", color="gray")
             ax.text(
@@ -332,6 +341,5 @@ def plot_change_lines(
                 color="gray",
             )
 
-    for i, ax in axs.values():
-        plt.figure(i)
+    for ax in axs.values():
         ax.xaxis.set_minor_locator(MultipleLocator(1000))
@@ -0,0 +1,66 @@
+"""
+THIS FILE CONTAINS THE DATA THE GRAPHS ARE PLOTTED FROM
+
+Every file is parsed once into NumPy arrays with named columns, which are shared by all graphs that plot it.
+"""
+
+from typing import Dict
+import warnings
+import numpy as np
+from ..csv_stream import load_columns
+from ..kalman_filter.trace import FILTER_COLUMNS, is_binary_trace, read_trace, trace_columns
+
+SERIES_COLUMNS = ["time", "value"]
+
+
+class Table:
+    """Columns of floats read from a file, looked up by name"""
+
+    def __init__(self, file: str, columns: Dict[str, np.ndarray]):
+        self.file = file
+        self.columns = columns
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        try:
+            return self.columns[name]
+        except KeyError:
+            raise ValueError(f"{self.file} has no column {name}") from None
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), ()))
+
+
+def read_series(file: str) -> Table:
+    """Reads a csv file with rows of 'time,value'"""
+    return Table(file, dict(zip(SERIES_COLUMNS, load_columns(file))))
+
+
+def read_kalman(file: str) -> Table:
+    """Reads a kalman bank trace, the trace can either be a csv file or a binary trace"""
+    if is_binary_trace(file):
+        names, records = read_trace(file)
+    else:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)  # Empty files are allowed
+            records = np.loadtxt(file, delimiter=",", dtype=np.float64, ndmin=2)
+        names = trace_columns((records.shape[1] - 1) // len(FILTER_COLUMNS)) if records.size else []
+    return Table(file, {name: records[:, i] for i, name in enumerate(names)})
+
+
+class PlotData:
+    """The tables of the files of a run, a file is read the first time a graph plots it"""
+
+    def __init__(self):
+        self._tables: Dict[str, Table] = {}
+
+    def series(self, file: str) -> Table:
+        """The table of a csv file with rows of 'time,value'"""
+        if file not in self._tables:
+            self._tables[file] = read_series(file)
+        return self._tables[file]
+
+    def kalman(self, file: str) -> Table:
+        """The table of a kalman bank trace"""
+        if file not in self._tables:
+            self._tables[file] = read_kalman(file)
+        return self._tables[file]
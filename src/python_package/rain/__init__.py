@@ -3,6 +3,8 @@
 
 from abc import abstractmethod
 from datetime import datetime
+from typing import Sequence
+import numpy as np
 from .area import Area
 
 
@@ -15,3 +17,9 @@ class Rain:
         This method takes a start_time, end_time and area and
         returns the rainfall in mm
         """
+
+    def get_rain_falls(self, area: Area, start_times: Sequence[datetime], end_times: Sequence[datetime]) -> np.ndarray:
+        """
+        Gets the rainfall of many windows at once, implementations can answer all of them in a single call
+        """
+        return np.array([self.get_rain_fall(area, start, end) for start, end in zip(start_times, end_times)])
@@ -1,6 +1,8 @@
 "THIS FILE CONTAINS AREAS FOR DEFINNIG RAINFALL"
 
 from abc import abstractmethod
+from typing import Tuple
+import numpy as np
 
 
 class Coordinate:
@@ -26,6 +28,26 @@ class Area:
         "Calculates the area en hectar"
         return self.calc_area() / 10000
 
+    def bounds(self) -> Tuple[Coordinate, Coordinate] | None:
+        "The south west and north east corners of a rectangle around the area, None if the area has no location"
+        return None
+
+    def contains_many(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        "Which of the coordinates are within the area, the default checks one coordinate at a time"
+        lon, lat = np.broadcast_arrays(lon, lat)
+        within = [self.contains(Coordinate(x, y)) for x, y in zip(lon.ravel().tolist(), lat.ravel().tolist())]
+        return np.array(within, dtype=bool).reshape(lon.shape)
+
+    def weights(self, lat_edges: np.ndarray, lon_edges: np.ndarray) -> np.ndarray:
+        """
+        The share of every cell of a grid that is within the area. The rows of cells are between the latitudes
+        lat_edges from north to south and the columns between the longitudes lon_edges from west to east.
+        The default counts the cells whose center is within the area.
+        """
+        lat = (lat_edges[:-1] + lat_edges[1:]) / 2
+        lon = (lon_edges[:-1] + lon_edges[1:]) / 2
+        return self.contains_many(lon[np.newaxis, :], lat[:, np.newaxis]).astype(np.float64)
+
 
 class NorthboundRectangle(Area):
     """
@@ -48,6 +70,29 @@ class NorthboundRectangle(Area):
             and coordinate.lon > min(self._c1.lon, self._c2.lon)
         )
 
+    def bounds(self) -> Tuple[Coordinate, Coordinate]:
+        "The south west and north east corners of the Rectangle"
+        return (
+            Coordinate(min(self._c1.lon, self._c2.lon), min(self._c1.lat, self._c2.lat)),
+            Coordinate(max(self._c1.lon, self._c2.lon), max(self._c1.lat, self._c2.lat)),
+        )
+
+    def contains_many(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        "Which of the coordinates are located within the Rectangle"
+        south_west, north_east = self.bounds()
+        return (lat < north_east.lat) & (lat > south_west.lat) & (lon < north_east.lon) & (lon > south_west.lon)
+
+    def weights(self, lat_edges: np.ndarray, lon_edges: np.ndarray) -> np.ndarray:
+        "The share of every cell of a grid that overlaps the Rectangle"
+        south_west, north_east = self.bounds()
+        north = np.minimum(lat_edges[:-1], north_east.lat)
+        south = np.maximum(lat_edges[1:], south_west.lat)
+        rows = np.clip(north - south, 0, None) / (lat_edges[:-1] - lat_edges[1:])
+        east = np.minimum(lon_edges[1:], north_east.lon)
+        west = np.maximum(lon_edges[:-1], south_west.lon)
+        columns = np.clip(east - west, 0, None) / (lon_edges[1:] - lon_edges[:-1])
+        return np.outer(rows, columns)
+
     def calc_area(self) -> float:
         "Calculates the area of the Reactangle in m2"
         distance_between_deg_in_m = 111_120
@@ -72,6 +117,10 @@ class EmptyArea(Area):
         "Is the point within the area"
         return False
 
+    def contains_many(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        "No point is within the area"
+        return np.zeros(np.broadcast(lon, lat).shape, dtype=bool)
+
     def calc_area(self) -> float:
         "Calculates the area in m2"
         return self.area
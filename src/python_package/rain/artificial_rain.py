@@ -3,34 +3,87 @@ Contains an artificial rain implementation
 """
 
 from datetime import datetime, timedelta
-from typing import List, Self, Tuple
+from typing import List, Self, Sequence, Tuple
 import bisect
+import numpy as np
+from ..csv_stream import is_sorted
 from . import Rain
 from .area import Area
+from .rain_series import RainSeries
 
 
 class ArtificialVariableRainPrediction:
-    "Used as input to the ArtificialVariable Rain to create simulated rainfall"
-
-    def __init__(self):
-        "Creates a new ArtificialVariableRainPrediction"
-        self._prediction: List[Tuple[timedelta, float]] = []
+    """
+    Used as input to the ArtificialVariable Rain to create simulated rainfall.
+    A prediction created from arrays keeps its points as a RainSeries, the list of points is only created
+    if points are added or read one at a time.
+    """
+
+    def __init__(self, series: RainSeries | None = None):
+        "Creates a new ArtificialVariableRainPrediction, empty or with the points of a sorted series"
+        self._prediction: List[Tuple[timedelta, float]] | None = None if series is not None else []
+        self._series = series
+
+    @staticmethod
+    def from_arrays(times: np.ndarray, rain: np.ndarray) -> "ArtificialVariableRainPrediction":
+        """
+        Creates a prediction from the times in seconds and the rain of its points.
+        The times are rounded to microseconds like a timedelta. Points out of order are sorted by time,
+        points at the same time keep their order, like adding the points one at a time.
+        """
+        times = np.array(times, dtype=np.float64)
+        rain = np.asarray(rain, dtype=np.float64)
+        if times.shape != rain.shape or times.ndim != 1:
+            raise ValueError("times and rain must be one dimensional arrays of the same length")
+        if np.isnan(times).any():
+            raise ValueError("The times of a rain prediction can not be nan")
+        # Whole seconds need no rounding, the rest are rounded exactly like a timedelta
+        fraction = times != np.floor(times)
+        if fraction.any():
+            times[fraction] = [timedelta(seconds=time).total_seconds() for time in times[fraction].tolist()]
+        if not is_sorted(times):
+            order = np.argsort(times, kind="stable")
+            times, rain = times[order], rain[order]
+        return ArtificialVariableRainPrediction(RainSeries(times, rain))
+
+    @property
+    def _points(self) -> List[Tuple[timedelta, float]]:
+        if self._prediction is None:
+            series = self.compile()
+            self._prediction = [
+                (timedelta(seconds=time), rain) for time, rain in zip(series.times.tolist(), series.rain.tolist())
+            ]
+        return self._prediction
 
     def add_point(self, time: timedelta, rain: float) -> Self:
-        "Adds a point into the rain prediction"
-        bisect.insort(self._prediction, (time, rain), key=lambda x: x[0])
+        "Adds a point into the rain prediction, a point at or after the last point is appended in constant time"
+        points = self._points
+        if not points or points[-1][0] <= time:
+            points.append((time, rain))
+        else:
+            bisect.insort(points, (time, rain), key=lambda x: x[0])
+        self._series = None
         return self
 
+    def compile(self) -> RainSeries:
+        "Gets the prediction as a RainSeries, it is only recompiled after points are added"
+        if self._series is None:
+            self._series = RainSeries(
+                np.array([time.total_seconds() for time, _ in self._points], dtype=np.float64),
+                np.array([rain for _, rain in self._points], dtype=np.float64),
+            )
+        return self._series
+
     def get_closest_index(self, time: timedelta) -> int:
         "Gets the closest lower bounded time to the timedelta"
-        index = bisect.bisect_left(self._prediction, time, key=lambda x: x[0])
+        index = bisect.bisect_left(self._points, time, key=lambda x: x[0])
         return index
 
     def get_prediction(self, index: int) -> None | Tuple[timedelta, float]:
         "Gets the prediction at index, returns none if it doesn't exist"
-        if len(self._prediction) <= index:
+        if len(self._points) <= index:
             return None
-        return self._prediction[index]
+        return self._points[index]
 
 
 class ArtificialVariableRain(Rain):
@@ -48,40 +101,18 @@ class ArtificialVariableRain(Rain):
         """
         Gets the averge rainfall within the given start_time and end_time
         """
-        rain_time: List[Tuple[timedelta, float]] = []
-        start_stamp = start_time - self.begining
-        end_stamp = end_time - self.begining
-        index = self.simulation.get_closest_index(start_stamp)
-
-        while True:
-            now = self.simulation.get_prediction(index)
-            index += 1
-            after = self.simulation.get_prediction(index)
-            if after:
-                after_time, _ = after
-            else:
-                after_time = end_stamp
-
-            if now:
-                now_time, now_rain = now
-                now_time = max(now_time, start_stamp)
-            else:
-                return 0
-
-            rain_time.append((after_time - now_time, now_rain))
-
-            if after_time >= end_stamp:
-                break
-
-        total_rain = 0.0
-        total_time = timedelta()
-        for time, rain in rain_time:
-            total_rain += rain * time.total_seconds()
-            total_time += time
-
-        if total_time.total_seconds() == 0:
-            return 0.0
-        return total_rain / total_time.total_seconds()
+        return self.simulation.compile().average(
+            (start_time - self.begining).total_seconds(), (end_time - self.begining).total_seconds()
+        )
+
+    def get_rain_falls(self, area: Area, start_times: Sequence[datetime], end_times: Sequence[datetime]) -> np.ndarray:
+        """
+        Gets the averge rainfall of every window from start_times to end_times in one call
+        """
+        begining = np.datetime64(self.begining, "us")
+        starts = (np.array(start_times, dtype="datetime64[us]") - begining) / np.timedelta64(1, "s")
+        ends = (np.array(end_times, dtype="datetime64[us]") - begining) / np.timedelta64(1, "s")
+        return self.simulation.compile().averages(starts, ends)
 
 
 class ArtificialConstRain(Rain):
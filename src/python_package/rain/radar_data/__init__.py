@@ -1,40 +1,156 @@
 "THIS FILE CONTAINS THE RADAR CLASS"
 
-from datetime import datetime
-from typing import Self
-import h5py as h5
+from datetime import datetime, timedelta
+from typing import List, Self, Sequence
+import os
+import numpy as np
 from .. import Rain
 from ..area import Area
+from .composite import RadarData
+from .grid import RadarGrid
+from .mask import MASKS, AreaMask, MaskIndex
+from .series_cache import SeriesCache, mask_key
+from .tiles import DEFAULT_MAX_TILES, TileCache
+
+__all__ = ["AreaMask", "MaskIndex", "Radar", "RadarData", "RadarGrid", "SeriesCache", "TileCache"]
+
+# How long the rain of a composite lasts if the next composite is later or missing
+DEFAULT_INTERVAL = timedelta(minutes=5)
 
 
 class Radar(Rain):
-    "Defindes a radarinput"
+    """
+    Defindes a radarinput, read from a folder of radar composites.
+    The rain rate of a composite lasts until the next composite, at most interval.
+    The rain of a window is the average rain in mm per second that falls on the area of the radar within the
+    window, like the average of ArtificialVariableRain, the area given to get_rain_fall only carries the size
+    of the catchment. Times are naive datetimes in the time zone
+    of the composites.
+    The folder is listed the first time it is read, and a composite is only read when a window overlaps it.
+    Only the cells of the composite that intersect the area are read, and the decoded cells of the most recently
+    used composites are kept in the tile cache.
+    The rain of the composites is averaged over the area with the mask of the area, weighted by the share of
+    every cell within the area.
+    With a cache folder the rate of the area in every composite is also cached on disk, so a later run over
+    the same area only decodes the composites that are new or changed. Close the radar to write the rates.
+    """
 
-    def __init__(self, area: Area) -> None:
+    def __init__(
+        self,
+        area: Area,
+        folder: str | None = None,
+        interval: timedelta = DEFAULT_INTERVAL,
+        max_tiles: int = DEFAULT_MAX_TILES,
+        masks: MaskIndex | None = None,
+        cache: str | None = None,
+    ) -> None:
         "Creates a new radar object"
         self._area = area
+        self.folder = folder
+        self.interval = interval
+        self.tiles = TileCache(max_tiles)
+        self._composites: List[RadarData] | None = None
+        self._starts = np.zeros(0)
+        self._ends = np.zeros(0)
+        self.masks = masks or MASKS
+        self.cache = cache
+        self._series: SeriesCache | None = None
+        self._grid: RadarGrid | None = None
 
     def set_area(self, area: Area) -> Self:
         "Sets the area of the radar"
         self._area = area
+        self.close()
+        self._series = None
         return self
 
-    def get_rain_fall(self, area: Area, start_time: datetime, end_time: datetime) -> float:
-        return 0.0
+    def _list(self) -> List[RadarData]:
+        "Lists the composites of the folder in time order, the folder is only listed once"
+        if self._composites is None:
+            composites = []
+            if self.folder is not None:
+                with os.scandir(self.folder) as entries:
+                    composites = [RadarData(entry.path) for entry in entries if entry.name.endswith(".h5")]
+            composites.sort(key=lambda composite: composite.time)
+            self._composites = composites
+            self._starts = _seconds([composite.time for composite in composites])
+            self._ends = np.minimum(np.append(self._starts[1:], np.inf), self._starts + self.interval.total_seconds())
+        return self._composites
+
+    def _mask(self) -> AreaMask | None:
+        "The mask of the area over the grid, all composites are expected to have the grid of the first composite"
+        if self._grid is None:
+            self._grid = self._list()[0].grid()
+        return self.masks.get(self._area, self._grid)
 
+    def _read_rates(self, indexes: range) -> np.ndarray:
+        """
+        Reads the average rain rate in mm/h over the area of the composites.
+        The rates are taken from the cache folder if there is one, else the windows of the composites are decoded,
+        the decoded windows are kept in the tile cache.
+        """
+        mask = self._mask()
+        if mask is None:
+            return np.zeros(len(indexes))
+        if self.cache is not None and self._series is None:
+            self._series = SeriesCache(self.cache, mask_key(self._grid, mask))
+        rates = np.zeros(len(indexes))
+        unread = []
+        for i, index in enumerate(indexes):
+            rate = None if self._series is None else self._series.get(self._composites[index])
+            if rate is None:
+                unread.append(i)
+            else:
+                rates[i] = rate
+        if not unread:
+            return rates
 
-class RadarData:
-    "RadarData"
+        rows, columns = mask.window
+        tiles = []
+        for i in unread:
+            composite = self._composites[indexes[i]]
+            key = (composite.file, rows.start, rows.stop, columns.start, columns.stop)
+            tiles.append(self.tiles.get(key, lambda composite=composite: composite.read(mask.window)))
+        rates[unread] = mask.average(np.stack(tiles))
+        if self._series is not None:
+            for i in unread:
+                self._series.put(self._composites[indexes[i]], float(rates[i]))
+        return rates
+
+    def close(self) -> None:
+        "Writes the rates that have not been written to the cache"
+        if self._series is not None:
+            self._series.flush()
+
+    def get_rain_fall(self, area: Area, start_time: datetime, end_time: datetime) -> float:
+        """
+        Gets the average rain in mm per second within the given start_time and end_time
+        """
+        return float(self.get_rain_falls(area, [start_time], [end_time])[0])
 
-    def __init__(self):
-        "Creats new radardata"
-        self._f = h5.File("/home/kamya/AAU/Projekt/P6/DMI/dk.com.202311231405.500_max.h5")
+    def get_rain_falls(self, area: Area, start_times: Sequence[datetime], end_times: Sequence[datetime]) -> np.ndarray:
+        """
+        Gets the average rain in mm per second of every window from start_times to end_times,
+        every composite is read once. Windows without a duration have no rain.
+        """
+        starts = _seconds(start_times)
+        ends = _seconds(end_times)
+        if len(self._list()) == 0 or len(starts) == 0:
+            return np.zeros(len(starts))
+        # The composites that overlap any of the windows
+        first = int(np.searchsorted(self._ends, starts.min(), "right"))
+        last = int(np.searchsorted(self._starts, ends.max(), "left"))
+        if first >= last:
+            return np.zeros(len(starts))
+        rates = self._read_rates(range(first, last))
+        # The rain that has fallen since the first composite, at the start and end of every composite
+        boundaries = np.column_stack([self._starts[first:last], self._ends[first:last]]).ravel()
+        rain = rates * (self._ends[first:last] - self._starts[first:last]) / 3600
+        fallen = np.column_stack([np.cumsum(rain) - rain, np.cumsum(rain)]).ravel()
+        total = np.interp(ends, boundaries, fallen) - np.interp(starts, boundaries, fallen)
+        return np.divide(total, ends - starts, out=np.zeros(len(starts)), where=ends > starts)
 
-    def __del__(self) -> None:
-        "Destryies the radar object"
-        self._f.close()
 
-    def test(self) -> None:
-        "Tests the system"
-        a = self._f["where"].attrs["LL_lat"]
-        print(a)
+def _seconds(times: Sequence[datetime]) -> np.ndarray:
+    "Seconds since the epoch of naive datetimes"
+    return (np.array(times, dtype="datetime64[us]") - np.datetime64(0, "us")) / np.timedelta64(1, "s")
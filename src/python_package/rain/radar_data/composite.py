@@ -0,0 +1,78 @@
+"THIS FILE CONTAINS A RADAR COMPOSITE STORED AS AN ODIM HDF5 FILE, LIKE THE COMPOSITES OF DMI"
+
+from datetime import datetime
+import os
+import re
+import h5py as h5
+import numpy as np
+from .grid import RadarGrid, Window
+
+DATA = "dataset1/data1/data"
+
+# Marshall-Palmer relation between reflectivity and rain rate, Z = A * R^B
+MARSHALL_PALMER_A = 200.0
+MARSHALL_PALMER_B = 1.6
+
+# Composites are named like dk.com.202311231405.500_max.h5
+_TIMESTAMP = re.compile(r"\.(\d{12})\.")
+
+
+def reflectivity_to_rate(dbz: np.ndarray) -> np.ndarray:
+    "Converts reflectivity in dBZ to rain rate in mm/h"
+    return np.power(np.power(10.0, dbz / 10.0) / MARSHALL_PALMER_A, 1.0 / MARSHALL_PALMER_B)
+
+
+class RadarData:
+    """
+    A radar composite. The file is only opened when it is read, and only the cells of the window are read.
+    The time of the composite is read from the file name if it contains one.
+    """
+
+    def __init__(self, file: str):
+        "Creates new radardata"
+        self.file = file
+        self._time: datetime | None = None
+        match = _TIMESTAMP.search(os.path.basename(file))
+        if match is not None:
+            self._time = datetime.strptime(match.group(1), "%Y%m%d%H%M")
+
+    @property
+    def time(self) -> datetime:
+        "The time the composite was measured"
+        if self._time is None:
+            with h5.File(self.file, "r") as f:
+                what = f["what"].attrs
+                self._time = datetime.strptime(_text(what["date"]) + _text(what["time"]), "%Y%m%d%H%M%S")
+        return self._time
+
+    def grid(self) -> RadarGrid:
+        "Reads the grid of the composite"
+        with h5.File(self.file, "r") as f:
+            return RadarGrid.from_where(f["where"].attrs)
+
+    def read(self, window: Window) -> np.ndarray:
+        "Reads the rain rate in mm/h of the cells of the window, cells without data are nan"
+        with h5.File(self.file, "r") as f:
+            what = {}
+            for group in ("dataset1/what", "dataset1/data1/what"):
+                if group in f:
+                    what.update(f[group].attrs)
+            raw = f[DATA][window]
+        values = raw * float(what.get("gain", 1.0)) + float(what.get("offset", 0.0))
+        quantity = _text(what.get("quantity", "DBZH"))
+        match quantity:
+            case "DBZH" | "TH":
+                rate = reflectivity_to_rate(values)
+            case "RATE":
+                rate = values
+            case _:
+                raise ValueError(f"Radar quantity {quantity} in {self.file} is not supported")
+        if "undetect" in what:
+            rate = np.where(raw == what["undetect"], 0.0, rate)
+        if "nodata" in what:
+            rate = np.where(raw == what["nodata"], np.nan, rate)
+        return rate
+
+
+def _text(value: bytes | str | np.bytes_) -> str:
+    return value.decode("ascii") if isinstance(value, (bytes, np.bytes_)) else str(value)
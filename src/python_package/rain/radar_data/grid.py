@@ -0,0 +1,124 @@
+"THIS FILE CONTAINS THE GEOMETRY OF THE GRID OF A RADAR COMPOSITE"
+
+from typing import Mapping, Tuple
+import math
+import numpy as np
+from ..area import Area, Coordinate
+
+# Meters per degree, the same approximation as NorthboundRectangle.calc_area
+DISTANCE_BETWEEN_DEG_IN_M = 111_120
+
+Window = Tuple[slice, slice]
+
+# The PROJ names of the projections whose grid is regular in latitude and longitude
+LATLON_PROJECTIONS = {"longlat", "latlong", "lonlat", "latlon"}
+
+
+class RadarGrid:
+    """
+    The grid of a radar composite, row 0 is the north edge and column 0 the west edge.
+    The grid is regular in latitude and longitude between its corners, grids in other projections,
+    like the stereographic composites of DMI, are not supported.
+    """
+
+    def __init__(self, north: float, south: float, west: float, east: float, rows: int, columns: int):
+        "Creates a new RadarGrid"
+        if north <= south or east <= west or rows <= 0 or columns <= 0:
+            raise ValueError("A radar grid must have a positive size")
+        self.north = north
+        self.south = south
+        self.west = west
+        self.east = east
+        self.rows = rows
+        self.columns = columns
+
+    @staticmethod
+    def from_where(where: Mapping) -> "RadarGrid":
+        """
+        Reads the grid from the 'where' attributes of an ODIM HDF5 composite.
+        Raises a ValueError if the projdef of the composite is not a latitude and longitude projection.
+        """
+        projection = projection_name(where.get("projdef", ""))
+        if projection is not None and projection not in LATLON_PROJECTIONS:
+            raise ValueError(
+                f"Radar grids in the {projection} projection are not supported, "
+                "the grid must be regular in latitude and longitude"
+            )
+        return RadarGrid(
+            float(where["UL_lat"]),
+            float(where["LL_lat"]),
+            float(where["LL_lon"]),
+            float(where["UR_lon"]),
+            int(where["ysize"]),
+            int(where["xsize"]),
+        )
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, RadarGrid) and self.key == other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    @property
+    def key(self) -> Tuple[float, float, float, float, int, int]:
+        "The corners and size of the grid"
+        return (self.north, self.south, self.west, self.east, self.rows, self.columns)
+
+    @property
+    def cell_lat(self) -> float:
+        "The height of a cell in degrees"
+        return (self.north - self.south) / self.rows
+
+    @property
+    def cell_lon(self) -> float:
+        "The width of a cell in degrees"
+        return (self.east - self.west) / self.columns
+
+    def cell_area(self) -> float:
+        "The area of a cell in m2"
+        return self.cell_lat * DISTANCE_BETWEEN_DEG_IN_M * self.cell_lon * DISTANCE_BETWEEN_DEG_IN_M
+
+    def window(self, area: Area) -> Window | None:
+        "The rows and columns of the cells that intersect the bounds of the area, None if there are none"
+        bounds = area.bounds()
+        if bounds is None:
+            return None
+        south_west, north_east = bounds
+        first_row = max(math.floor((self.north - north_east.lat) / self.cell_lat), 0)
+        last_row = min(math.ceil((self.north - south_west.lat) / self.cell_lat), self.rows)
+        first_column = max(math.floor((south_west.lon - self.west) / self.cell_lon), 0)
+        last_column = min(math.ceil((north_east.lon - self.west) / self.cell_lon), self.columns)
+        if first_row >= last_row or first_column >= last_column:
+            return None
+        return slice(first_row, last_row), slice(first_column, last_column)
+
+    def centers(self, window: Window) -> Tuple[np.ndarray, np.ndarray]:
+        "The latitudes of the centers of the rows and the longitudes of the centers of the columns of a window"
+        rows, columns = window
+        lat = self.north - (np.arange(rows.start, rows.stop) + 0.5) * self.cell_lat
+        lon = self.west + (np.arange(columns.start, columns.stop) + 0.5) * self.cell_lon
+        return lat, lon
+
+    def edges(self, window: Window) -> Tuple[np.ndarray, np.ndarray]:
+        "The latitudes of the edges of the rows from north to south and longitudes of the edges of the columns"
+        rows, columns = window
+        lat = self.north - np.arange(rows.start, rows.stop + 1) * self.cell_lat
+        lon = self.west + np.arange(columns.start, columns.stop + 1) * self.cell_lon
+        return lat, lon
+
+    def cell_of(self, coordinate: Coordinate, window: Window) -> Tuple[int, int]:
+        "The row and column within the window of the cell that contains the coordinate"
+        rows, columns = window
+        row = min(max(int((self.north - coordinate.lat) / self.cell_lat), rows.start), rows.stop - 1)
+        column = min(max(int((coordinate.lon - self.west) / self.cell_lon), columns.start), columns.stop - 1)
+        return row - rows.start, column - columns.start
+
+
+def projection_name(projdef: bytes | str) -> str | None:
+    "The name of the projection in a PROJ definition like '+proj=stere +lat_0=90', None if it has none"
+    if isinstance(projdef, bytes):
+        projdef = projdef.decode("ascii")
+    for parameter in str(projdef).split():
+        if parameter.startswith("+proj="):
+            return parameter[len("+proj=") :]
+    return None
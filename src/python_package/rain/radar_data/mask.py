@@ -0,0 +1,63 @@
+"THIS FILE CONTAINS AN INDEX OF WHICH CELLS OF RADAR GRIDS ARE WITHIN AREAS"
+
+from typing import Dict
+from weakref import WeakKeyDictionary
+import numpy as np
+from ..area import Area, Coordinate
+from .grid import RadarGrid, Window
+
+
+class AreaMask:
+    "The window of the cells of a grid around an area, and the share of every cell of the window within the area"
+
+    def __init__(self, window: Window, weights: np.ndarray):
+        "Creates a new AreaMask"
+        self.window = window
+        self.weights = weights
+
+    def average(self, tiles: np.ndarray) -> np.ndarray:
+        """
+        The weighted average over the area of tiles of the window, of shape (..., rows, columns).
+        Cells that are nan are left out, a tile without data in the area averages to 0.
+        """
+        valid = ~np.isnan(tiles)
+        total = np.sum(np.where(valid, tiles, 0.0) * self.weights, axis=(-2, -1))
+        weight = np.sum(valid * self.weights, axis=(-2, -1))
+        return np.divide(total, weight, out=np.zeros_like(total), where=weight > 0)
+
+
+class MaskIndex:
+    """
+    The masks of areas over grids, the mask of an area is computed once per grid.
+    The masks of an area are dropped when the area is no longer used.
+    """
+
+    def __init__(self):
+        "Creates a new MaskIndex"
+        self._masks: WeakKeyDictionary[Area, Dict[RadarGrid, AreaMask | None]] = WeakKeyDictionary()
+        self.computed = 0
+
+    def get(self, area: Area, grid: RadarGrid) -> AreaMask | None:
+        "The mask of the area over the grid, None if the area is outside the grid or has no location"
+        masks = self._masks.setdefault(area, {})
+        if grid not in masks:
+            masks[grid] = self._compute(area, grid)
+            self.computed += 1
+        return masks[grid]
+
+    @staticmethod
+    def _compute(area: Area, grid: RadarGrid) -> AreaMask | None:
+        window = grid.window(area)
+        if window is None:
+            return None
+        weights = area.weights(*grid.edges(window))
+        if not weights.any():
+            # An area within a single cell that does not contain its center uses the cell at its center
+            south_west, north_east = area.bounds()
+            center = Coordinate((south_west.lon + north_east.lon) / 2, (south_west.lat + north_east.lat) / 2)
+            weights[grid.cell_of(center, window)] = 1.0
+        return AreaMask(window, weights)
+
+
+# Shared by every radar, so radars over the same area and grid compute its mask once
+MASKS = MaskIndex()
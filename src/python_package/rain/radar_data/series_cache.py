@@ -0,0 +1,155 @@
+"""
+THIS FILE CONTAINS A CACHE ON DISK OF THE RAIN OF AREAS READ FROM RADAR COMPOSITES
+
+The average rain rate of an area in every composite is stored in a folder named by the checksum of the mask
+of the area over the grid. The entries are stored in .npy segment files sorted by time, which are memory
+mapped when read, so looking up a composite only reads the pages of the segments around its time.
+An entry holds the size, modification time and hex checksum of its composite. A composite whose size or
+modification time has changed is checksummed again, and its rate is only reused if the checksum is unchanged.
+"""
+
+from typing import Dict, List
+import hashlib
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from ...checksum import file_checksum
+from .composite import RadarData
+from .grid import RadarGrid
+from .mask import AreaMask
+
+# Changes whenever the rate of a composite is computed differently or the layout of the entries changes
+VERSION = 2
+ENTRY = np.dtype(
+    [("time", "<f8"), ("rate", "<f8"), ("size", "<i8"), ("mtime", "<i8"), ("checksum", "S64"), ("name", "S255")]
+)
+# New entries are written as a segment once there are this many
+FLUSH_SIZE = 256
+# The segments are merged into one when there are more
+MAX_SEGMENTS = 16
+
+
+def mask_key(grid: RadarGrid, mask: AreaMask) -> str:
+    "The checksum of the mask of an area over a grid, areas with the same mask share their cache"
+    rows, columns = mask.window
+    digest = hashlib.sha256()
+    digest.update(json.dumps([VERSION, grid.key, [rows.start, rows.stop, columns.start, columns.stop]]).encode())
+    digest.update(np.ascontiguousarray(mask.weights, dtype="<f8").tobytes())
+    return digest.hexdigest()
+
+
+def _seconds(composite: RadarData) -> float:
+    return (np.datetime64(composite.time, "us") - np.datetime64(0, "us")) / np.timedelta64(1, "s")
+
+
+class SeriesCache:
+    """
+    The cached rain rates of one mask over one grid.
+    Entries are kept in memory until FLUSH_SIZE entries are added or the cache is flushed.
+    """
+
+    def __init__(self, folder: str, key: str):
+        "Creates a new SeriesCache in a subfolder named key of folder"
+        self.folder = os.path.join(folder, key)
+        os.makedirs(self.folder, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._pending: Dict[bytes, np.ndarray] = {}
+        self._segments: List[np.ndarray] = []
+        self._files: List[str] = []
+        self._load()
+
+    def _load(self) -> None:
+        "Memory maps the segments, oldest first"
+        self._segments, self._files = [], []
+        for name in sorted(os.listdir(self.folder)):
+            if not name.endswith(".npy"):
+                continue
+            file = os.path.join(self.folder, name)
+            try:
+                segment = np.load(file, mmap_mode="r")
+            except (OSError, ValueError):
+                continue  # Removed by a compaction in another process, or not a segment
+            if segment.dtype == ENTRY:
+                self._segments.append(segment)
+                self._files.append(file)
+
+    def _find(self, name: bytes, seconds: float) -> np.ndarray | None:
+        "The newest entry of a composite"
+        if name in self._pending:
+            return self._pending[name]
+        for segment in reversed(self._segments):
+            times = segment["time"]
+            first = int(np.searchsorted(times, seconds, "left"))
+            last = int(np.searchsorted(times, seconds, "right"))
+            for entry in segment[first:last]:
+                if entry["name"] == name:
+                    return entry
+        return None
+
+    def get(self, composite: RadarData) -> float | None:
+        "The cached rate of a composite, None if it is not cached or the composite has changed"
+        name = os.path.basename(composite.file).encode("utf-8")
+        entry = self._find(name, _seconds(composite))
+        if entry is not None:
+            stat = os.stat(composite.file)
+            if entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns:
+                self.hits += 1
+                return float(entry["rate"])
+            checksum = file_checksum(composite.file)
+            if checksum.encode("ascii") == entry["checksum"]:
+                # The composite was touched but not changed
+                self.put(composite, float(entry["rate"]), checksum)
+                self.hits += 1
+                return float(entry["rate"])
+        self.misses += 1
+        return None
+
+    def put(self, composite: RadarData, rate: float, checksum: str | None = None) -> None:
+        "Caches the rate of a composite, the composite is checksummed unless its checksum is given"
+        name = os.path.basename(composite.file).encode("utf-8")
+        stat = os.stat(composite.file)
+        checksum = (checksum or file_checksum(composite.file)).encode("ascii")
+        entry = np.array((_seconds(composite), rate, stat.st_size, stat.st_mtime_ns, checksum, name), dtype=ENTRY)
+        self._pending[name] = entry
+        if len(self._pending) >= FLUSH_SIZE:
+            self.flush()
+
+    def _write(self, entries: np.ndarray) -> str:
+        "Writes entries sorted by time as a new segment, the segment is complete or missing"
+        entries = entries[np.argsort(entries["time"], kind="stable")]
+        file = os.path.join(self.folder, f"{time.time_ns():020d}-{os.getpid()}.npy")
+        handle, staging = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+        with os.fdopen(handle, "wb") as f:
+            np.save(f, entries)
+        os.replace(staging, file)
+        return file
+
+    def flush(self) -> None:
+        "Writes the entries in memory as a segment, the segments are merged if there are too many"
+        if not self._pending:
+            return
+        self._write(np.stack(list(self._pending.values())))
+        self._pending = {}
+        self._load()
+        if len(self._segments) > MAX_SEGMENTS:
+            self.compact()
+
+    def compact(self) -> None:
+        "Merges the segments into one, keeping the newest entry of every composite"
+        if len(self._segments) <= 1:
+            return
+        entries = np.concatenate(self._segments)
+        # The last entry of a name is the newest, as the segments are ordered oldest first
+        _, newest = np.unique(entries["name"][::-1], return_index=True)
+        merged = self._files
+        self._segments = []
+        self._write(entries[len(entries) - 1 - newest])
+        for file in merged:
+            try:
+                os.remove(file)
+            except FileNotFoundError:
+                pass
+        self._load()
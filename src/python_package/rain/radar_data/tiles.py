@@ -0,0 +1,47 @@
+"THIS FILE CONTAINS A CACHE OF DECODED RADAR TILES THAT KEEPS THE MOST RECENTLY USED TILES"
+
+from collections import OrderedDict
+from typing import Callable, Hashable
+import numpy as np
+
+DEFAULT_MAX_TILES = 256
+
+
+class TileCache:
+    """
+    A least recently used cache of decoded tiles.
+    When more than max_tiles tiles are cached the tile that was used the longest ago is dropped.
+    """
+
+    def __init__(self, max_tiles: int = DEFAULT_MAX_TILES):
+        "Creates a new TileCache"
+        if max_tiles <= 0:
+            raise ValueError("A tile cache must hold at least one tile")
+        self.max_tiles = max_tiles
+        self.hits = 0
+        self.misses = 0
+        self._tiles: OrderedDict[Hashable, np.ndarray] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._tiles
+
+    def get(self, key: Hashable, load: Callable[[], np.ndarray]) -> np.ndarray:
+        "Gets a tile, it is loaded if it is not cached"
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self.hits += 1
+            self._tiles.move_to_end(key)
+            return tile
+        self.misses += 1
+        tile = load()
+        self._tiles[key] = tile
+        if len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def clear(self) -> None:
+        "Drops every tile"
+        self._tiles.clear()
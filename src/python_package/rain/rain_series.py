@@ -0,0 +1,89 @@
+"""
+Contains a compiled rainfall series for answering average rainfall queries in logarithmic time
+"""
+
+import bisect
+import numpy as np
+
+
+class RainSeries:
+    """
+    A rainfall series where the rain of a point lasts until the next point.
+    The cumulative rain at every point is precomputed, so the average over a window
+    is two binary searches and a subtraction.
+    Times are float seconds from the begining of the series.
+    """
+
+    def __init__(self, times: np.ndarray, rain: np.ndarray):
+        "Creates a new RainSeries, the times must be sorted"
+        self.times = np.asarray(times, dtype=np.float64)
+        self.rain = np.asarray(rain, dtype=np.float64)
+        if self.times.shape != self.rain.shape or self.times.ndim != 1:
+            raise ValueError("times and rain must be one dimensional arrays of the same length")
+        self.cumulative = np.zeros_like(self.times)
+        np.cumsum(self.rain[:-1] * np.diff(self.times), out=self.cumulative[1:])
+        # Single windows are answered from lists, numpy is slower than bisect for scalars
+        self._time_list = self.times.tolist()
+        self._rain_list = self.rain.tolist()
+        self._cumulative_list = self.cumulative.tolist()
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def averages(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """
+        Gets the average rainfall of every window from starts to ends.
+        The window starts at the first point at or after its start and ends at the first later point
+        at or after its end, the rain of the last point lasts until the end of the window.
+        Windows without a point at or after their start have no rain.
+        """
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        count = len(self.times)
+        result = np.zeros(np.broadcast(starts, ends).shape)
+        if count == 0:
+            return result
+
+        first = np.searchsorted(self.times, starts, "left")
+        last = np.maximum(first + 1, np.searchsorted(self.times, ends, "left"))
+        valid = first < count
+        # Windows within a single point are scaled like in average to get the same rounding
+        single = last == first + 1
+        first = np.minimum(first, count - 1)
+        past_end = last >= count
+        last = np.minimum(last, count - 1)
+
+        window_start = self.times[first]
+        window_end = np.where(past_end, ends, self.times[last])
+        duration = window_end - window_start
+        total = self.cumulative[last] - self.cumulative[first]
+        total = total + np.where(past_end, self.rain[-1] * (ends - self.times[-1]), 0.0)
+        total = np.where(single, self.rain[first] * duration, total)
+
+        nonzero = valid & (duration != 0)
+        np.divide(total, duration, out=result, where=nonzero)
+        return result
+
+    def average(self, start: float, end: float) -> float:
+        "Gets the average rainfall from start to end, see averages"
+        times = self._time_list
+        count = len(times)
+        first = bisect.bisect_left(times, start)
+        if first >= count:
+            return 0.0
+
+        last = max(first + 1, bisect.bisect_left(times, end))
+        if last == first + 1:
+            # A window within a single point, the rain is scaled as in the sum to get the same rounding
+            duration = (times[last] if last < count else end) - times[first]
+            total = self._rain_list[first] * duration
+        elif last < count:
+            total = self._cumulative_list[last] - self._cumulative_list[first]
+            duration = times[last] - times[first]
+        else:
+            total = self._cumulative_list[-1] - self._cumulative_list[first] + self._rain_list[-1] * (end - times[-1])
+            duration = end - times[first]
+
+        if duration == 0:
+            return 0.0
+        return total / duration
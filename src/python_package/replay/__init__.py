@@ -0,0 +1,193 @@
+"""
+Contains a replay engine that runs a headless experiment in one batched pass.
+The sensor data is loaded up front and the fake serial protocol of the Headless device is skipped.
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Tuple
+import numpy as np
+from ..config import ExperimentConfig
+from ..kalman_filter.kalman import PondState
+from ..kalman_filter.kalman_bank import KalmanError
+from ..kalman_filter.trace import BinaryTraceSink
+from ..kalman_filter.vector_kalman_bank import VectorKalmanBank
+from ..out_mode import OutMode
+from ..rain import Rain
+from ..serial.headless import load_samples
+from ..serial.serial_exceptions import serial_exceptions
+from ..time import Time
+from ..virtual_pond import VirtualPond
+
+# The variance the Headless device reports with every reading
+HEADLESS_INVARIANCE = 3
+
+# Readings outside of these bounds are rejected by SerialCom.read_sensor
+SENSOR_MIN = 30
+SENSOR_MAX = 9998
+
+
+def load_sensor_data(file: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Loads a sensor csv file with rows of 'seconds,reading'.
+    Returns the times and readings truncated to ints, as the Headless device sends them.
+    """
+    times, readings = load_samples(file)
+    # SerialCom parses the first sequence of digits, so the sign of a reading is lost
+    return times, np.abs(readings)
+
+
+class ReplayResult:
+    """The output series of a replayed experiment"""
+
+    def __init__(
+        self,
+        time: np.ndarray,
+        output: List[float],
+        virtual_height: np.ndarray,
+        overflow: np.ndarray,
+        change_array: List[list],
+        trace: List[list],
+        kalman_errors: List[Tuple[float, KalmanError]],
+        sensor_error: serial_exceptions.Exceptions | None,
+        filter_count: int,
+    ):
+        self.time = time
+        self.output = output
+        self.virtual_height = virtual_height
+        self.overflow = overflow
+        self.change_array = change_array
+        self.trace = trace
+        self.kalman_errors = kalman_errors
+        self.sensor_error = sensor_error
+        self.filter_count = filter_count
+
+    def write_output(self, file: str) -> None:
+        """Writes the estimated height in the same format as the main loop"""
+        with open(file, "w", -1, "UTF-8") as f:
+            f.writelines(f"{t},{out}\n" for t, out in zip(self.time.tolist(), self.output))
+
+    def write_kalman(self, file: str, binary: bool = False) -> None:
+        """
+        Writes the kalman bank trace in the same format as the KalmanBank, or as a binary trace.
+        The rows keep the value types of the KalmanBank, so the csv trace is the same as the one of a headless run.
+        """
+        if binary:
+            with BinaryTraceSink(file, self.filter_count) as sink:
+                sink.write_rows(np.array(self.trace, dtype=np.float64).reshape(len(self.trace), sink.column_count))
+            return
+        with open(file, "w", encoding="utf-8") as f:
+            f.writelines(",".join(map(str, row)) + "\n" for row in self.trace)
+
+
+class Replay:
+    """Replays a headless experiment without the real time loop"""
+
+    def __init__(self, start: datetime, config: ExperimentConfig, rain: Rain, data_file: str):
+        self.start = start
+        self.config = config
+        self.rain = rain
+        self.sensor_times, self.sensor_readings = load_sensor_data(data_file)
+
+    def run(self, duration: float) -> ReplayResult:
+        """Runs the experiment for duration seconds"""
+        ticks = np.arange(0, duration, self.config.time_delta)
+        height, volume_in, volume_out, overflow = self._simulate_pond(len(ticks))
+        readings, sensor_error, error_tick = self._sensor_readings(ticks)
+
+        time = Time(self.start, timedelta(seconds=0), timedelta(seconds=self.config.time_delta))
+        bank = VectorKalmanBank(
+            faults=self.config.faults,
+            initial_state=self.config.water_level,
+            initial_variance=self.config.kalman_initial_variance,
+            time=time,
+            noice=self.config.kalman_noice,
+            out_file=None,
+        )
+
+        out_mode = OutMode.SENSOR
+        output: List[float] = []
+        change_array: List[list] = []
+        trace: List[list] = []
+        kalman_errors: List[Tuple[float, KalmanError]] = []
+        for k in range(error_tick):
+            t = float(ticks[k])
+            reading = readings[k]
+            error = bank.analyze_filters(reading, height[k])
+            predict_before_step = bank.get_predicted_state
+            bank.step(PondState(volume_in[k], volume_out[k], self.config.pond_area), reading, HEADLESS_INVARIANCE)
+            trace.append(bank.trace_row(reading, predict_before_step) + [reading])
+
+            if error is not None and t > self.config.kalman_delay:
+                kalman_errors.append((t, error))
+                if out_mode != OutMode.VIRTUAL:
+                    out_mode = OutMode.VIRTUAL
+                    change_array.append([out_mode, t])
+            output.append(reading if out_mode is OutMode.SENSOR else height[k])
+            time.step()
+
+        if sensor_error is not None:
+            change_array.append([OutMode.SENSOR_ERROR, float(ticks[error_tick])])
+        output.extend(height[error_tick:])
+
+        return ReplayResult(
+            time=ticks.astype(np.float64),
+            output=output,
+            virtual_height=np.array(height),
+            overflow=np.array(overflow, dtype=bool),
+            change_array=change_array,
+            trace=trace,
+            kalman_errors=kalman_errors,
+            sensor_error=sensor_error,
+            filter_count=len(bank),
+        )
+
+    def _simulate_pond(self, steps: int) -> Tuple[List[float], List[float], List[float], List[bool]]:
+        """Steps the virtual pond for every tick of the experiment"""
+        time = Time(self.start, timedelta(seconds=0), timedelta(seconds=self.config.time_delta))
+        pond = VirtualPond(
+            urban_catchment_area_ha=self.config.urban_catchment_area,
+            surface_reaction_factor=self.config.surface_reaction_factor,
+            discharge_coeficent=self.config.discharge_coeficent,
+            pond_area_m2=self.config.pond_area,
+            water_level_cm=self.config.water_level,
+            water_level_min_cm=self.config.water_level_min,
+            water_level_max_cm=self.config.water_level_max,
+            time=time,
+            rain_data_mm=self.rain,
+        )
+        pond.set_orifice(self.config.orifice)
+
+        pond_data = pond.simulate(steps)
+        return (
+            [data.height for data in pond_data],
+            [data.volume_in for data in pond_data],
+            [data.volume_out for data in pond_data],
+            [data.overflow for data in pond_data],
+        )
+
+    def _sensor_readings(self, ticks: np.ndarray) -> Tuple[List[int], serial_exceptions.Exceptions | None, int]:
+        """
+        Finds the reading the Headless device would send at every tick.
+        At every tick all samples up to the tick are read and the latest is used,
+        if no new sample has arrived since the last tick the device does not respond.
+        Returns the readings, the first sensor error and the tick it happened at.
+        """
+        counts = np.searchsorted(self.sensor_times, ticks, side="right")
+        has_new_sample = np.diff(counts, prepend=0) > 0
+        if len(self.sensor_readings) == 0:
+            readings = np.zeros(len(ticks), dtype=np.int64)
+        else:
+            readings = self.sensor_readings[np.maximum(counts - 1, 0)]
+
+        failed = ~has_new_sample | (readings < SENSOR_MIN) | (readings > SENSOR_MAX)
+        if not failed.any():
+            return readings.tolist(), None, len(ticks)
+
+        error_tick = int(np.argmax(failed))
+        if not has_new_sample[error_tick]:
+            error = serial_exceptions.Exceptions.NO_RESPONSE
+        elif readings[error_tick] == 0:
+            error = serial_exceptions.Exceptions.SENSOR_READS_ZERO
+        else:
+            error = serial_exceptions.Exceptions.COMUNICATION_ERROR
+        return readings.tolist(), error, error_tick
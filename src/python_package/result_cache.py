@@ -0,0 +1,104 @@
+"""
+THIS FILE CONTAINS A CACHE OF EXPERIMENT RESULTS KEYED BY THE CHECKSUM OF THEIR INPUTS
+
+The key is the checksum of the input csv files, the arguments that change the result, the model constants
+and the source of the package. A run with the same key reuses the output csv, kalman bank trace and images.
+"""
+
+from typing import Callable, List, Tuple
+import json
+import os
+import shutil
+import tempfile
+from .args import ARGS
+from .checksum import config_values, file_checksum, source_checksum, value_checksum
+from .config import ExperimentConfig
+from .plotter import output_images
+
+RESULT_FILE = "result.json"
+
+
+def _optional(getter: Callable[[], str]) -> str | None:
+    "The value of an ARGS property that raises AttributeError when the argument is not given"
+    try:
+        return getter()
+    except AttributeError:
+        return None
+
+
+def _checksum(file: str | None) -> str | None:
+    return None if file is None else file_checksum(file)
+
+
+def argument_values(args: ARGS) -> dict:
+    "The arguments that change the result of an experiment, input files are replaced by their checksum"
+    rain_file = _optional(lambda: args.rain_file)
+    return {
+        "mode": args.mode.name,
+        "time": args.time,
+        "name": args.name,
+        "rain": _checksum(rain_file) if rain_file is not None else vars(args.rain),
+        "data": _checksum(_optional(lambda: args.data)),
+        "data_control": _checksum(_optional(lambda: args.data_control)),
+        "out_type": args.out_type.name,
+        "out_graph": [graph.name for graph in args.out_graph],
+        "out_suffix": args.out_suffix,
+        "images": [os.path.splitext(image)[1] for image in output_images(args)],
+        "kalman_engine": args.kalman_engine,
+        "kalman_format": args.kalman_format,
+    }
+
+
+class ResultCache:
+    """A folder of experiment results, every result is a folder named by its key"""
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def key(self, args: ARGS, config: ExperimentConfig) -> str:
+        "The key of the result of running the experiment described by args and config"
+        return value_checksum([argument_values(args), config_values(config), source_checksum()])
+
+    def _files(self, args: ARGS) -> List[Tuple[str, str]]:
+        "The name in the cache and the path of every output file of a run"
+        files = [("output", args.out), ("kalman", args.kalman)]
+        files += [(f"image-{i}{os.path.splitext(image)[1]}", image) for i, image in enumerate(output_images(args))]
+        return files
+
+    def restore(self, key: str, args: ARGS) -> dict | None:
+        """
+        Copies the cached output files to the paths in args.
+        Returns the metadata stored with the result, or None if the result is not cached.
+        """
+        entry = os.path.join(self.folder, key)
+        try:
+            with open(os.path.join(entry, RESULT_FILE), "r", -1, "UTF-8") as file:
+                metadata = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        files = self._files(args)
+        if not all(os.path.isfile(os.path.join(entry, name)) for name, _ in files):
+            return None
+        for name, path in files:
+            shutil.copyfile(os.path.join(entry, name), path)
+        return metadata
+
+    def store(self, key: str, args: ARGS, metadata: dict) -> None:
+        """
+        Caches the output files of a finished run together with the metadata.
+        The result is written to a temporary folder first, so a result is either complete or missing.
+        """
+        staging = tempfile.mkdtemp(dir=self.folder)
+        try:
+            for name, path in self._files(args):
+                shutil.copyfile(path, os.path.join(staging, name))
+            with open(os.path.join(staging, RESULT_FILE), "w", -1, "UTF-8") as file:
+                json.dump(metadata, file)
+
+            entry = os.path.join(self.folder, key)
+            shutil.rmtree(entry, ignore_errors=True)
+            os.rename(staging, entry)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
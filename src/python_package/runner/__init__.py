@@ -0,0 +1,178 @@
+"""
+Contains a runner that replays every experiment in a folder using a pool of worker processes.
+The workers are reused between experiments, so the imports and matplotlib are only loaded once per worker.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import List
+import csv
+import os
+import time
+from ..args import ARGS
+from ..config import ExperimentConfig
+from ..plotter import plotting
+from ..replay import Replay
+from ..result_cache import ResultCache
+
+EXPERIMENT_FILES = ("Rain.csv", "DepthSensor.csv", "DepthControl.csv")
+OUT_GRAPHS = "rain,kalman-delta,kalman,control"
+SUMMARY_HEADER = ["name", "status", "seconds", "mode_changes", "sensor_error", "error"]
+
+
+class Experiment:
+    """An experiment folder containing a Rain.csv, DepthSensor.csv and DepthControl.csv"""
+
+    def __init__(self, folder: str, name: str | None = None):
+        "Creates a new Experiment, the name defaults to <experiment_name>-<dataset>"
+        self.folder = folder
+        path = os.path.realpath(folder)
+        self.name = name or f"{os.path.basename(os.path.dirname(path))}-{os.path.basename(path)}"
+
+    def arguments(self, out_dir: str, duration: int) -> List[str]:
+        """The arguments for running the experiment, these are the same as the ones used by run.sh"""
+        out = os.path.join(out_dir, self.name)
+        return [
+            f"--rain={os.path.join(self.folder, 'Rain.csv')}",
+            "--mode=replay",
+            f"--data={os.path.join(self.folder, 'DepthSensor.csv')}",
+            f"--data-control={os.path.join(self.folder, 'DepthControl.csv')}",
+            f"--time={duration}",
+            f"--name={self.name}",
+            f"--output={out}.csv",
+            f"--kalman-bank={out}.kalman-bank.csv",
+            f"--output-image={out}.png",
+            f"--output-graph={OUT_GRAPHS}",
+            "--output-suffix=true",
+            "--show=false",
+        ]
+
+
+class ExperimentResult:
+    """The outcome of running an experiment"""
+
+    def __init__(
+        self,
+        name: str,
+        status: str,
+        seconds: float,
+        mode_changes: int = 0,
+        sensor_error: str = "",
+        error: str = "",
+    ):
+        self.name = name
+        self.status = status
+        self.seconds = seconds
+        self.mode_changes = mode_changes
+        self.sensor_error = sensor_error
+        self.error = error
+
+    def row(self) -> list:
+        """The result as a row in the summary table"""
+        return [self.name, self.status, f"{self.seconds:.2f}", self.mode_changes, self.sensor_error, self.error]
+
+
+def is_experiment(folder: str) -> bool:
+    """Does the folder contain the files of an experiment"""
+    return all(os.path.isfile(os.path.join(folder, file)) for file in EXPERIMENT_FILES)
+
+
+def discover_experiments(data_dir: str) -> List[Experiment]:
+    """
+    Finds every experiment folder at data_dir/<experiment_name>/<dataset>,
+    and every experiment with a single dataset at data_dir/<experiment_name>
+    """
+    experiments = []
+    for experiment_name in sorted(os.listdir(data_dir)):
+        experiment_dir = os.path.join(data_dir, experiment_name)
+        if not os.path.isdir(experiment_dir):
+            continue
+        if is_experiment(experiment_dir):
+            experiments.append(Experiment(experiment_dir, experiment_name))
+        for dataset in sorted(os.listdir(experiment_dir)):
+            folder = os.path.join(experiment_dir, dataset)
+            if is_experiment(folder):
+                experiments.append(Experiment(folder))
+    return experiments
+
+
+def run_experiment(
+    experiment: Experiment, out_dir: str, duration: int, cache_dir: str | None = None
+) -> ExperimentResult:
+    """
+    Replays and plots a single experiment, exceptions are reported in the result.
+    If cache_dir is given a cached result of an identical run is reused.
+    """
+    begin = time.perf_counter()
+    try:
+        start = datetime.now()
+        args = ARGS(start, experiment.arguments(out_dir, duration))
+        config = ExperimentConfig()
+
+        cache = None if cache_dir is None else ResultCache(cache_dir)
+        if cache is not None:
+            key = cache.key(args, config)
+            metadata = cache.restore(key, args)
+            if metadata is not None:
+                return ExperimentResult(
+                    experiment.name,
+                    "cached",
+                    time.perf_counter() - begin,
+                    mode_changes=metadata["mode_changes"],
+                    sensor_error=metadata["sensor_error"],
+                )
+
+        result = Replay(start, config, args.rain, args.data).run(args.time)
+        result.write_output(args.out)
+        result.write_kalman(args.kalman)
+        # The experiments already run in parallel, so the figures of one are rendered in its worker
+        plotting(args, config.water_level_min, config.water_level_max, result.change_array, workers=1)
+        sensor_error = "" if result.sensor_error is None else result.sensor_error.name
+        if cache is not None:
+            cache.store(key, args, {"mode_changes": len(result.change_array), "sensor_error": sensor_error})
+        return ExperimentResult(
+            experiment.name,
+            "ok",
+            time.perf_counter() - begin,
+            mode_changes=len(result.change_array),
+            sensor_error=sensor_error,
+        )
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        return ExperimentResult(experiment.name, "failed", time.perf_counter() - begin, error=repr(e))
+
+
+def run_experiments(
+    experiments: List[Experiment],
+    out_dir: str,
+    duration: int,
+    jobs: int | None = None,
+    cache_dir: str | None = None,
+) -> List[ExperimentResult]:
+    """
+    Runs the experiments in a pool of jobs processes, defaults to one process per core.
+    If cache_dir is given the results are cached there.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        futures = [pool.submit(run_experiment, experiment, out_dir, duration, cache_dir) for experiment in experiments]
+        return [future.result() for future in futures]
+
+
+def write_summary(results: List[ExperimentResult], file: str) -> None:
+    """Writes the results as a csv table"""
+    with open(file, "w", -1, "UTF-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(SUMMARY_HEADER)
+        writer.writerows(result.row() for result in results)
+
+
+def format_table(header: List[str], rows: List[list]) -> str:
+    """Formats rows as a table with aligned columns for the terminal"""
+    rows = [header] + [[str(x) for x in row] for row in rows]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    return "\n".join("  ".join(x.ljust(w) for x, w in zip(row, widths)).rstrip() for row in rows)
+
+
+def format_summary(results: List[ExperimentResult]) -> str:
+    """Formats the results as a table for the terminal"""
+    return format_table(SUMMARY_HEADER, [result.row() for result in results])
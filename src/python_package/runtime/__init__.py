@@ -0,0 +1,133 @@
+"""
+Contains an asyncio runtime of the control loop.
+Reading the sensor, stepping the virtual pond, stepping the kalman bank and writing the output are separate tasks
+connected by bounded queues, so a slow response from the controller or a slow write of the output overlaps with
+the other steps instead of delaying the tick.
+The sensor is only read once the reading of the previous tick is filtered, so after a sensor error the sensor is
+not read again, like in the sequential loop.
+"""
+
+import asyncio
+from ..output import Sink
+from ..serial import SerialCom
+from ..serial.serial_exceptions import serial_exceptions
+from ..time import Clock, RealtimeClock, Time
+from .pipeline import PondPipeline, Reading
+
+__all__ = ["PondPipeline", "Reading", "TickScheduler", "run_async"]
+
+# How many ticks a task may run ahead of the task it feeds
+QUEUE_SIZE = 4
+
+
+class TickScheduler:
+    """
+    Schedules ticks at fixed offsets from the first tick, so the time spent in a tick does not delay the next.
+    The ticks are waited for on a clock. A tick that starts after its deadline is counted as late.
+    """
+
+    def __init__(self, delta: float, clock: Clock | None = None):
+        self.delta = delta
+        self.clock = clock or RealtimeClock()
+        self.late = 0
+        self._start: float | None = None
+
+    async def wait(self, index: int) -> None:
+        """Wait until the deadline of tick index"""
+        if self._start is None:
+            self._start = self.clock.monotonic()
+        delay = self._start + index * self.delta - self.clock.monotonic()
+        if delay > 0:
+            await self.clock.sleep_async(delay)
+        elif index > 0:
+            self.late += 1
+
+
+async def _acquire(
+    pipeline: PondPipeline,
+    controler: SerialCom,
+    time: Time,
+    ticks: int,
+    scheduler: TickScheduler,
+    readings: asyncio.Queue,
+    reads_sensor: asyncio.Queue,
+) -> None:
+    """
+    Reads the sensor at every tick, the time is the time of the controler.
+    From the second tick it waits for the filter to tell if the sensor is still read after the previous tick.
+    """
+    for index in range(ticks):
+        await scheduler.wait(index)
+        reading: Reading = None
+        read = pipeline.reads_sensor if index == 0 else await reads_sensor.get()
+        if read:
+            try:
+                reading = await controler.read_sensor_async()
+            except serial_exceptions.Exceptions as e:
+                reading = e
+        time.step()
+        await readings.put(reading)
+
+
+async def _simulate(pipeline: PondPipeline, ticks: int, pond_data: asyncio.Queue) -> None:
+    "Steps the virtual pond, it runs ahead of the sensor until the queue is full"
+    for _ in range(ticks):
+        await pond_data.put(pipeline.step_pond())
+        pipeline.virtual_pond.time.step()
+
+
+async def _filter(
+    pipeline: PondPipeline,
+    ticks: int,
+    readings: asyncio.Queue,
+    pond_data: asyncio.Queue,
+    outputs: asyncio.Queue,
+    reads_sensor: asyncio.Queue,
+) -> None:
+    "Steps the kalman bank with the pond data and the reading of every tick"
+    time = pipeline.kalman_bank.time
+    for _ in range(ticks):
+        data = await pond_data.get()
+        reading = await readings.get()
+        seconds = time.get_current_time.total_seconds()
+        out = await asyncio.to_thread(pipeline.step_filters, seconds, data, reading)
+        time.step()
+        reads_sensor.put_nowait(pipeline.reads_sensor)
+        await outputs.put((seconds, out))
+
+
+async def _write(out_sink: Sink, ticks: int, outputs: asyncio.Queue) -> None:
+    "Writes the output of every tick, a flush of the sink does not block the other tasks"
+    for _ in range(ticks):
+        seconds, out = await outputs.get()
+        await asyncio.to_thread(out_sink.write, f"{seconds},{out}\n")
+
+
+async def run_async(
+    pipeline: PondPipeline,
+    controler: SerialCom,
+    controler_time: Time,
+    out_sink: Sink,
+    ticks: int,
+    scheduler: TickScheduler,
+    queue_size: int = QUEUE_SIZE,
+) -> None:
+    """
+    Runs the control loop of a pond for ticks time steps.
+    The virtual pond, the kalman bank and the controler must each have their own Time, as the tasks step
+    their time independently. The output is the same as the output of the sequential loop.
+    """
+    readings: asyncio.Queue = asyncio.Queue(queue_size)
+    pond_data: asyncio.Queue = asyncio.Queue(queue_size)
+    outputs: asyncio.Queue = asyncio.Queue(queue_size)
+    # The sensor waits for the filter after every tick, so this queue holds at most one value
+    reads_sensor: asyncio.Queue = asyncio.Queue()
+    try:
+        async with asyncio.TaskGroup() as group:
+            group.create_task(_acquire(pipeline, controler, controler_time, ticks, scheduler, readings, reads_sensor))
+            group.create_task(_simulate(pipeline, ticks, pond_data))
+            group.create_task(_filter(pipeline, ticks, readings, pond_data, outputs, reads_sensor))
+            group.create_task(_write(out_sink, ticks, outputs))
+    except ExceptionGroup as e:
+        # Raise the error of the task that failed first, like the sequential loop would
+        raise e.exceptions[0] from e
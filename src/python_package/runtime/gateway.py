@@ -0,0 +1,125 @@
+"""
+Contains a gateway that runs the control loops of many ponds, each with its own controller, in one process.
+The ponds tick together, the controllers are read concurrently every tick. A controller whose port fails is
+reconnected with an exponential backoff, while it is disconnected its pond outputs the virtual water level.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+import asyncio
+import serial
+from ..output import Sink
+from ..serial import SerialCom
+from ..serial.serial_exceptions import serial_exceptions
+from ..time import Time
+from . import TickScheduler
+from .pipeline import PondPipeline, Reading
+
+INITIAL_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+
+class Device:
+    """A controller, the pipeline of its pond and the sink its output is written to"""
+
+    def __init__(self, name: str, controler: SerialCom, pipeline: PondPipeline, out_sink: Sink):
+        self.name = name
+        self.controler = controler
+        self.pipeline = pipeline
+        self.out_sink = out_sink
+        self.backoff = INITIAL_BACKOFF
+        self.retry_at = 0.0
+        self.connects = 0
+
+    @property
+    def connected(self) -> bool:
+        "Is the port of the controller open and read"
+        return self.controler.connected
+
+
+class SerialGateway:
+    """
+    Runs the pipelines of many devices tick by tick.
+    The pipelines of all devices must share the time of the gateway, it is stepped once per tick.
+    """
+
+    def __init__(
+        self,
+        devices: List[Device],
+        time: Time,
+        scheduler: TickScheduler,
+        initial_backoff: float = INITIAL_BACKOFF,
+        max_backoff: float = MAX_BACKOFF,
+        on_disconnect: Callable[[Device, Exception], None] = lambda device, error: None,
+    ):
+        self.devices = devices
+        self.time = time
+        self.scheduler = scheduler
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.on_disconnect = on_disconnect
+        for device in devices:
+            device.backoff = initial_backoff
+
+    def connect(self, device: Device) -> bool:
+        """
+        Opens the port of a device. If it fails the next attempt is delayed by the backoff of the device,
+        which doubles with every failed attempt up to max_backoff. The backoff is reset by the first reading
+        of the opened port, so a port that opens but fails when it is read keeps backing off.
+        """
+        try:
+            device.controler.begin()
+        except (serial.SerialException, OSError) as e:
+            device.retry_at = self.scheduler.clock.monotonic() + device.backoff
+            device.backoff = min(device.backoff * 2, self.max_backoff)
+            self.on_disconnect(device, e)
+            return False
+        device.connects += 1
+        return True
+
+    async def _read(self, device: Device) -> Reading:
+        "Reads the sensor of a device, None if the device is disconnected"
+        if not device.pipeline.reads_sensor:
+            return None
+        if not device.connected:
+            if self.scheduler.clock.monotonic() < device.retry_at or not await asyncio.to_thread(self.connect, device):
+                return None
+        try:
+            reading = await device.controler.read_sensor_async()
+            # The port is only trusted again once it has been read
+            device.backoff = self.initial_backoff
+            return reading
+        except serial_exceptions.Exceptions as e:
+            if device.connected:
+                return e
+        # The port failed while it was read
+        error = device.controler.reader.error if device.controler.reader is not None else None
+        device.controler.close()
+        device.retry_at = self.scheduler.clock.monotonic() + device.backoff
+        device.backoff = min(device.backoff * 2, self.max_backoff)
+        self.on_disconnect(device, error or serial_exceptions.Exceptions.NO_RESPONSE)
+        return None
+
+    async def tick(self) -> None:
+        "Steps the pipeline of every device once"
+        seconds = self.time.get_current_time.total_seconds()
+        pond_data = [device.pipeline.step_pond() for device in self.devices]
+        readings = await asyncio.gather(*(self._read(device) for device in self.devices))
+        for device, data, reading in zip(self.devices, pond_data, readings):
+            out = device.pipeline.step_filters(seconds, data, reading)
+            device.out_sink.write(f"{seconds},{out}\n")
+        self.time.step()
+
+    async def run(self, ticks: int) -> None:
+        """Runs ticks time steps, all ports are closed when the gateway stops"""
+        loop = asyncio.get_running_loop()
+        # Every device may wait on its controller at the same time
+        loop.set_default_executor(ThreadPoolExecutor(len(self.devices) + 1))
+        try:
+            for index in range(ticks):
+                await self.scheduler.wait(index)
+                await self.tick()
+        finally:
+            for device in self.devices:
+                device.controler.close()
+                device.out_sink.close()
@@ -0,0 +1,124 @@
+"""
+Contains the steps of the control loop for a single pond, shared by the sequential and the asyncio runtime
+"""
+
+from typing import Callable, List, Tuple
+from ..config import ExperimentConfig
+from ..kalman_filter.kalman import MeasurementData, PondState
+from ..kalman_filter.kalman_bank import KalmanBank, KalmanError
+from ..kalman_filter.vector_kalman_bank import VectorKalmanBank
+from ..out_mode import OutMode
+from ..output import Sink
+from ..rain import Rain
+from ..serial.serial_exceptions import serial_exceptions
+from ..time import Time
+from ..virtual_pond import PondData, VirtualPond
+
+# A sensor reading as returned by SerialCom.read_sensor, the error it raised or None if the sensor was not read
+Reading = Tuple[int, int] | serial_exceptions.Exceptions | None
+
+
+def _ignore(_) -> None:
+    pass
+
+
+class PondPipeline:
+    """
+    The virtual pond and kalman bank of a pond and the mode of its output.
+    Every tick the pond is stepped, then the filters are stepped with the sensor reading of the tick.
+    """
+
+    def __init__(
+        self,
+        virtual_pond: VirtualPond,
+        kalman_bank: KalmanBank | VectorKalmanBank,
+        pond_area: float,
+        kalman_delay: float,
+        on_sensor_error: Callable[[serial_exceptions.Exceptions], None] = _ignore,
+        on_kalman_error: Callable[[KalmanError], None] = _ignore,
+        on_overflow: Callable[[PondData], None] = _ignore,
+    ):
+        self.virtual_pond = virtual_pond
+        self.kalman_bank = kalman_bank
+        self.pond_area = pond_area
+        self.kalman_delay = kalman_delay
+        self.on_sensor_error = on_sensor_error
+        self.on_kalman_error = on_kalman_error
+        self.on_overflow = on_overflow
+        self.out_mode = OutMode.SENSOR
+        self.change_array: List[list] = []
+
+    @staticmethod
+    def from_config(
+        config: ExperimentConfig, rain: Rain, time: Time, kalman_sink: Sink, vector: bool = False
+    ) -> "PondPipeline":
+        "Creates the pipeline of a pond with the parameters of config, the pond and kalman bank share the time"
+        virtual_pond = VirtualPond(
+            urban_catchment_area_ha=config.urban_catchment_area,
+            surface_reaction_factor=config.surface_reaction_factor,
+            discharge_coeficent=config.discharge_coeficent,
+            pond_area_m2=config.pond_area,
+            water_level_cm=config.water_level,
+            water_level_min_cm=config.water_level_min,
+            water_level_max_cm=config.water_level_max,
+            time=time,
+            rain_data_mm=rain,
+        )
+        virtual_pond.set_orifice(config.orifice)
+        kalman_bank = (VectorKalmanBank if vector else KalmanBank)(
+            faults=config.faults,
+            time=time,
+            initial_state=config.water_level,
+            initial_variance=config.kalman_initial_variance,
+            noice=config.kalman_noice,
+            out_file=kalman_sink,
+        )
+        return PondPipeline(virtual_pond, kalman_bank, config.pond_area, config.kalman_delay)
+
+    @property
+    def reads_sensor(self) -> bool:
+        "Should the sensor be read, after a sensor error the sensor is not read again"
+        return self.out_mode is not OutMode.SENSOR_ERROR
+
+    def step_pond(self) -> PondData:
+        "Generates the virtual sensor reading of the current time step"
+        pond_data = self.virtual_pond.generate_virtual_sensor_reading()
+        self.virtual_pond.water_level = pond_data.height
+        if pond_data.overflow:
+            self.on_overflow(pond_data)
+        return pond_data
+
+    def step_filters(self, seconds: float, pond_data: PondData, reading: Reading) -> float:
+        """
+        Steps the kalman bank with the reading of the time step at seconds and switches the output mode.
+        Returns the output of the time step, the sensor reading or the virtual water level.
+        Without a reading the filters are not stepped and the virtual water level is the output.
+        """
+        out = pond_data.height
+        if self.reads_sensor and reading is not None:
+            try:
+                if isinstance(reading, serial_exceptions.Exceptions):
+                    raise reading
+                avg_dist, invariance = reading
+                out = avg_dist
+                self.kalman_bank.step_filters(
+                    PondState(q_in=pond_data.volume_in, q_out=pond_data.volume_out, ap=self.pond_area),
+                    MeasurementData(avg_dist, invariance),
+                    pond_data.height,
+                )
+            except serial_exceptions.Exceptions as e:
+                self._change_mode(OutMode.SENSOR_ERROR, seconds)
+                self.on_sensor_error(e)
+            except KalmanError as e:
+                if seconds > self.kalman_delay:
+                    self.on_kalman_error(e)
+                    self._change_mode(OutMode.VIRTUAL, seconds)
+
+        if self.out_mode is not OutMode.SENSOR:
+            out = pond_data.height
+        return out
+
+    def _change_mode(self, out_mode: OutMode, seconds: float) -> None:
+        if self.out_mode is not out_mode:
+            self.out_mode = out_mode
+            self.change_array.append([out_mode, seconds])
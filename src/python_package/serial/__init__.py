@@ -1,33 +1,57 @@
 """Contains class for serial communicating over ttf"""
 
 # Importing Libraries
-from datetime import datetime
-import os
+import asyncio
 import re
-import time
 import serial
 from python_package.serial.serial_exceptions import serial_exceptions
-from python_package.cash.cash import FileCache, CacheData
-from python_package.args import DEFAULT_CONTROLER_CACHE as default_log_folder
+from python_package.serial.reader import Frame, FrameType, SerialReader, parse_frame
+from python_package.cash.cash import CacheData
+from python_package.cash.rotating_cache import RotatingFileCache
+from python_package.time import Clock, RealtimeClock
+from python_package.args import DEFAULT_CONTROLER_CACHE as default_log_folder, DEFAULT_PORT
 
 BAUDRATE = 9600
-COM = "COM3"  # <-----
+COM = DEFAULT_PORT
+READ_TIMEOUT = 5  # seconds to wait on a response
+PORT_TIMEOUT = 0.5  # seconds a read of the port blocks, the reader thread checks if it is stopped in between
+POLL_INTERVAL = 0.01  # seconds between checks of a port that is read without a reader thread
 
 
 class SerialCom:
     """Serial comunication class"""
 
-    def __init__(self, log_folder: str = default_log_folder, port=COM, debug=False) -> None:
+    def __init__(self, log_folder: str = default_log_folder, port=COM, debug=False, clock: Clock | None = None) -> None:
         self.debug = debug
         self.port = port
+        self.clock = clock or RealtimeClock()
 
         self.arduino = serial.Serial()
+        self.reader: SerialReader | None = None
         self.log_folder = log_folder
-        os.makedirs(log_folder, exist_ok=True)
+        self.error_log = RotatingFileCache(log_folder)
 
     def begin(self) -> None:
-        """Starts serial connection"""
-        self.arduino = serial.Serial(port=self.port, baudrate=BAUDRATE, timeout=10)
+        """Starts serial connection and the thread reading from it"""
+        self.arduino = serial.Serial(port=self.port, baudrate=BAUDRATE, timeout=PORT_TIMEOUT)
+        self.start_reader()
+
+    def start_reader(self) -> None:
+        """Start a thread that reads the responses of the connected device, the port must have a read timeout"""
+        self.reader = SerialReader(self.arduino)
+        self.reader.start()
+
+    @property
+    def connected(self) -> bool:
+        """Is the serial connection open and read by the reader thread"""
+        return self.reader is not None and self.reader.is_alive()
+
+    def close(self) -> None:
+        """Stops the reader thread and closes the serial connection"""
+        if self.reader is not None:
+            self.reader.stop()
+            self.reader = None
+            self.arduino.close()
 
     def write(self, x: str) -> None:
         """Write a bytes package to the connected device, every command ends on a cardinal return"""
@@ -36,30 +60,42 @@ class SerialCom:
     def read(self) -> str:
         """wait for up to 5 seconds on response from connected device,
         either raise an exception or return the first response"""
-        timeout = time.time() + 5  # 5 seconds from now
+        return self.read_frame().line
+
+    def read_frame(self) -> Frame:
+        """wait for up to 5 seconds on response from connected device,
+        either raise an exception or return the first response as a parsed frame"""
+        if self.reader is not None:
+            return self._check_frame(self.reader.get(READ_TIMEOUT))
+
+        # A device without a reader thread is simulated, it is waited for on the clock of the run
+        timeout = self.clock.monotonic() + READ_TIMEOUT
         while self.arduino.in_waiting == 0:
-            if time.time() > timeout:
+            if self.clock.monotonic() > timeout:
                 raise serial_exceptions.Exceptions.NO_RESPONSE
-        string = self.arduino.read_until(b"\r").decode()
-        string = string.removesuffix("\r")
-        if string.find("Error") != -1:
-            print("Controller error " + string)
-            enum_val = serial_exceptions.ExceptionEnum(self.string_to_int(string)).name
+            self.clock.sleep(POLL_INTERVAL)
+        return self._check_frame(parse_frame(self.arduino.read_until(b"\r")))
+
+    def _check_frame(self, frame: Frame) -> Frame:
+        """Raise the controller error of an error frame"""
+        if frame.type is FrameType.ERROR:
+            print("Controller error " + frame.line)
+            enum_val = serial_exceptions.ExceptionEnum(self._frame_value(frame)).name
             self.log_error(
                 serial_exceptions.Exceptions[enum_val],
                 f"Controller error raised: {serial_exceptions.Exceptions[enum_val]}",
             )
 
         if self.debug:
-            print(string)
+            print(frame.line)
 
-        return string
+        return frame
 
     def set_pump(self, value: int) -> None:
         """set pump value for connected device, by sending a value with a prefix 'P',
         raise an exeption if incorrect value is given"""
         r_val = -1
-        rtn = self.read_all()
+        rtn = self.read_frames()
 
         if value < 0 or value > 100:
             self.log_error(
@@ -68,23 +104,27 @@ class SerialCom:
             )
         self.write("P" + str(value))
 
-        for i in rtn:
-            if i.find("pump update:") != -1:
-                r_val = self.string_to_int(i)
+        for frame in rtn:
+            if frame.type is FrameType.PUMP_UPDATE:
+                r_val = self._frame_value(frame)
         if r_val != value:
             self.log_error(serial_exceptions.Exceptions.COMUNICATION_ERROR, "Pump update response not recieved")
 
+    async def set_pump_async(self, value: int) -> None:
+        """set_pump without blocking the event loop"""
+        await asyncio.to_thread(self.set_pump, value)
+
     def read_sensor(self) -> tuple[int, int]:
         """Sends a msg with the string 'S' which tells the connected device to return sensor readings"""
         self.write("S")
-        rtn = self.read_all()
+        rtn = self.read_frames()
         invariance = -1
         avg_distance = -1
-        for string in rtn:
-            if string.find("invariance:") != -1:
-                invariance = self.string_to_int(string)
-            elif string.find("Rvd:") != -1:
-                avg_distance = self.string_to_int(string)
+        for frame in rtn:
+            if frame.type is FrameType.INVARIANCE:
+                invariance = self._frame_value(frame)
+            elif frame.type is FrameType.READING:
+                avg_distance = self._frame_value(frame)
 
         if invariance == -1 or avg_distance == -1:
             self.log_error(
@@ -100,14 +140,25 @@ class SerialCom:
 
         return avg_distance, invariance
 
+    async def read_sensor_async(self) -> tuple[int, int]:
+        """read_sensor without blocking the event loop"""
+        return await asyncio.to_thread(self.read_sensor)
+
     def read_all(self) -> list[str]:
         """Wait for up to 5 seconds for response from connected device,
         either throw exception or read all responses into an array"""
-        string_array: list[str] = [self.read()]  # run initial read
-        # string_array = []
+        return [frame.line for frame in self.read_frames()]
+
+    def read_frames(self) -> list[Frame]:
+        """Wait for up to 5 seconds for response from connected device,
+        either throw exception or read all responses into an array of parsed frames"""
+        if self.reader is not None:
+            return [self._check_frame(frame) for frame in self.reader.get_all(READ_TIMEOUT)]
+
+        frames = [self.read_frame()]  # run initial read
         while self.arduino.in_waiting > 0:  # Repeat read while buffer is not empty
-            string_array.append(self.read())
-        return string_array
+            frames.append(self.read_frame())
+        return frames
 
     def string_to_int(self, input_str: str) -> int:
         """Search string for a int, will raise an exception if none is found"""
@@ -120,19 +171,20 @@ class SerialCom:
         )  # will raise exception
         return -1
 
+    def _frame_value(self, frame: Frame) -> int:
+        """The int parsed from a frame, will raise an exception if none was found"""
+        if frame.value is not None:
+            return frame.value
+        return self.string_to_int(frame.line)
+
     def log_error(self, error: serial_exceptions.Exceptions, msg: str):
-        """Write error and communication buffer to file, before throwing exception"""
-        now = datetime.now()
-        time_now = str(now).replace(":", "..")
-        print(self.log_folder)
-        file = FileCache(f"{self.log_folder}/Error-log {error.name} {time_now}")
-
-        data_arr = [msg]
-        data = CacheData(0, now, data_arr)
-        file.insert(data)
-        while self.arduino.in_waiting:
-            string = self.arduino.read_until(b"\r").decode().removesuffix("\r")
-            data_arr.append(string)
-            data = CacheData(0, now, data_arr)
-            file.insert(data)
+        """Write error and communication buffer to the error log, before throwing exception"""
+        data_arr = [error.name, msg]
+        if self.reader is not None:
+            data_arr += [frame.line for frame in self.reader.pending()]
+        else:
+            while self.arduino.in_waiting:
+                string = self.arduino.read_until(b"\r").decode().removesuffix("\r")
+                data_arr.append(string)
+        self.error_log.insert(CacheData(0, self.clock.now(), data_arr))
         raise error
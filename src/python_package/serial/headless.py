@@ -1,41 +1,165 @@
 """THIS FILE CONTAINS THE INITIALIZATION OF A HEADLESS SETUP"""
 
+from bisect import bisect_left, bisect_right
 from datetime import timedelta
-import csv
-import copy
+from typing import Callable, Iterator, Tuple
+import numpy as np
+from python_package.csv_stream import CHUNK_SIZE, is_sorted, read_columns
 from python_package.time import Time
 from . import serial
 
+INVARIANCE = b"invariance:3"
+
+Samples = Tuple[np.ndarray, np.ndarray]
+
+
+def read_samples(file: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Samples]:
+    """
+    Reads a sensor csv file with rows of 'seconds,reading' chunk by chunk.
+    Yields the times and the readings truncated to ints.
+    """
+    for times, readings in read_columns(file, chunk_size):
+        yield times.astype(np.int64), readings.astype(np.int64)
+
+
+def load_samples(file: str) -> Samples:
+    """
+    Loads a sensor csv file with rows of 'seconds,reading'.
+    Returns the times and the readings truncated to ints.
+    """
+    chunks = list(read_samples(file))
+    if not chunks:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate([times for times, _ in chunks]), np.concatenate([readings for _, readings in chunks])
+
 
 class Headless(serial.Serial):  # pylint: disable=R0901
     """
-    Headless comunication class for running without physical setup
+    Headless comunication class for running without physical setup.
+    The samples are streamed from the file into a window of lists of times and readings, with a cursor to the
+    next sample to send. A sample is available once the time times the speed has reached the time of the sample.
+    Samples are read until the window holds every sample that has arrived, and sent samples are dropped from
+    the window, so a recording larger than memory can be replayed.
+    Samples out of order are searched like a list of samples, once a sample out of order is read the rest of
+    the file is read into the window.
     """
 
-    def __init__(self, file: str, time: Time):
+    def __init__(self, file: str, time: Time, speed: float = 1.0, chunk_size: int = CHUNK_SIZE):
         super(serial.Serial, self).__init__()
         self._time = time
+        self.speed = speed
+        self._source: Callable[[], Iterator[Samples]] = lambda: read_samples(file, chunk_size)
+        self._samples: Iterator[Samples] = iter(())
+        self._times: list[int] = []
+        self._readings: list[int] = []
+        self._offset = 0
+        self._sorted = True
+        self._cursor = 0
         self._inv = False
         self._read_before = False
         self._before = b"Rvd:30"
         self._rtn_none = False
         self._in_waiting = 0
-        self._last_fill = timedelta(seconds=-1)
-        with open(file, "r", -1, "UTF-8") as f:
-            reader = csv.reader(f)
-            self._buffer = [
-                (timedelta(seconds=int(float(sec))), bytes(f"Rvd:{int(float(reading))}", "utf-8"))
-                for sec, reading in reader
-            ]
+        self._last_fill = -1.0
+        self.rewind()
+
+    def _open(self) -> None:
+        "Starts reading the samples from the first sample"
+        self._samples = self._source()
+        self._times = []
+        self._readings = []
+        self._offset = 0
+        self._sorted = True
+        self._cursor = 0
+
+    def _read_chunk(self) -> bool:
+        "Reads the next chunk of samples into the window, False if every sample has been read"
+        times, readings = next(self._samples, (None, None))
+        if times is None:
+            return False
+        if self._sorted:
+            self._sorted = is_sorted(times, self._times[-1] if self._times else None)
+        # Sent samples are only needed again after a seek back, which reads the file again
+        del self._times[: self._cursor]
+        del self._readings[: self._cursor]
+        self._offset += self._cursor
+        self._cursor = 0
+        self._times.extend(times.tolist())
+        self._readings.extend(readings.tolist())
+        return True
+
+    def _read_until(self, now: float) -> None:
+        "Reads samples until every sample that has arrived by now is in the window"
+        while (not self._sorted or not self._times or self._times[-1] <= now) and self._read_chunk():
+            pass
+
+    def rewind(self) -> None:
+        """Starts sending the samples from the first sample"""
+        self._open()
+        self._inv = False
+        self._read_before = False
+        self._before = b"Rvd:30"
+        self._rtn_none = False
+        self._in_waiting = 0
+        self._last_fill = -1.0
+
+    def seek(self, time: timedelta) -> None:
+        """Skips the samples before time, the samples from time are sent again if they have been sent"""
+        seconds = int(time.total_seconds())
+        if self._offset > 0 and (not self._times or seconds <= self._times[0]):
+            self._open()
+        self._read_until(seconds)
+        if not self._sorted:
+            raise ValueError("Can only seek in samples sorted by time")
+        self._cursor = bisect_left(self._times, seconds)
+        self._in_waiting = 0
 
     @property
-    def buffer(self):
-        """Buffer for height readings"""
-        return self._buffer
+    def available(self) -> int:
+        """How many samples have arrived but not been sent"""
+        now = self._now
+        self._read_until(now)
+        if not self._sorted:
+            return sum(1 for t in self._times[self._cursor :] if t <= now)
+        return max(bisect_right(self._times, now) - self._cursor, 0)
+
+    @property
+    def buffer(self) -> list[tuple[timedelta, bytes]]:
+        """Buffer for height readings, reading it reads every sample into the window"""
+        while self._read_chunk():
+            pass
+        return [
+            (timedelta(seconds=t), self._frame(r))
+            for t, r in zip(self._times[self._cursor :], self._readings[self._cursor :])
+        ]
 
     @buffer.setter
     def buffer(self, setting: list[tuple[timedelta, bytes]]):
-        self._buffer = setting
+        times = np.array([int(t.total_seconds()) for t, _ in setting], dtype=np.int64)
+        readings = np.array([int(reading.removeprefix(b"Rvd:")) for _, reading in setting], dtype=np.int64)
+        self._source = lambda: iter([(times, readings)])
+        self.rewind()
+
+    @property
+    def _now(self) -> float:
+        return self._time.get_current_time.total_seconds() * self.speed
+
+    @staticmethod
+    def _frame(reading: int) -> bytes:
+        return b"Rvd:%d" % reading
+
+    def _first_arrived(self, now: float) -> int | None:
+        "The index from the cursor of the first sample that has arrived, None if no sample has arrived"
+        self._read_until(now)
+        if self._cursor < len(self._times) and self._times[self._cursor] <= now:
+            return 0
+        if self._sorted:
+            return None
+        # Samples out of order are searched like a list of samples
+        for i, t in enumerate(self._times[self._cursor :]):
+            if t <= now:
+                return i
+        return None
 
     def write(self, _) -> int | None:
         return 1
@@ -44,21 +168,18 @@ class Headless(serial.Serial):  # pylint: disable=R0901
     @property
     def in_waiting(self) -> int:
         if self._in_waiting == 0:
-            for i, (time, _) in enumerate(self._buffer):
-                if time <= self._time.get_current_time:
-                    self._in_waiting = (i + 1) * 2
-                    self._last_fill = copy.deepcopy(self._time.get_current_time)
-                    break
-            try:
-                if self._in_waiting == 0 and self._time.get_current_time == self._last_fill:
-                    if self._rtn_none:
-                        self._rtn_none = False
-                        return 0
-                    self._rtn_none = True
-                    self._read_before = True
-                    self._in_waiting = 2
-            except AttributeError:
-                pass
+            now = self._now
+            first = self._first_arrived(now)
+            if first is not None:
+                self._in_waiting = (first + 1) * 2
+                self._last_fill = now
+            elif now == self._last_fill:
+                if self._rtn_none:
+                    self._rtn_none = False
+                    return 0
+                self._rtn_none = True
+                self._read_before = True
+                self._in_waiting = 2
         return self._in_waiting
 
     def read_until(self, expected: bytes = b"\n", size: int | None = None) -> bytes:
@@ -66,14 +187,15 @@ class Headless(serial.Serial):  # pylint: disable=R0901
         self._in_waiting -= 1
         self._rtn_none = True
         if not self._inv:
-            reading = b"invariance:3"
+            reading = INVARIANCE
         elif self._read_before:
-            try:
-                reading = self._before
-                self._read_before = False
-            except Exception as e:
-                raise ValueError(f"IN HEADLESS: No reading read at time 0, {e}") from e
+            reading = self._before
+            self._read_before = False
         else:
-            _, reading = self.buffer.pop(0)
+            while self._cursor >= len(self._readings):
+                if not self._read_chunk():
+                    raise IndexError("IN HEADLESS: No more samples to send")
+            reading = self._frame(self._readings[self._cursor])
+            self._cursor += 1
             self._before = reading
         return reading
@@ -0,0 +1,117 @@
+"""
+Contains a reader thread that drains a serial port into a queue of parsed frames.
+The thread blocks in the read of the port, so waiting for a response does not use the cpu.
+"""
+
+from enum import Enum
+import queue
+import re
+import threading
+import serial
+from python_package.serial.serial_exceptions import serial_exceptions
+
+# How long to wait for more frames of a response after a frame is received
+FRAME_GAP = 0.05
+
+
+class FrameType(Enum):
+    """The kind of line sent by the controller"""
+
+    ERROR = 0
+    INVARIANCE = 1
+    READING = 2
+    PUMP_UPDATE = 3
+    OTHER = 4
+
+
+# Checked in order, a line containing "Error" is always an error
+_MARKERS = [
+    ("Error", FrameType.ERROR),
+    ("invariance:", FrameType.INVARIANCE),
+    ("Rvd:", FrameType.READING),
+    ("pump update:", FrameType.PUMP_UPDATE),
+]
+
+
+class Frame:
+    """A line sent by the controller, with its type and the first int in the line"""
+
+    def __init__(self, line: str):
+        self.line = line
+        self.type = next((frame_type for marker, frame_type in _MARKERS if marker in line), FrameType.OTHER)
+        value = re.search(r"\d+", line)
+        self.value = int(value.group()) if value is not None else None
+
+    def __repr__(self) -> str:
+        return f"Frame({self.line!r})"
+
+
+def parse_frame(data: bytes) -> Frame:
+    "Parses a line read from the serial port, the cardinal return ending the line is removed"
+    return Frame(data.decode("utf-8", "replace").removesuffix("\r"))
+
+
+class SerialReader(threading.Thread):
+    """
+    Reads lines from a serial port until stopped and puts them in a queue as parsed frames.
+    The port must be opened with a read timeout, so the thread notices when it is stopped.
+    Only lines ended by a cardinal return are parsed, a line split over several reads is put together first.
+    """
+
+    def __init__(self, arduino: serial.Serial):
+        super().__init__(name="SerialReader", daemon=True)
+        self.arduino = arduino
+        self.frames: queue.Queue[Frame] = queue.Queue()
+        self.error: Exception | None = None
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        # A read that times out in the middle of a line returns the start of the line, it is kept until the
+        # rest of the line is read
+        buffer = bytearray()
+        while not self._stopped.is_set():
+            try:
+                buffer += self.arduino.read_until(b"\r")
+            except (serial.SerialException, OSError) as e:
+                self.error = e
+                break
+            while (end := buffer.find(b"\r")) >= 0:
+                self.frames.put(parse_frame(bytes(buffer[: end + 1])))
+                del buffer[: end + 1]
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stops the thread after the read it is blocked in returns"""
+        self._stopped.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def get(self, timeout: float) -> Frame:
+        """
+        Wait for up to timeout seconds on the next frame, raise NO_RESPONSE if none is received.
+        Does not wait if the thread has stopped, as no more frames will be received.
+        """
+        try:
+            return self.frames.get(block=self.is_alive(), timeout=timeout)
+        except queue.Empty as e:
+            raise serial_exceptions.Exceptions.NO_RESPONSE from e
+
+    def get_all(self, timeout: float, gap: float = FRAME_GAP) -> list[Frame]:
+        """
+        Wait for up to timeout seconds on a response and return all of its frames.
+        The response ends when no frame is received for gap seconds.
+        """
+        frames = [self.get(timeout)]
+        try:
+            while True:
+                frames.append(self.frames.get(timeout=gap))
+        except queue.Empty:
+            return frames
+
+    def pending(self) -> list[Frame]:
+        """The frames received but not read yet, without waiting"""
+        frames = []
+        try:
+            while True:
+                frames.append(self.frames.get_nowait())
+        except queue.Empty:
+            return frames
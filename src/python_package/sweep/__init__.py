@@ -0,0 +1,284 @@
+"""
+Contains a parameter sweep that replays the experiments with many pond and kalman bank configurations.
+Every configuration is replayed against every experiment in a pool of worker processes,
+the results are cached by the checksum of the configuration, the experiment data and the source.
+The configurations are ranked by false switches, missed faults and detection latency.
+A replay that fails is recorded in the results of its configuration, the other replays still run.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+import csv
+import itertools
+import json
+import os
+import random
+import numpy as np
+from ..checksum import config_checksum, files_checksum, source_checksum, value_checksum
+from ..config import FAULTS, ExperimentConfig
+from ..kalman_filter.fault import ConstantFault
+from ..rain.artificial_rain import ArtificialVariableRain
+from ..rain.rain_data import save_rain_data
+from ..replay import Replay, load_sensor_data
+from ..runner import EXPERIMENT_FILES, Experiment, format_table
+
+# The parameters that can be swept, the values of the faults are swept as fault_<index into FAULTS>
+PARAMETERS = [
+    "urban_catchment_area",
+    "surface_reaction_factor",
+    "discharge_coeficent",
+    "kalman_delay",
+    "kalman_noice",
+    "kalman_initial_variance",
+] + [f"fault_{i}" for i in range(len(FAULTS))]
+
+RESULT_HEADER = [
+    "rank",
+    "parameters",
+    "datasets",
+    "failed",
+    "detected",
+    "missed",
+    "false_switches",
+    "mean_latency",
+    "max_latency",
+    "errors",
+]
+
+# The replays start at a fixed time, so the results do not depend on when the sweep is run
+START = datetime(2000, 1, 1)
+
+
+def make_config(parameters: Dict[str, float]) -> ExperimentConfig:
+    "Creates an experiment config where the parameters replace the defaults"
+    config = ExperimentConfig()
+    faults = list(config.faults)
+    for name, value in parameters.items():
+        if name not in PARAMETERS:
+            raise ValueError(f"{name} is not a parameter that can be swept, use one of {', '.join(PARAMETERS)}")
+        if name.startswith("fault_"):
+            fault = faults[int(name.removeprefix("fault_"))]
+            faults[int(name.removeprefix("fault_"))] = ConstantFault(
+                value, fault.get_classification, fault.get_fault_type
+            )
+        else:
+            setattr(config, name, value)
+    config.faults = faults
+    return config
+
+
+def grid(values: Dict[str, Sequence[float]]) -> List[Dict[str, float]]:
+    "Every combination of the values of the parameters"
+    names = list(values)
+    return [dict(zip(names, combination)) for combination in itertools.product(*(values[name] for name in names))]
+
+
+def sample(ranges: Dict[str, Tuple[float, float]], count: int, seed: int | None = None) -> List[Dict[str, float]]:
+    "count configurations with every parameter drawn uniformly from its range"
+    generator = random.Random(seed)
+    return [{name: generator.uniform(low, high) for name, (low, high) in ranges.items()} for _ in range(count)]
+
+
+def fault_onset(experiment: Experiment) -> float | None:
+    "The first time the sensor reading differs from the control reading, None if the sensor never fails"
+    sensor_times, sensor = load_sensor_data(os.path.join(experiment.folder, "DepthSensor.csv"))
+    _, control = load_sensor_data(os.path.join(experiment.folder, "DepthControl.csv"))
+    count = min(len(sensor), len(control))
+    differs = np.nonzero(sensor[:count] != control[:count])[0]
+    return float(sensor_times[differs[0]]) if len(differs) else None
+
+
+class DatasetResult:
+    """
+    When the fault of a dataset started and when the replay switched away from the sensor.
+    A replay that raised has the error instead, it is neither a switch nor a missed fault.
+    """
+
+    def __init__(self, name: str, fault_time: float | None, switch_time: float | None, error: str = ""):
+        self.name = name
+        self.fault_time = fault_time
+        self.switch_time = switch_time
+        self.error = error
+
+    @property
+    def failed(self) -> bool:
+        "Did the replay raise an error"
+        return self.error != ""
+
+    @property
+    def false_switch(self) -> bool:
+        "Did the replay switch before the sensor failed"
+        return self.switch_time is not None and (self.fault_time is None or self.switch_time < self.fault_time)
+
+    @property
+    def detected(self) -> bool:
+        "Did the replay switch after the sensor failed"
+        return self.fault_time is not None and self.switch_time is not None and not self.false_switch
+
+    @property
+    def missed(self) -> bool:
+        "Did the sensor fail without the replay switching"
+        return self.fault_time is not None and self.switch_time is None and not self.failed
+
+    @property
+    def latency(self) -> float | None:
+        "Seconds from the sensor failing until the replay switched"
+        return self.switch_time - self.fault_time if self.detected else None
+
+    def to_json(self) -> dict:
+        "The result as stored in the cache"
+        return {"name": self.name, "fault_time": self.fault_time, "switch_time": self.switch_time}
+
+
+class SweepResult:
+    """The results of replaying every experiment with a configuration"""
+
+    def __init__(self, parameters: Dict[str, float], results: List[DatasetResult]):
+        self.parameters = parameters
+        self.results = results
+
+    @property
+    def failed(self) -> int:
+        "The number of replays that raised an error"
+        return sum(result.failed for result in self.results)
+
+    @property
+    def detected(self) -> int:
+        "The number of faults that were detected"
+        return sum(result.detected for result in self.results)
+
+    @property
+    def missed(self) -> int:
+        "The number of faults that were not detected"
+        return sum(result.missed for result in self.results)
+
+    @property
+    def false_switches(self) -> int:
+        "The number of switches before the sensor failed"
+        return sum(result.false_switch for result in self.results)
+
+    @property
+    def latencies(self) -> List[float]:
+        "The detection latency of every detected fault"
+        return [result.latency for result in self.results if result.latency is not None]
+
+    def rank_key(self) -> tuple:
+        "Fewest failed replays, then fewest false switches, then fewest missed faults, then the lowest mean latency"
+        latencies = self.latencies
+        return (self.failed, self.false_switches, self.missed, np.mean(latencies) if latencies else float("inf"))
+
+    def row(self, rank: int) -> list:
+        """The result as a row in the result table"""
+        latencies = self.latencies
+        return [
+            rank,
+            " ".join(f"{name}={value:g}" for name, value in self.parameters.items()) or "defaults",
+            len(self.results),
+            self.failed,
+            self.detected,
+            self.missed,
+            self.false_switches,
+            f"{np.mean(latencies):.1f}" if latencies else "",
+            f"{max(latencies):.1f}" if latencies else "",
+            "; ".join(f"{result.name}: {result.error}" for result in self.results if result.failed),
+        ]
+
+
+class SweepCache:
+    """Results of replaying an experiment with a configuration, stored as a json file per result"""
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def key(self, parameters: Dict[str, float], dataset_checksum: str, duration: int) -> str:
+        "The cache key of a configuration and a dataset, it changes when the source code changes"
+        return value_checksum([config_checksum(make_config(parameters)), dataset_checksum, duration, source_checksum()])
+
+    def get(self, key: str) -> DatasetResult | None:
+        "The cached result, None if it is not cached"
+        try:
+            with open(os.path.join(self.folder, f"{key}.json"), "r", -1, "UTF-8") as file:
+                return DatasetResult(**json.load(file))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def put(self, key: str, result: DatasetResult) -> None:
+        "Caches a result"
+        path = os.path.join(self.folder, f"{key}.json")
+        with open(path + ".tmp", "w", -1, "UTF-8") as file:
+            json.dump(result.to_json(), file)
+        os.replace(path + ".tmp", path)
+
+
+def run_dataset(parameters: Dict[str, float], experiment: Experiment, duration: int) -> DatasetResult:
+    """Replays an experiment with a configuration, nothing is written or plotted"""
+    rain = ArtificialVariableRain(START, save_rain_data(os.path.join(experiment.folder, "Rain.csv")))
+    replay = Replay(START, make_config(parameters), rain, os.path.join(experiment.folder, "DepthSensor.csv"))
+    result = replay.run(duration)
+    switch_time = result.change_array[0][1] if result.change_array else None
+    return DatasetResult(experiment.name, fault_onset(experiment), switch_time)
+
+
+def run_sweep(
+    configurations: List[Dict[str, float]],
+    experiments: List[Experiment],
+    duration: int,
+    cache_dir: str,
+    jobs: int | None = None,
+) -> List[SweepResult]:
+    """
+    Replays every experiment with every configuration in a pool of jobs processes.
+    Cached results are reused. A replay that raises is recorded as failed and the sweep goes on.
+    Returns the results ranked from best to worst.
+    """
+    cache = SweepCache(cache_dir)
+    checksums = [
+        files_checksum(os.path.join(experiment.folder, file) for file in EXPERIMENT_FILES) for experiment in experiments
+    ]
+
+    results: Dict[Tuple[int, int], DatasetResult] = {}
+    missing = []
+    for c, parameters in enumerate(configurations):
+        for e, checksum in enumerate(checksums):
+            key = cache.key(parameters, checksum, duration)
+            cached = cache.get(key)
+            if cached is None:
+                missing.append((c, e, key))
+            else:
+                results[c, e] = cached
+
+    if missing:
+        with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+            futures = [
+                (c, e, key, pool.submit(run_dataset, configurations[c], experiments[e], duration))
+                for c, e, key in missing
+            ]
+            for c, e, key, future in futures:
+                try:
+                    results[c, e] = future.result()
+                except Exception as error:  # pylint: disable=broad-exception-caught
+                    # A failed replay is not cached, so it is run again by the next sweep
+                    results[c, e] = DatasetResult(experiments[e].name, None, None, repr(error))
+                    continue
+                cache.put(key, results[c, e])
+
+    sweep = [
+        SweepResult(parameters, [results[c, e] for e in range(len(experiments))])
+        for c, parameters in enumerate(configurations)
+    ]
+    return sorted(sweep, key=SweepResult.rank_key)
+
+
+def write_results(results: List[SweepResult], file: str) -> None:
+    """Writes the ranked results as a csv table"""
+    with open(file, "w", -1, "UTF-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(RESULT_HEADER)
+        writer.writerows(result.row(rank) for rank, result in enumerate(results, 1))
+
+
+def format_results(results: List[SweepResult]) -> str:
+    """Formats the ranked results as a table for the terminal"""
+    return format_table(RESULT_HEADER, [result.row(rank) for rank, result in enumerate(results, 1)])
@@ -1,20 +1,138 @@
 "THIS FILE CONTAINS A CLASS THAT KEEPS TRACK OF TIME IN THE SYSTEM"
+from abc import abstractmethod
 from datetime import timedelta, datetime
+import asyncio
+import time
+import pause
+
+
+class Clock:
+    """
+    Decides how fast time passes compared to the wall clock.
+    A run waits for its time steps on the clock, and timestamps its logs with the time of the clock.
+    """
+
+    def __init__(self, start: datetime | None = None):
+        self._start = start or datetime.now()
+        self._origin = self.monotonic()
+
+    @abstractmethod
+    def monotonic(self) -> float:
+        "Seconds of clock time since an arbitrary point, it never goes back"
+
+    @abstractmethod
+    def wall_seconds(self, seconds: float) -> float:
+        "How many seconds of wall clock time pass while seconds of clock time pass"
+
+    def advance(self, seconds: float) -> None:
+        "Moves the time of a clock that does not follow the wall clock forward"
+
+    def now(self) -> datetime:
+        "The current timestamp of the clock"
+        return self._start + timedelta(seconds=self.monotonic() - self._origin)
+
+    def sleep(self, seconds: float) -> None:
+        "Waits until seconds of clock time have passed"
+        if seconds > 0:
+            time.sleep(self.wall_seconds(seconds))
+            self.advance(seconds)
+
+    async def sleep_async(self, seconds: float) -> None:
+        "Waits until seconds of clock time have passed without blocking the event loop"
+        if seconds > 0:
+            await asyncio.sleep(self.wall_seconds(seconds))
+            self.advance(seconds)
+
+    def wait_until(self, timestamp: datetime) -> None:
+        "Waits until the clock reaches timestamp"
+        self.sleep((timestamp - self.now()).total_seconds())
+
+
+class RealtimeClock(Clock):
+    "Time passes as the wall clock"
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def wall_seconds(self, seconds: float) -> float:
+        return seconds
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def wait_until(self, timestamp: datetime) -> None:
+        pause.until(timestamp)
+
+
+class ScaledClock(Clock):
+    "Time passes factor times faster than the wall clock"
+
+    def __init__(self, factor: float, start: datetime | None = None):
+        if factor <= 0:
+            raise ValueError(f"The factor of a clock must be positive, not {factor}")
+        self.factor = factor
+        super().__init__(start)
+
+    def monotonic(self) -> float:
+        return time.monotonic() * self.factor
+
+    def wall_seconds(self, seconds: float) -> float:
+        return seconds / self.factor
+
+
+class FastClock(Clock):
+    "Time only passes when it is waited for, and waiting takes no time"
+
+    def __init__(self, start: datetime | None = None):
+        self._time = 0.0
+        super().__init__(start)
+
+    def monotonic(self) -> float:
+        return self._time
+
+    def wall_seconds(self, seconds: float) -> float:
+        return 0.0
+
+    def advance(self, seconds: float) -> None:
+        self._time += seconds
+
+
+def parse_clock(value: str, start: datetime | None = None) -> Clock:
+    "Creates a clock from 'realtime', 'scaled:<factor>' or 'fast'"
+    policy, _, factor = value.partition(":")
+    match policy:
+        case "realtime" if not factor:
+            return RealtimeClock(start)
+        case "scaled" if factor:
+            return ScaledClock(float(factor), start)
+        case "fast" if not factor:
+            return FastClock(start)
+    raise ValueError(f"{value} is not a valid clock")
 
 
 class Time:
     "This class contains the time delta between readings and the current time of the system."
 
-    def __init__(self, start: datetime, current_time: timedelta, delta: timedelta):
+    def __init__(self, start: datetime, current_time: timedelta, delta: timedelta, clock: Clock | None = None):
         "Constructor for the time class."
         self._current_time = current_time
         self._delta = delta
         self._start = start
+        self._clock = clock or RealtimeClock(start)
 
     def step(self):
         """step time"""
         self._current_time += self._delta
 
+    def wait(self):
+        """wait on the clock until the current time is reached"""
+        self._clock.wait_until(self.get_current_datetime)
+
+    @property
+    def get_clock(self) -> Clock:
+        "Getter method for the clock that the time is waited for on."
+        return self._clock
+
     @property
     def get_current_time(self) -> timedelta:
         "Getter method for current_time variable."
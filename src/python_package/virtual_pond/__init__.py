@@ -1,9 +1,29 @@
 """Virtual pond module"""
 
 import math
-from typing import Self
+from typing import List, Self
 from python_package.rain import Rain, area
 from python_package.time import Time
+from .integrator import EulerIntegrator, Integrator
+
+
+def orifice_diameter(orifice_state: str) -> float:
+    """
+    The diameter in cm of the orifice state "max", "med" or "min", defaults to max
+    """
+
+    # orifice_max = 17.5
+    orifice_max = 75
+
+    match orifice_state:
+        case "max":
+            return orifice_max
+        case "med":
+            return orifice_max * (4 / 7)
+        case "min":
+            return orifice_max * (1 / 7)
+        case _:
+            return orifice_max
 
 
 class PondData:
@@ -30,6 +50,7 @@ class VirtualPond:
         water_level_max_cm: float,
         time: Time,
         rain_data_mm: Rain,
+        integrator: Integrator | None = None,
     ):
         self.urban_catchment_area = urban_catchment_area_ha
         self.surface_reaction_factor = surface_reaction_factor
@@ -41,6 +62,8 @@ class VirtualPond:
         self.rain_data = rain_data_mm
         self.time = time
         self.orifice = 75
+        self.integrator = integrator or EulerIntegrator()
+        self._rain_area = area.EmptyArea(urban_catchment_area_ha * 10000)
 
     def __eq__(self, other: Self):
         """
@@ -90,37 +113,31 @@ class VirtualPond:
         Genereate the virtual value of expected water level.
         Returns height in cm, overflow bool, volume_in avrage and volume_out avrage.
         """
-        volume_in_avg = 0
-        volume_out_avg = 0
-
         delta = int(self.time.get_delta.total_seconds())
-        for x in range(delta):
-            water_volume, volume_in, volume_out = self.calculate_water_volume()
-
-            volume_in_avg = volume_in_avg + volume_in
-            volume_out_avg = volume_out_avg + volume_out
-
-            overflow = False
-
-            height_cm = (water_volume / self.pond_area) * 100
-
-            height_cm = max(height_cm, 0)
+        height_cm, overflow, volume_in_avg, volume_out_avg = self.integrator.integrate(
+            self, self.get_rain_data(), delta
+        )
+        self.water_level = height_cm
 
-            if height_cm > self.water_level_max:
-                overflow = True
-                height_cm = self.water_level_max
-            elif height_cm <= self.water_level_min:
-                height_cm = self.water_level_min
+        return PondData(height_cm, overflow, volume_in_avg, volume_out_avg)
 
+    def simulate(self, steps: int) -> List[PondData]:
+        """
+        Generates the virtual sensor readings of the next steps time steps and steps the time.
+        The rain of all the steps is read in a single call.
+        """
+        delta = self.time.get_delta
+        start = self.time.get_current_datetime
+        starts = [start + delta * i for i in range(steps)]
+        rain = self.rain_data.get_rain_falls(self._get_rain_area(), starts, [s + delta for s in starts]).tolist()
+
+        seconds = int(delta.total_seconds())
+        pond_data = []
+        for rain_mm in rain:
+            height_cm, overflow, volume_in_avg, volume_out_avg = self.integrator.integrate(self, rain_mm, seconds)
             self.water_level = height_cm
-
-            x = x + 1
-
-        volume_in_avg = volume_in_avg / delta
-        volume_out_avg = volume_out_avg / delta
-
-        pond_data = PondData(height_cm, overflow, volume_in_avg, volume_out_avg)
-
+            pond_data.append(PondData(height_cm, overflow, volume_in_avg, volume_out_avg))
+            self.time.step()
         return pond_data
 
     def water_in(self, k: float, s: float, a_uc: float) -> float:
@@ -168,20 +185,7 @@ class VirtualPond:
         Choose orifice, set defualt to max
         Return orifice diameter in cm
         """
-
-        # orifice_max = 17.5
-        orifice_max = 75
-
-        match orifice_state:
-            case "max":
-                self.orifice = orifice_max
-            case "med":
-                self.orifice = orifice_max * (4 / 7)
-            case "min":
-                self.orifice = orifice_max * (1 / 7)
-            case _:
-                self.orifice = orifice_max
-
+        self.orifice = orifice_diameter(orifice_state)
         return self.orifice
 
     def get_rain_data(self) -> float:
@@ -191,9 +195,15 @@ class VirtualPond:
         """
 
         rain_mm = self.rain_data.get_rain_fall(
-            area.EmptyArea(self.urban_catchment_area * 10000),
+            self._get_rain_area(),
             start_time=self.time.get_current_datetime,
             end_time=self.time.get_current_datetime_delta,
         )
 
         return rain_mm
+
+    def _get_rain_area(self) -> area.EmptyArea:
+        "The area the rain falls on, it is only recreated if the catchment area changes"
+        if self._rain_area.area != self.urban_catchment_area * 10000:
+            self._rain_area = area.EmptyArea(self.urban_catchment_area * 10000)
+        return self._rain_area
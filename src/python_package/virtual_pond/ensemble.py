@@ -0,0 +1,141 @@
+"""
+Contains an ensemble of virtual ponds that are stepped together as arrays
+"""
+
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from python_package.rain import Rain, area
+from python_package.time import Time
+from . import PondData, VirtualPond, orifice_diameter
+from .integrator import euler_steps, outflow_coefficient
+
+
+class VirtualPondEnsemble:
+    """
+    Many virtual ponds with their parameters and water levels stored in arrays.
+    Every pond has its own parameters and rain source, the ponds share the time.
+    The ponds are stepped with the same arithmetic as the EulerIntegrator of a single VirtualPond,
+    and the rain is read once per rain source and catchment area instead of once per pond.
+    """
+
+    def __init__(
+        self,
+        urban_catchment_area_ha: Sequence[float],
+        surface_reaction_factor: Sequence[float],
+        discharge_coeficent: Sequence[float],
+        pond_area_m2: Sequence[float],
+        water_level_cm: Sequence[float],
+        water_level_min_cm: Sequence[float],
+        water_level_max_cm: Sequence[float],
+        time: Time,
+        rain_data_mm: Sequence[Rain],
+    ):
+        "Creates an ensemble, every parameter has a value per pond or a single value shared by all ponds"
+        count = len(rain_data_mm)
+
+        def per_pond(values) -> np.ndarray:
+            return np.broadcast_to(np.asarray(values, dtype=np.float64), (count,)).copy()
+
+        self.urban_catchment_area = per_pond(urban_catchment_area_ha)
+        self.surface_reaction_factor = per_pond(surface_reaction_factor)
+        self.discharge_coeficent = per_pond(discharge_coeficent)
+        self.pond_area = per_pond(pond_area_m2)
+        self.water_level = per_pond(water_level_cm)
+        self.water_level_min = per_pond(water_level_min_cm)
+        self.water_level_max = per_pond(water_level_max_cm)
+        self.orifice = per_pond(75)
+        self.rain_data = list(rain_data_mm)
+        self.time = time
+
+    @staticmethod
+    def from_ponds(ponds: Sequence[VirtualPond], time: Time) -> "VirtualPondEnsemble":
+        "Creates an ensemble with the parameters, water levels and orifices of the ponds"
+        ensemble = VirtualPondEnsemble(
+            [p.urban_catchment_area for p in ponds],
+            [p.surface_reaction_factor for p in ponds],
+            [p.discharge_coeficent for p in ponds],
+            [p.pond_area for p in ponds],
+            [p.water_level for p in ponds],
+            [p.water_level_min for p in ponds],
+            [p.water_level_max for p in ponds],
+            time,
+            [p.rain_data for p in ponds],
+        )
+        ensemble.orifice[:] = [p.orifice for p in ponds]
+        return ensemble
+
+    def __len__(self) -> int:
+        return len(self.rain_data)
+
+    def set_orifice(self, orifice_state: str | Sequence[str]) -> np.ndarray:
+        """
+        Choose orifice of every pond, a single state is used for all ponds
+        Return orifice diameters in cm
+        """
+        if isinstance(orifice_state, str):
+            self.orifice[:] = orifice_diameter(orifice_state)
+        else:
+            self.orifice[:] = [orifice_diameter(state) for state in orifice_state]
+        return self.orifice
+
+    def _rain_groups(self) -> Dict[Tuple[int, float], List[int]]:
+        "The ponds grouped by rain source and catchment area, the rain is the same for every pond in a group"
+        groups: Dict[Tuple[int, float], List[int]] = {}
+        for i, (rain, catchment) in enumerate(zip(self.rain_data, self.urban_catchment_area.tolist())):
+            groups.setdefault((id(rain), catchment), []).append(i)
+        return groups
+
+    def get_rain_data(self, steps: int = 1) -> np.ndarray:
+        """
+        Get weather forcast of the next steps time steps for every pond.
+        Returns mm as an array with a row per step and a column per pond.
+        """
+        delta = self.time.get_delta
+        starts = [self.time.get_current_datetime + delta * i for i in range(steps)]
+        ends = [start + delta for start in starts]
+
+        rain_mm = np.zeros((steps, len(self)))
+        for (_, catchment), ponds in self._rain_groups().items():
+            rain = self.rain_data[ponds[0]].get_rain_falls(area.EmptyArea(catchment * 10000), starts, ends)
+            rain_mm[:, ponds] = np.asarray(rain, dtype=np.float64)[:, np.newaxis]
+        return rain_mm
+
+    def _step(self, rain_mm: np.ndarray) -> PondData:
+        "Steps every pond over a time step with the rain of every pond"
+        # Same arithmetic as VirtualPond.water_in
+        volume_in = self.surface_reaction_factor * (rain_mm / 1000) * (self.urban_catchment_area * 10000)
+        height, overflow, volume_in_avg, volume_out_avg = euler_steps(
+            self.water_level,
+            volume_in,
+            outflow_coefficient(self.discharge_coeficent, self.orifice),
+            self.pond_area,
+            self.water_level_min,
+            self.water_level_max,
+            int(self.time.get_delta.total_seconds()),
+        )
+        self.water_level = height
+        return PondData(height, overflow, volume_in_avg, volume_out_avg)
+
+    def generate_virtual_sensor_reading(self) -> PondData:
+        """
+        Genereate the virtual water level of every pond for the current time step.
+        Returns a PondData where every field is an array with a value per pond.
+        """
+        return self._step(self.get_rain_data()[0])
+
+    def simulate(self, steps: int) -> PondData:
+        """
+        Generates the virtual sensor readings of the next steps time steps and steps the time.
+        Returns a PondData where every field is an array with a row per step and a column per pond.
+        """
+        rain_mm = self.get_rain_data(steps)
+        pond_data = []
+        for step_rain in rain_mm:
+            pond_data.append(self._step(step_rain))
+            self.time.step()
+        return PondData(
+            np.array([data.height for data in pond_data]).reshape(steps, len(self)),
+            np.array([data.overflow for data in pond_data], dtype=bool).reshape(steps, len(self)),
+            np.array([data.volume_in for data in pond_data]).reshape(steps, len(self)),
+            np.array([data.volume_out for data in pond_data]).reshape(steps, len(self)),
+        )
@@ -0,0 +1,182 @@
+"""
+Contains integrators for stepping the water level of virtual ponds.
+The rain is constant within a step, so an integrator only depends on the water level of the pond.
+"""
+
+from abc import abstractmethod
+from typing import TYPE_CHECKING, List, Sequence, Tuple
+import math
+import numpy as np
+
+if TYPE_CHECKING:
+    from . import VirtualPond
+
+GRAVITY = 9.81
+
+# height, overflow, volume_in average, volume_out average
+StepResult = Tuple[float, bool, float, float]
+
+
+def outflow_coefficient(discharge_coeficent, orifice):
+    """
+    The part of the orifice outflow that does not depend on the water level,
+    water_out is this coefficient times sqrt(2gw)
+    """
+    return discharge_coeficent * (math.pi / 4) * np.power(np.divide(orifice, 100), 2)
+
+
+def euler_steps(
+    level, volume_in, coefficient, pond_area, level_min, level_max, seconds: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Steps the water level of many ponds one second at a time with the same arithmetic as VirtualPond.
+    The arguments are arrays with a value per pond, or scalars shared by all ponds.
+    Returns the height, overflow, volume_in average and volume_out average of every pond.
+    """
+    level = np.array(level, dtype=np.float64)
+    min_volume = np.multiply(pond_area, np.divide(level_min, 100))
+    volume_in_sum = np.zeros_like(level)
+    volume_out_sum = np.zeros_like(level)
+    overflow = np.zeros(level.shape, dtype=bool)
+    for _ in range(seconds):
+        volume_out = coefficient * np.sqrt(2 * GRAVITY * (level / 100))
+        water_volume = np.maximum(pond_area * (level / 100) + (volume_in - volume_out), min_volume)
+        volume_in_sum += volume_in
+        volume_out_sum += volume_out
+
+        height = np.maximum((water_volume / pond_area) * 100, 0)
+        overflow = height > level_max
+        level = np.clip(height, level_min, level_max)
+    return level, overflow, volume_in_sum / seconds, volume_out_sum / seconds
+
+
+class Integrator:
+    "An abstract class for integrating the water level of a pond over a time step"
+
+    @abstractmethod
+    def integrate(self, pond: "VirtualPond", rain_mm: float, seconds: int) -> StepResult:
+        """
+        Integrates the water level of the pond over seconds of constant rain,
+        returns the height, overflow, volume_in average and volume_out average
+        """
+
+
+class EulerIntegrator(Integrator):
+    """
+    Explicit Euler with one second steps, this is the model the virtual pond has always used.
+    The height is clamped to the minimum and maximum water level after every step.
+    """
+
+    def integrate(self, pond: "VirtualPond", rain_mm: float, seconds: int) -> StepResult:
+        if seconds <= 0:
+            raise ValueError("A step must be at least one second")
+
+        volume_in = pond.water_in(pond.surface_reaction_factor, rain_mm, pond.urban_catchment_area)
+        coefficient = pond.discharge_coeficent * (math.pi / 4) * math.pow(pond.orifice / 100, 2)
+        pond_area = pond.pond_area
+        level_min = pond.water_level_min
+        level_max = pond.water_level_max
+        min_water_volume = pond_area * (level_min / 100)
+
+        level = pond.water_level
+        volume_in_sum = 0
+        volume_out_sum = 0
+        overflow = False
+        for _ in range(seconds):
+            volume_out = coefficient * math.sqrt(2 * GRAVITY * (level / 100))
+            water_volume = max(pond_area * (level / 100) + (volume_in - volume_out), min_water_volume)
+            volume_in_sum = volume_in_sum + volume_in
+            volume_out_sum = volume_out_sum + volume_out
+
+            height = max((water_volume / pond_area) * 100, 0)
+            overflow = height > level_max
+            if overflow:
+                height = level_max
+            elif height <= level_min:
+                height = level_min
+            level = height
+
+        return level, overflow, volume_in_sum / seconds, volume_out_sum / seconds
+
+
+class AdaptiveIntegrator(Integrator):
+    """
+    Solves the continuous pond model with an adaptive Heun scheme.
+    The step length is chosen so the estimated error of a step is below tolerance cm,
+    so calm periods are covered in a few long steps. The result approximates the continuous
+    model, it is not identical to the one second Euler steps.
+    """
+
+    def __init__(self, tolerance: float = 1e-4, min_step: float = 1e-3):
+        self.tolerance = tolerance
+        self.min_step = min_step
+
+    def integrate(self, pond: "VirtualPond", rain_mm: float, seconds: int) -> StepResult:
+        if seconds <= 0:
+            raise ValueError("A step must be at least one second")
+
+        volume_in = pond.water_in(pond.surface_reaction_factor, rain_mm, pond.urban_catchment_area)
+        coefficient = pond.discharge_coeficent * (math.pi / 4) * math.pow(pond.orifice / 100, 2)
+        level_min = pond.water_level_min
+        level_max = pond.water_level_max
+
+        def outflow(level: float) -> float:
+            return coefficient * math.sqrt(2 * GRAVITY * (max(level, 0) / 100))
+
+        def slope(level: float) -> float:
+            "Change of the water level in cm per second"
+            return (volume_in - outflow(level)) / pond.pond_area * 100
+
+        level = pond.water_level
+        elapsed = 0.0
+        step = float(seconds)
+        volume_out_sum = 0.0
+        overflow = False
+        while elapsed < seconds:
+            step = min(step, seconds - elapsed)
+            first = slope(level)
+            euler = level + step * first
+            heun = level + step * (first + slope(euler)) / 2
+            error = abs(heun - euler)
+            if error > self.tolerance and step > self.min_step:
+                step = max(step * max(0.2, 0.9 * math.sqrt(self.tolerance / error)), self.min_step)
+                continue
+
+            volume_out_sum += step * (outflow(level) + outflow(heun)) / 2
+            overflow = heun > level_max
+            level = min(max(heun, level_min), level_max)
+            elapsed += step
+            step *= 4 if error == 0 else min(4, 0.9 * math.sqrt(self.tolerance / error))
+
+        return level, overflow, volume_in, volume_out_sum / seconds
+
+
+class BatchedIntegrator(Integrator):
+    """
+    Steps the water level with NumPy using the same arithmetic as the EulerIntegrator.
+    A single pond is faster with the EulerIntegrator, integrate_many steps many ponds in one call.
+    """
+
+    def integrate(self, pond: "VirtualPond", rain_mm: float, seconds: int) -> StepResult:
+        return self.integrate_many([pond], [rain_mm], seconds)[0]
+
+    def integrate_many(
+        self, ponds: Sequence["VirtualPond"], rain_mm: Sequence[float], seconds: int
+    ) -> List[StepResult]:
+        "Integrates every pond over seconds of constant rain, the ponds are not updated"
+        if seconds <= 0:
+            raise ValueError("A step must be at least one second")
+
+        volume_in = np.array(
+            [p.water_in(p.surface_reaction_factor, r, p.urban_catchment_area) for p, r in zip(ponds, rain_mm)]
+        )
+        height, overflow, volume_in_avg, volume_out_avg = euler_steps(
+            [p.water_level for p in ponds],
+            volume_in,
+            outflow_coefficient(np.array([p.discharge_coeficent for p in ponds]), np.array([p.orifice for p in ponds])),
+            np.array([p.pond_area for p in ponds], dtype=np.float64),
+            np.array([p.water_level_min for p in ponds], dtype=np.float64),
+            np.array([p.water_level_max for p in ponds], dtype=np.float64),
+            seconds,
+        )
+        return list(zip(height.tolist(), overflow.tolist(), volume_in_avg.tolist(), volume_out_avg.tolist()))
@@ -0,0 +1,72 @@
+"RUNS ALL EXPERIMENTS IN PARALLEL"
+
+import os
+import sys
+import time
+from python_package.runner import discover_experiments, format_summary, run_experiments, write_summary
+
+SOURCE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATA = os.path.join(SOURCE, "experiment_data")
+DEFAULT_OUT = os.path.join(SOURCE, "experiment_data_results")
+DEFAULT_TIME = 7000
+
+HELP = f"""USAGE python src/run_all.py ([ARGUMENT]=[VALUE])*
+    [-d  | --data]=/path/to/folder           -- Folder containing the experiments as <experiment_name>/<dataset>
+                                                or <experiment_name>
+                                                (default={DEFAULT_DATA})
+    [-o  | --output]=/path/to/folder         -- Folder the results are saved to
+                                                (default={DEFAULT_OUT})
+    [-j  | --jobs]=number                    -- Number of worker processes
+                                                (default=number of cores)
+    [-t  | --time]=time                      -- For how long should each experiment run in seconds.
+                                                (default={DEFAULT_TIME})
+    [-s  | --summary]=/path/to/file          -- The csv file the summary of the runs is saved to
+                                                (default=<output>/summary.csv)
+    [-c  | --cache]=/path/to/folder          -- Folder where results are cached, experiments whose inputs,
+                                                arguments and code are unchanged reuse the cached result.
+                                                "none" disables the cache
+                                                (default=<output>/result-cache)
+    """
+
+
+if __name__ == "__main__":
+    data, out, jobs, duration, summary, cache = DEFAULT_DATA, DEFAULT_OUT, None, DEFAULT_TIME, None, ""
+    try:
+        for arg in sys.argv[1:]:
+            if arg in ("-h", "--help"):
+                print(HELP)
+                sys.exit(0)
+
+            cmd_argument, value = arg.split("=")
+            match cmd_argument:
+                case "-d" | "--data":
+                    data = value
+                case "-o" | "--output":
+                    out = value
+                case "-j" | "--jobs":
+                    jobs = int(value)
+                case "-t" | "--time":
+                    duration = int(value)
+                case "-s" | "--summary":
+                    summary = value
+                case "-c" | "--cache":
+                    cache = value
+                case _:
+                    raise ValueError(f"{cmd_argument} is not a valid argument")
+    except ValueError as e:
+        print(e)
+        print("\n" + HELP)
+        sys.exit(1)
+
+    experiments = discover_experiments(data)
+    print(f"Running {len(experiments)} experiments")
+    begin = time.perf_counter()
+    if cache == "":
+        cache = os.path.join(out, "result-cache")
+    results = run_experiments(experiments, out, duration, jobs, None if cache == "none" else cache)
+    write_summary(results, summary or os.path.join(out, "summary.csv"))
+
+    print(format_summary(results))
+    failed = sum(result.status == "failed" for result in results)
+    print(f"Ran {len(results)} experiments in {time.perf_counter() - begin:.2f} seconds, {failed} failed")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,88 @@
+"SWEEPS THE POND AND KALMAN BANK PARAMETERS OVER ALL EXPERIMENTS"
+
+import os
+import sys
+import time
+from python_package.runner import discover_experiments
+from python_package.sweep import PARAMETERS, format_results, grid, sample, run_sweep, write_results
+
+SOURCE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATA = os.path.join(SOURCE, "experiment_data")
+DEFAULT_OUT = os.path.join(SOURCE, "experiment_data_results", "sweep")
+DEFAULT_TIME = 7000
+
+HELP = f"""USAGE python src/sweep.py ([ARGUMENT]=[VALUE])*
+    [-g  | --grid]=name:value,value,...      -- Sweep the parameter over the values, every combination of the
+                                                grid parameters is run. Can be given multiple times
+    [-r  | --range]=name:low:high            -- Draw the parameter uniformly from the range for every sample.
+                                                Can be given multiple times
+    [-n  | --samples]=number                 -- Number of random samples drawn from the ranges, each sample is
+                                                combined with every grid combination (default=10)
+    [--seed]=number                          -- Seed of the random samples
+    [-d  | --data]=/path/to/folder           -- Folder containing the experiments as <experiment_name>/<dataset>
+                                                or <experiment_name>
+                                                (default={DEFAULT_DATA})
+    [-o  | --output]=/path/to/folder         -- Folder the result table and the cache are saved to
+                                                (default={DEFAULT_OUT})
+    [-j  | --jobs]=number                    -- Number of worker processes
+                                                (default=number of cores)
+    [-t  | --time]=time                      -- For how long should each experiment run in seconds.
+                                                (default={DEFAULT_TIME})
+
+    The parameters are {", ".join(PARAMETERS)},
+    fault_<i> is the value of the i'th fault of the kalman bank.
+    """
+
+
+if __name__ == "__main__":
+    data, out, jobs, duration, samples, seed = DEFAULT_DATA, DEFAULT_OUT, None, DEFAULT_TIME, 10, None
+    grid_values: dict = {}
+    ranges: dict = {}
+    try:
+        for arg in sys.argv[1:]:
+            if arg in ("-h", "--help"):
+                print(HELP)
+                sys.exit(0)
+
+            cmd_argument, value = arg.split("=", 1)
+            match cmd_argument:
+                case "-g" | "--grid":
+                    name, values = value.split(":")
+                    grid_values[name] = [float(x) for x in values.split(",")]
+                case "-r" | "--range":
+                    name, low, high = value.split(":")
+                    ranges[name] = (float(low), float(high))
+                case "-n" | "--samples":
+                    samples = int(value)
+                case "--seed":
+                    seed = int(value)
+                case "-d" | "--data":
+                    data = value
+                case "-o" | "--output":
+                    out = value
+                case "-j" | "--jobs":
+                    jobs = int(value)
+                case "-t" | "--time":
+                    duration = int(value)
+                case _:
+                    raise ValueError(f"{cmd_argument} is not a valid argument")
+            for name in list(grid_values) + list(ranges):
+                if name not in PARAMETERS:
+                    raise ValueError(f"{name} is not a parameter that can be swept")
+    except ValueError as e:
+        print(e)
+        print("\n" + HELP)
+        sys.exit(1)
+
+    configurations = grid(grid_values)
+    if ranges:
+        configurations = [g | s for s in sample(ranges, samples, seed) for g in configurations]
+
+    experiments = discover_experiments(data)
+    print(f"Sweeping {len(configurations)} configurations over {len(experiments)} experiments")
+    begin = time.perf_counter()
+    results = run_sweep(configurations, experiments, duration, os.path.join(out, "cache"), jobs)
+    write_results(results, os.path.join(out, "sweep.csv"))
+
+    print(format_results(results))
+    print(f"Swept in {time.perf_counter() - begin:.2f} seconds")
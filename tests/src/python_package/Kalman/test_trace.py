@@ -0,0 +1,58 @@
+"""Testing of the binary kalman trace"""
+
+import numpy as np
+import pytest
+from python_package.kalman_filter.trace import (
+    BinaryTraceSink,
+    is_binary_trace,
+    read_trace,
+    trace_columns,
+    trace_to_csv,
+)
+
+
+def test_write_and_read_trace(tmp_path):
+    """Records written to the trace can be read back"""
+    path = str(tmp_path / "trace.bin")
+    rows = np.arange(3 * 15, dtype=np.float64).reshape(3, 15)
+    with BinaryTraceSink(path, 2, flush_size=2) as sink:
+        for row in rows.tolist():
+            sink.write_row(row)
+
+    assert is_binary_trace(path)
+    columns, records = read_trace(path)
+    assert columns == trace_columns(2)
+    assert columns[0] == "time_0" and columns[13] == "delta_1" and columns[14] == "measured"
+    assert np.array_equal(records, rows)
+
+
+def test_partial_record_is_ignored(tmp_path):
+    """A record that was only partially written is not read"""
+    path = str(tmp_path / "trace.bin")
+    with BinaryTraceSink(path, 1) as sink:
+        sink.write_rows(np.ones((2, 8)))
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 12)
+
+    _, records = read_trace(path)
+    assert records.shape == (2, 8)
+
+
+def test_wrong_column_count(tmp_path):
+    """Records must have a value for every column"""
+    with BinaryTraceSink(str(tmp_path / "trace.bin"), 1) as sink:
+        with pytest.raises(ValueError):
+            sink.write_rows(np.ones((2, 7)))
+
+
+def test_trace_to_csv(tmp_path):
+    """The csv export has the layout of the KalmanBank csv"""
+    path = str(tmp_path / "trace.bin")
+    csv_path = str(tmp_path / "trace.csv")
+    with BinaryTraceSink(path, 1) as sink:
+        sink.write_row([0.0, 0.1, 699.5, 699.5, 3.0, 3.1, 1.0, 699])
+
+    trace_to_csv(path, csv_path)
+    assert not is_binary_trace(csv_path)
+    with open(csv_path, encoding="utf-8") as f:
+        assert f.read() == "0.0,0.1,699.5,699.5,3.0,3.1,1.0,699.0\n"
@@ -0,0 +1,68 @@
+"""Testing of the vectorized kalman bank"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from python_package.kalman_filter.fault import ConstantFault, FaultType
+from python_package.kalman_filter.kalman import MeasurementData, PondState
+from python_package.kalman_filter.kalman_bank import KalmanBank, KalmanError
+from python_package.kalman_filter.vector_kalman_bank import VectorKalmanBank
+from python_package.time import Time
+
+FAULTS = [
+    ConstantFault(50.0, "higher", FaultType.ADD),
+    ConstantFault(50.0, "lower", FaultType.SUBTRACT),
+    ConstantFault(1.15, "higher", FaultType.MULTIPLY),
+    ConstantFault(0.85, "lower", FaultType.MULTIPLY),
+    ConstantFault(2.0, "lower", FaultType.DIVIDE),
+]
+
+
+def step(bank, time: Time, height: float, virtual_level: float) -> KalmanError | None:
+    """Steps the bank and returns the raised error"""
+    try:
+        bank.step_filters(PondState(q_in=1.5, q_out=0.5, ap=5572), MeasurementData(height, 3), virtual_level)
+    except KalmanError as e:
+        return e
+    finally:
+        time.step()
+    return None
+
+
+def test_vector_bank_matches_kalman_bank(tmp_path):
+    """The vector bank should produce the same states and errors as the list based bank"""
+    time_list = Time(start=datetime.now(), current_time=timedelta(seconds=0), delta=timedelta(seconds=11))
+    time_vector = Time(start=datetime.now(), current_time=timedelta(seconds=0), delta=timedelta(seconds=11))
+    list_bank = KalmanBank(FAULTS, 700, 100, time_list, 0.1, str(tmp_path / "list.csv"))
+    vector_bank = VectorKalmanBank(FAULTS, 700, 100, time_vector, 0.1, str(tmp_path / "vector.csv"))
+
+    assert len(vector_bank) == len(list_bank.get_kalman_bank)
+
+    for height in [699, 702.5, 698.0, 760, 640.0, 700.0, 1000.0, 10.0]:
+        assert step(list_bank, time_list, height, 700) == step(vector_bank, time_vector, height, 700)
+        assert vector_bank.get_state.tolist() == [k.get_state for k in list_bank.get_kalman_bank]
+        assert vector_bank.get_predicted_state.tolist() == [k.get_predicted_state for k in list_bank.get_kalman_bank]
+
+    list_bank.close()
+    vector_bank.close()
+    with open(tmp_path / "list.csv", encoding="utf-8") as list_file:
+        with open(tmp_path / "vector.csv", encoding="utf-8") as vector_file:
+            assert list_file.read() == vector_file.read()
+
+
+def test_vector_bank_requires_constant_faults(tmp_path):
+    """Faults given as functions can not be vectorized"""
+    time = Time(start=datetime.now(), current_time=timedelta(seconds=0), delta=timedelta(seconds=11))
+    with pytest.raises(ValueError):
+        VectorKalmanBank([object()], 700, 100, time, 0.1, str(tmp_path / "vector.csv"))  # type: ignore
+
+
+def test_vector_bank_add_faults(tmp_path):
+    """Adding the same fault twice does not create a new filter"""
+    time = Time(start=datetime.now(), current_time=timedelta(seconds=0), delta=timedelta(seconds=11))
+    bank = VectorKalmanBank(FAULTS[:2], 700, 100, time, 0.1, str(tmp_path / "vector.csv"))
+    assert len(bank) == 3
+
+    bank.add_faults(FAULTS)
+    assert len(bank) == len(FAULTS) + 1
+    assert len(bank.get_faults) == len(FAULTS)
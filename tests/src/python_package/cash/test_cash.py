@@ -0,0 +1,88 @@
+"""Testing of the file cache"""
+
+from datetime import datetime, timedelta
+
+from python_package.cash.cash import CacheData, FileCache
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def fill(cache: FileCache, count: int) -> None:
+    """Inserts count entries 10 seconds apart"""
+    for i in range(count):
+        cache.insert(CacheData(0, START + timedelta(seconds=10 * i), [f"msg {i}", i]))
+
+
+def test_get_by_id(tmp_path):
+    """Entries are found by the id they were given on insert"""
+    cache = FileCache(str(tmp_path / "log"))
+    fill(cache, 5)
+
+    data = cache.get(3)
+    assert data is not None
+    assert data.data_id == 3
+    assert data.time == START + timedelta(seconds=20)
+    assert data.data_list == ["msg 2", "2"]
+    assert cache.get(6) is None
+
+
+def test_get_nearest(tmp_path):
+    """Before is strictly before the time, after is at or after the time"""
+    cache = FileCache(str(tmp_path / "log"))
+    fill(cache, 5)
+
+    assert cache.get_nearest_before(START) is None
+    assert cache.get_nearest_before(START + timedelta(seconds=20)).data_id == 2
+    assert cache.get_nearest_after(START + timedelta(seconds=20)).data_id == 3
+    assert cache.get_nearest_after(START + timedelta(seconds=41)) is None
+    assert cache.get_nearest(START + timedelta(seconds=14)).data_id == 2
+    assert cache.get_nearest(START + timedelta(seconds=16)).data_id == 3
+
+
+def test_reopen(tmp_path):
+    """A reopened cache continues the ids of the file"""
+    file = str(tmp_path / "log")
+    fill(FileCache(file), 3)
+    cache = FileCache(file)
+    fill(cache, 1)
+
+    assert len(cache) == 4
+    assert cache.get(4).data_list == ["msg 0", "0"]
+    assert [data.data_id for data in cache] == [1, 2, 3, 4]
+
+
+def test_persisted_index(tmp_path):
+    """The sidecar index is reused and lines written without it are indexed when the cache is opened"""
+    file = str(tmp_path / "log")
+    fill(FileCache(file, persist_index=True), 3)
+    fill(FileCache(file), 2)
+
+    cache = FileCache(file, persist_index=True)
+    assert len(cache) == 5
+    assert cache.get_nearest_after(START + timedelta(seconds=15)).data_id == 3
+    assert cache.get_nearest_before(START + timedelta(seconds=15)).data_id == 5
+    with open(f"{file}.idx", encoding="utf-8") as f:
+        assert len(f.readlines()) == 5
+
+    with open(f"{file}.idx", "w", encoding="utf-8") as f:
+        f.write("garbage\n")
+    assert FileCache(file, persist_index=True).get(5).data_id == 5
+
+
+def test_iter_from(tmp_path):
+    """Iteration can start at an id or a timestamp and run in both directions"""
+    cache = FileCache(str(tmp_path / "log"))
+    assert not list(cache) and not cache.latest(3)
+    fill(cache, 5)
+    with open(cache.file_name, "a", encoding="utf-8") as f:
+        f.write("6#2024-01-01 12:00:50#partial")
+
+    assert [data.data_id for data in cache] == [1, 2, 3, 4, 5]
+    assert [data.data_id for data in cache.iter_from(data_id=3)] == [3, 4, 5]
+    assert [data.data_id for data in cache.iter_from(time=START + timedelta(seconds=15))] == [3, 4, 5]
+    assert [data.data_id for data in cache.iter_from(data_id=3, reverse=True)] == [3, 2, 1]
+    assert [data.data_id for data in cache.iter_from(time=START + timedelta(seconds=15), reverse=True)] == [2, 1]
+    assert not list(cache.iter_from(time=START + timedelta(seconds=45)))
+    assert not list(cache.iter_from(data_id=9, reverse=True))
+    assert [data.data_id for data in cache.latest(2)] == [5, 4]
+    assert cache.latest(1)[0].data_list == ["msg 4", "4"]
@@ -0,0 +1,54 @@
+"""Testing of the rotating cache"""
+
+from datetime import datetime, timedelta
+import os
+
+from python_package.cash.cash import CacheData
+from python_package.cash.rotating_cache import MANIFEST, RotatingFileCache
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def fill(cache: RotatingFileCache, minutes: list[int]) -> None:
+    """Inserts an entry at each of the minutes after START"""
+    for minute in minutes:
+        cache.insert(CacheData(0, START + timedelta(minutes=minute), [f"minute {minute}"]))
+
+
+def test_rotation(tmp_path):
+    """A segment is started for every hour and when a segment grows too large"""
+    cache = RotatingFileCache(str(tmp_path), segment_size=60)
+    fill(cache, [0, 10, 20, 30, 70, 130])
+
+    assert [segment.count for segment in cache.get_segments] == [2, 2, 1, 1]
+    assert [data.data_id for data in cache] == [1, 2, 3, 4, 5, 6]
+    assert cache.get(5).data_list == ["minute 70"]
+    assert cache.get(7) is None
+
+
+def test_queries(tmp_path):
+    """Lookups across segments return ids of the whole cache"""
+    cache = RotatingFileCache(str(tmp_path))
+    fill(cache, [0, 30, 70, 130, 150])
+
+    assert cache.get_nearest_before(START + timedelta(minutes=70)).data_id == 2
+    assert cache.get_nearest_after(START + timedelta(minutes=31)).data_id == 3
+    assert cache.get_nearest_after(START + timedelta(minutes=151)) is None
+    assert cache.get_nearest(START + timedelta(minutes=125)).data_id == 4
+    window = cache.query(START + timedelta(minutes=30), START + timedelta(minutes=150))
+    assert [data.data_id for data in window] == [2, 3, 4]
+    assert [data.data_id for data in cache.latest(3)] == [5, 4, 3]
+
+
+def test_retention_and_reopen(tmp_path):
+    """Old segments are deleted and a reopened cache continues from the manifest"""
+    cache = RotatingFileCache(str(tmp_path), max_segments=2)
+    fill(cache, [0, 60, 120, 121])
+
+    reopened = RotatingFileCache(str(tmp_path), max_segments=2)
+    assert len(reopened) == 3
+    assert reopened.get(1) is None
+    assert [data.data_id for data in reopened] == [2, 3, 4]
+    fill(reopened, [122])
+    assert reopened.get(5).data_list == ["minute 122"]
+    assert sorted(os.listdir(tmp_path)) == [MANIFEST] + [s.file for s in reopened.get_segments]
@@ -0,0 +1,26 @@
+"""Testing of the streaming csv readers"""
+
+import numpy as np
+from python_package.csv_stream import is_sorted, read_chunks, read_columns
+
+
+def test_read_chunks(tmp_path):
+    file = tmp_path / "data.csv"
+    file.write_text("0,1.5,9\n10,2\n\n20,3\n30,-4\n40,5\n", encoding="utf-8")
+    chunks = list(read_chunks(str(file), chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 1, 2]
+    assert np.array_equal(np.concatenate(chunks), [[0, 1.5], [10, 2], [20, 3], [30, -4], [40, 5]])
+
+
+def test_read_columns_of_empty_file(tmp_path):
+    file = tmp_path / "data.csv"
+    file.write_text("", encoding="utf-8")
+    assert not list(read_columns(str(file)))
+
+
+def test_is_sorted():
+    assert is_sorted(np.array([0, 10, 10, 20]))
+    assert is_sorted(np.array([10, 20]), previous=10)
+    assert not is_sorted(np.array([10, 20]), previous=15)
+    assert not is_sorted(np.array([20, 10]))
+    assert is_sorted(np.array([]), previous=15)
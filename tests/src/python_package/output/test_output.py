@@ -0,0 +1,58 @@
+"""Testing of the output sink"""
+
+import io
+
+import pytest
+from python_package.output import OutputSink, Sink, close_all
+
+
+def read(path) -> str:
+    """Reads a file"""
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_rows_are_buffered(tmp_path):
+    """Rows are only written once flush_size rows are buffered"""
+    path = tmp_path / "out.csv"
+    sink = OutputSink(str(path), flush_size=3, flush_interval=3600)
+    sink.write_row([0.0, 700])
+    sink.write_row([11.0, 701.5])
+    assert read(path) == ""
+
+    sink.write("22.0,702\n")
+    assert read(path) == "0.0,700\n11.0,701.5\n22.0,702\n"
+
+    sink.write_row([33.0, 703])
+    sink.close()
+    assert read(path).endswith("33.0,703\n")
+    assert sink.closed
+
+
+def test_flush_interval(tmp_path):
+    """Rows are written when the flush interval has passed"""
+    path = tmp_path / "out.csv"
+    sink = OutputSink(str(path), flush_size=100, flush_interval=0)
+    sink.write_row([0.0, 700])
+    assert read(path) == "0.0,700\n"
+    sink.close()
+
+
+def test_close_all(tmp_path):
+    """Closing all sinks flushes the buffered rows"""
+    path = tmp_path / "out.csv"
+    sink = OutputSink(str(path), flush_size=100, flush_interval=3600)
+    sink.write_row([0.0, 700])
+    close_all()
+    assert sink.closed
+    assert read(path) == "0.0,700\n"
+
+    with OutputSink(str(path), append=True) as appending:
+        appending.write_row([11.0, 701])
+    assert read(path) == "0.0,700\n11.0,701\n"
+
+
+def test_sink_is_abstract():
+    """A sink has to say how its rows are written"""
+    with pytest.raises(TypeError):
+        Sink(io.StringIO(), 1, 1.0)  # type: ignore
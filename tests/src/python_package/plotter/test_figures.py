@@ -0,0 +1,80 @@
+"""Testing of the rendering of the figures"""
+
+from datetime import datetime
+import pickle
+
+import numpy as np
+from matplotlib import pyplot as plt
+
+from python_package.args import ARGS, OutGraph, OutType
+from python_package.kalman_filter.trace import trace_columns
+from python_package.out_mode import OutMode
+from python_package.plotter import figure_jobs, render_figures
+
+CHANGES = [(OutMode.SENSOR, 20)]
+
+
+def run_arguments(tmp_path, image: str, graphs: str = "rain") -> ARGS:
+    """Writes the files of a short run and returns the arguments that plot them"""
+    for name in ["rain", "control", "data", "out"]:
+        (tmp_path / f"{name}.csv").write_text("0,700\n20,710\n40,705\n", encoding="utf-8")
+    trace = np.tile(np.arange(3, dtype=np.float64)[:, None] * 20, (1, len(trace_columns(5))))
+    np.savetxt(tmp_path / "kalman.csv", trace, delimiter=",")
+    return ARGS(
+        datetime.now(),
+        [
+            f"--rain={tmp_path / 'rain.csv'}",
+            "--mode=replay",
+            f"--data={tmp_path / 'data.csv'}",
+            f"--data-control={tmp_path / 'control.csv'}",
+            "--time=40",
+            f"--output={tmp_path / 'out.csv'}",
+            f"--kalman-bank={tmp_path / 'kalman.csv'}",
+            f"--output-image={tmp_path / image}",
+            f"--output-graph={graphs}",
+            "--show=false",
+        ],
+    )
+
+
+def test_pgf_has_a_job_per_graph(tmp_path):
+    args = run_arguments(tmp_path, "run.pgf", "rain,kalman")
+    jobs = figure_jobs(args, 0, 1000, CHANGES)
+    assert [(job.graphs, job.file) for job in jobs] == [
+        ([OutGraph.RAIN], str(tmp_path / "run.rain.pgf")),
+        ([OutGraph.KALMAN], str(tmp_path / "run.kalman.pgf")),
+    ]
+    # A job only holds the files of its graphs and can be sent to another process
+    assert list(jobs[0].files) == ["rain_file"]
+    assert pickle.loads(pickle.dumps(jobs[1])).files["kalman"] == str(tmp_path / "kalman.csv")
+
+
+def test_pgf_without_suffix(tmp_path, monkeypatch):
+    args = run_arguments(tmp_path, "run.pgf", "kalman")
+    assert [(job.graphs, job.file) for job in figure_jobs(args, 0, 1000, CHANGES)] == [
+        ([OutGraph.KALMAN], str(tmp_path / "run.pgf"))
+    ]
+    # The single file gets the last of several graphs
+    monkeypatch.setattr(ARGS, "out_suffix", property(lambda self: False))
+    args = run_arguments(tmp_path, "run.pgf", "rain,control,kalman-delta")
+    assert [(job.graphs, job.file) for job in figure_jobs(args, 0, 1000, CHANGES)] == [
+        ([OutGraph.KALMAN_DELTA], str(tmp_path / "run.pgf"))
+    ]
+
+
+def test_render_without_pyplot(tmp_path):
+    jobs = figure_jobs(run_arguments(tmp_path, "run.png"), 0, 1000, CHANGES)
+    assert [job.out_type for job in jobs] == [OutType.PNG]
+    render_figures(jobs)
+    assert (tmp_path / "run.png").stat().st_size > 0
+    assert not plt.get_fignums()
+
+
+def test_render_in_pool(tmp_path):
+    jobs = []
+    for name in ["a", "b"]:
+        folder = tmp_path / name
+        folder.mkdir()
+        jobs += figure_jobs(run_arguments(folder, "run.png"), 0, 1000, CHANGES)
+    render_figures(jobs, workers=2)
+    assert (tmp_path / "a" / "run.png").read_bytes() == (tmp_path / "b" / "run.png").read_bytes()
@@ -0,0 +1,42 @@
+"""Testing of the data the graphs are plotted from"""
+
+import numpy as np
+import pytest
+
+from python_package.kalman_filter.trace import BinaryTraceSink, trace_columns
+from python_package.plotter.data import PlotData, read_kalman, read_series
+
+ROWS = np.arange(2 * 15, dtype=np.float64).reshape(2, 15)
+
+
+def test_read_series(tmp_path):
+    file = tmp_path / "out.csv"
+    file.write_text("0.0,700\n10.0,701.5\n", encoding="utf-8")
+    series = read_series(str(file))
+    assert np.array_equal(series["time"], [0, 10]) and np.array_equal(series["value"], [700, 701.5])
+    assert len(series) == 2
+    with pytest.raises(ValueError):
+        series["state"]  # pylint: disable=W0104
+
+
+def test_read_kalman_csv_and_binary(tmp_path):
+    csv_file = tmp_path / "kalman.csv"
+    csv_file.write_text("".join(",".join(map(str, row)) + "\n" for row in ROWS.tolist()), encoding="utf-8")
+    binary_file = tmp_path / "kalman.trace"
+    sink = BinaryTraceSink(str(binary_file), 2)
+    sink.write_rows(ROWS)
+    sink.close()
+
+    for trace in [read_kalman(str(csv_file)), read_kalman(str(binary_file))]:
+        assert list(trace.columns) == trace_columns(2)
+        assert np.array_equal(trace["predicted_state_1"], ROWS[:, 10])
+        assert np.array_equal(trace["measured"], ROWS[:, 14])
+
+
+def test_files_are_read_once(tmp_path):
+    file = tmp_path / "out.csv"
+    file.write_text("0.0,700\n", encoding="utf-8")
+    data = PlotData()
+    assert data.series(str(file)) is data.series(str(file))
+    file.write_text("0.0,800\n", encoding="utf-8")
+    assert data.series(str(file))["value"][0] == 700
@@ -0,0 +1,69 @@
+"""Testing of the masks of areas over radar grids"""
+
+import numpy as np
+import pytest
+
+from python_package.rain.area import Area, Coordinate, EmptyArea, NorthboundRectangle
+from python_package.rain.radar_data import AreaMask, MaskIndex, RadarGrid
+
+GRID = RadarGrid(north=57.0, south=56.0, west=9.0, east=10.0, rows=10, columns=10)
+RECTANGLE = NorthboundRectangle(Coordinate(9.45, 56.625), Coordinate(9.6, 56.8))
+
+
+class Circle(Area):
+    "An area that only implements contains"
+
+    def __init__(self, center: Coordinate, radius: float):
+        self.center = center
+        self.radius = radius
+
+    def contains(self, coordinate: Coordinate) -> bool:
+        return (coordinate.lon - self.center.lon) ** 2 + (coordinate.lat - self.center.lat) ** 2 < self.radius**2
+
+    def calc_area(self) -> float:
+        return 0.0
+
+    def bounds(self):
+        return (
+            Coordinate(self.center.lon - self.radius, self.center.lat - self.radius),
+            Coordinate(self.center.lon + self.radius, self.center.lat + self.radius),
+        )
+
+
+def test_contains_many_matches_contains():
+    lon, lat = np.meshgrid(np.linspace(9.3, 9.7, 41), np.linspace(56.5, 56.9, 41))
+    expected = np.array([[RECTANGLE.contains(Coordinate(x, y)) for x, y in zip(*row)] for row in zip(lon, lat)])
+    assert np.array_equal(RECTANGLE.contains_many(lon, lat), expected)
+    assert np.array_equal(Area.contains_many(RECTANGLE, lon, lat), expected)
+    assert not EmptyArea(1).contains_many(lon, lat).any()
+
+
+def test_rectangle_weights():
+    mask = MaskIndex().get(RECTANGLE, GRID)
+    rows, columns = mask.window
+    assert (rows.start, rows.stop, columns.start, columns.stop) == (2, 4, 4, 6)
+    assert np.allclose(mask.weights, [[0.5, 1.0], [0.75 * 0.5, 0.75]])
+    # The weights cover the area of the rectangle
+    assert mask.weights.sum() * GRID.cell_area() == pytest.approx(RECTANGLE.calc_area())
+
+
+def test_generic_area_uses_centers():
+    circle = Circle(Coordinate(9.5, 56.5), 0.12)
+    mask = MaskIndex().get(circle, GRID)
+    # Only the centers of the four cells around the center of the circle are within it, of a window of 4 by 4
+    assert mask.weights.shape == (4, 4) and mask.weights.sum() == 4
+
+
+def test_masks_are_computed_once():
+    masks = MaskIndex()
+    assert masks.get(RECTANGLE, GRID) is masks.get(RECTANGLE, GRID)
+    assert masks.get(RECTANGLE, RadarGrid(57.0, 56.0, 9.0, 10.0, 10, 10)) is masks.get(RECTANGLE, GRID)
+    masks.get(RECTANGLE, RadarGrid(57.0, 56.0, 9.0, 10.0, 20, 20))
+    assert masks.get(EmptyArea(1), GRID) is None
+    assert masks.computed == 3
+
+
+def test_average():
+    mask = AreaMask((slice(0, 2), slice(0, 2)), np.array([[1.0, 0.5], [0.0, 0.5]]))
+    tiles = np.array([[[2.0, 4.0], [100.0, 4.0]], [[np.nan, 4.0], [1.0, np.nan]], [[np.nan] * 2] * 2])
+    assert np.allclose(mask.average(tiles), [3.0, 4.0, 0.0])
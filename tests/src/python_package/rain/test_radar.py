@@ -0,0 +1,217 @@
+"""Testing of the radar rain"""
+
+from datetime import datetime, timedelta
+import os
+
+import h5py
+import numpy as np
+import pytest
+
+from python_package.rain.artificial_rain import (
+    ArtificialConstRain,
+    ArtificialVariableRain,
+    ArtificialVariableRainPrediction,
+)
+from python_package.rain.area import Coordinate, EmptyArea, NorthboundRectangle
+from python_package.rain.radar_data import Radar, RadarData, RadarGrid, SeriesCache, TileCache, series_cache
+from python_package.rain.radar_data.composite import reflectivity_to_rate
+from python_package.time import Time
+from python_package.virtual_pond import VirtualPond
+
+START = datetime(2023, 11, 23, 14, 0)
+# A grid of 10 by 10 cells of 0.1 degrees
+GRID = RadarGrid(north=57.0, south=56.0, west=9.0, east=10.0, rows=10, columns=10)
+# The four cells in rows 2-3 and columns 4-5
+AREA = NorthboundRectangle(Coordinate(9.41, 56.61), Coordinate(9.59, 56.79))
+
+
+def write_composite(
+    folder, time: datetime, data: np.ndarray, quantity: str = "RATE", projdef: str | None = None
+) -> str:
+    "Writes an ODIM composite of rain rate with a gain of 0.1"
+    file = folder / f"dk.com.{time:%Y%m%d%H%M}.500_max.h5"
+    with h5py.File(file, "w") as f:
+        f.create_group("where").attrs.update(
+            {"UL_lat": 57.0, "LL_lat": 56.0, "LL_lon": 9.0, "UR_lon": 10.0, "xsize": 10, "ysize": 10}
+        )
+        if projdef is not None:
+            f["where"].attrs["projdef"] = np.bytes_(projdef)
+        f.create_group("what").attrs.update({"date": np.bytes_(f"{time:%Y%m%d}"), "time": np.bytes_(f"{time:%H%M%S}")})
+        f.create_dataset("dataset1/data1/data", data=data, chunks=(5, 5))
+        f["dataset1/data1"].create_group("what").attrs.update(
+            {"quantity": np.bytes_(quantity), "gain": 0.1, "offset": 0.0, "nodata": 255, "undetect": 0}
+        )
+    return str(file)
+
+
+def rate_grid(rate: float) -> np.ndarray:
+    "A grid with rate in the cells of the area and 25.5 mm/h everywhere else"
+    data = np.full((10, 10), 255 - 1, dtype=np.uint8)
+    data[2:4, 4:6] = rate * 10
+    return data
+
+
+def test_grid_window():
+    rows, columns = GRID.window(AREA)
+    assert (rows.start, rows.stop, columns.start, columns.stop) == (2, 4, 4, 6)
+    lat, lon = GRID.centers((rows, columns))
+    assert np.allclose(lat, [56.75, 56.65]) and np.allclose(lon, [9.45, 9.55])
+    assert GRID.window(NorthboundRectangle(Coordinate(11, 56), Coordinate(12, 57))) is None
+    assert GRID.window(EmptyArea(100)) is None
+
+
+def test_composite(tmp_path):
+    data = rate_grid(2.0)
+    data[2, 4] = 255
+    data[3, 5] = 0
+    composite = RadarData(write_composite(tmp_path, START, data))
+    assert composite.time == START
+    assert composite.grid() == GRID
+    rate = composite.read(GRID.window(AREA))
+    assert np.isnan(rate[0, 0]) and rate[1, 1] == 0.0 and rate[0, 1] == pytest.approx(2.0)
+
+
+def test_composite_projection(tmp_path):
+    "Only grids that are regular in latitude and longitude can be read"
+    (tmp_path / "latlon").mkdir()
+    composite = RadarData(write_composite(tmp_path / "latlon", START, rate_grid(1.0), projdef="+proj=longlat"))
+    assert composite.grid() == GRID
+
+    (tmp_path / "dmi").mkdir()
+    write_composite(tmp_path / "dmi", START, rate_grid(1.0), projdef="+proj=stere +lat_0=56 +lon_0=10.5666 +lat_ts=56")
+    with pytest.raises(ValueError, match="stere"):
+        Radar(AREA, str(tmp_path / "dmi")).get_rain_fall(EmptyArea(1), START, START + timedelta(minutes=5))
+
+
+def test_reflectivity():
+    assert reflectivity_to_rate(np.array([23.0]))[0] == pytest.approx(1.0, rel=0.01)
+
+
+def test_radar_rain(tmp_path):
+    write_composite(tmp_path, START, rate_grid(6.0))
+    write_composite(tmp_path, START + timedelta(minutes=5), rate_grid(12.0))
+    # A composite far from the windows is never read
+    (tmp_path / "dk.com.203001010000.500_max.h5").write_bytes(b"not a composite")
+    radar = Radar(AREA, str(tmp_path))
+
+    # 6 mm/h for 5 minutes and 12 mm/h for the next 5 minutes, no rain after the last composite
+    assert radar.get_rain_fall(EmptyArea(1), START, START + timedelta(minutes=5)) == pytest.approx(0.5 / 300)
+    assert radar.get_rain_fall(EmptyArea(1), START, START + timedelta(minutes=10)) == pytest.approx(1.5 / 600)
+    assert radar.get_rain_fall(EmptyArea(1), START, START) == 0.0
+    starts = [START - timedelta(minutes=5), START + timedelta(minutes=4), START + timedelta(minutes=9)]
+    ends = [start + timedelta(minutes=2) for start in starts]
+    assert np.allclose(radar.get_rain_falls(EmptyArea(1), starts, ends) * 120, [0.0, 0.1 + 0.2, 0.2])
+    assert radar.tiles.misses == 2
+
+
+def test_radar_keeps_recent_tiles(tmp_path):
+    "Only the decoded windows of the most recently used composites are kept"
+    for i in range(2):
+        write_composite(tmp_path, START + timedelta(minutes=5 * i), rate_grid(6.0))
+    radar = Radar(AREA, str(tmp_path), max_tiles=1)
+    first = (START, START + timedelta(minutes=5))
+    second = (START + timedelta(minutes=5), START + timedelta(minutes=10))
+    for window in [first, first, second, first]:
+        assert radar.get_rain_fall(EmptyArea(1), *window) == pytest.approx(6.0 / 3600)
+    assert (radar.tiles.hits, radar.tiles.misses) == (1, 3)
+    assert len(radar.tiles) == 1
+
+
+def test_small_area_uses_center_cell(tmp_path):
+    data = rate_grid(6.0)
+    data[2, 4] = 120
+    write_composite(tmp_path, START, data)
+    radar = Radar(NorthboundRectangle(Coordinate(9.41, 56.71), Coordinate(9.42, 56.72)), str(tmp_path))
+    assert radar.get_rain_fall(EmptyArea(1), START, START + timedelta(hours=1)) == pytest.approx(12 / 12 / 3600)
+
+
+def test_tile_cache():
+    cache = TileCache(2)
+    loads = []
+    for key in ["a", "b", "a", "c", "b"]:
+        cache.get(key, lambda key=key: loads.append(key) or np.zeros(1))
+    # b was used the longest ago when c was added
+    assert loads == ["a", "b", "c", "b"]
+    assert "a" not in cache and len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_series_cache(tmp_path):
+    folder = tmp_path / "radar"
+    folder.mkdir()
+    files = [write_composite(folder, START + timedelta(minutes=5 * i), rate_grid(6.0 * (i + 1))) for i in range(3)]
+    end = START + timedelta(minutes=15)
+    seconds = (end - START).total_seconds()
+
+    radar = Radar(AREA, str(folder), cache=str(tmp_path / "cache"))
+    assert radar.get_rain_fall(EmptyArea(1), START, end) * seconds == pytest.approx(0.5 + 1.0 + 1.5)
+    radar.close()
+
+    # A new radar over the same area reads the rates from the cache
+    radar = Radar(AREA, str(folder), cache=str(tmp_path / "cache"))
+    assert radar.get_rain_fall(EmptyArea(1), START, end) * seconds == pytest.approx(3.0)
+    assert radar.tiles.misses == 0
+
+    # A touched composite is checksummed, a changed composite is read again
+    os.utime(files[0], ns=(0, 0))
+    write_composite(folder, START + timedelta(minutes=5), rate_grid(0.0))
+    radar = Radar(AREA, str(folder), cache=str(tmp_path / "cache"))
+    assert radar.get_rain_fall(EmptyArea(1), START, end) * seconds == pytest.approx(0.5 + 1.5)
+    assert radar.tiles.misses == 1
+    radar.close()
+
+    radar = Radar(AREA, str(folder), cache=str(tmp_path / "cache"))
+    assert radar.get_rain_fall(EmptyArea(1), START, end) * seconds == pytest.approx(2.0)
+    assert radar.tiles.misses == 0
+
+
+def test_series_cache_checksum_with_trailing_zeros(tmp_path, monkeypatch):
+    "A touched composite is found by its checksum, also if the checksum ends with zero bytes"
+    checksum = "ab" * 30 + "0000"
+    monkeypatch.setattr(series_cache, "file_checksum", lambda file: checksum)
+    composite = RadarData(write_composite(tmp_path, START, rate_grid(1.0)))
+    cache = SeriesCache(str(tmp_path / "cache"), "key")
+    cache.put(composite, 6.0)
+    cache.flush()
+
+    os.utime(composite.file, ns=(0, 0))
+    assert SeriesCache(str(tmp_path / "cache"), "key").get(composite) == 6.0
+
+
+def test_series_cache_segments(tmp_path, monkeypatch):
+    monkeypatch.setattr(series_cache, "FLUSH_SIZE", 2)
+    monkeypatch.setattr(series_cache, "MAX_SEGMENTS", 3)
+    composites = [
+        RadarData(write_composite(tmp_path, START + timedelta(minutes=5 * i), rate_grid(1.0))) for i in range(10)
+    ]
+    cache = SeriesCache(str(tmp_path / "cache"), "key")
+    for i, composite in enumerate(composites):
+        cache.put(composite, float(i))
+    cache.put(composites[0], 100.0)
+    cache.flush()
+    assert len(os.listdir(cache.folder)) <= 3
+
+    cache = SeriesCache(str(tmp_path / "cache"), "key")
+    assert [cache.get(composite) for composite in composites] == [100.0] + [float(i) for i in range(1, 10)]
+
+
+def test_pond_from_radar(tmp_path):
+    "A pond fed by the radar fills like a pond fed the same rain in mm per second as an artificial rain"
+    write_composite(tmp_path, START, rate_grid(6.0))
+    write_composite(tmp_path, START + timedelta(minutes=5), rate_grid(12.0))
+    points = ArtificialVariableRainPrediction.from_arrays(
+        np.array([0.0, 300.0, 600.0]), np.array([6.0, 12.0, 0.0]) / 3600
+    )
+    rains = [Radar(AREA, str(tmp_path)), ArtificialVariableRain(START, points), ArtificialConstRain(0.0)]
+
+    heights = []
+    for rain in rains:
+        # A step of every composite, the artificial rain averages from the first point of a window
+        time = Time(start=START, current_time=timedelta(seconds=0), delta=timedelta(minutes=5))
+        pond = VirtualPond(1.85, 0.25, 0.6, 5572, 300, 100, 850, time=time, rain_data_mm=rain)
+        first = pond.generate_virtual_sensor_reading().height
+        time.step()
+        heights.append([first] + [data.height for data in pond.simulate(3)])
+    radar, artificial, dry = heights
+    assert radar == pytest.approx(artificial)
+    assert all(wet > height for wet, height in zip(radar[:3], dry[:3]))
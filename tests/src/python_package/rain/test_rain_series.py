@@ -0,0 +1,82 @@
+"""Testing of the compiled rain series"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from python_package.rain.artificial_rain import ArtificialVariableRain, ArtificialVariableRainPrediction
+from python_package.rain.rain_data import save_rain_data
+from python_package.rain.rain_series import RainSeries
+
+SERIES = RainSeries(np.array([0.0, 10.0, 20.0, 30.0]), np.array([1.0, 2.0, 4.0, 8.0]))
+
+
+def test_average():
+    """Windows start at the first point after their start and end at the first point after their end"""
+    assert SERIES.average(0, 5) == 1.0
+    assert SERIES.average(5, 15) == 2.0
+    assert SERIES.average(0, 20) == 1.5
+    assert SERIES.average(20, 40) == 6.0
+    assert SERIES.average(35, 40) == 0.0
+    assert SERIES.average(30, 30) == 0.0
+    assert RainSeries(np.array([]), np.array([])).average(0, 10) == 0.0
+
+
+def test_averages_match_average():
+    """The vectorized call gives the same averages as the scalar one"""
+    starts = np.array([0, 5, 0, 20, 35, 30, 12.5, -5])
+    ends = np.array([5, 15, 20, 40, 40, 30, 27.5, 50])
+    expected = [SERIES.average(start, end) for start, end in zip(starts, ends)]
+    assert np.allclose(SERIES.averages(starts, ends), expected)
+
+
+def test_artificial_rain_uses_series():
+    """Points added after a query are included in the next query"""
+    begining = datetime(2024, 1, 1)
+    prediction = (
+        ArtificialVariableRainPrediction().add_point(timedelta(seconds=0), 1).add_point(timedelta(seconds=10), 3)
+    )
+    rain = ArtificialVariableRain(begining, prediction)
+    assert rain.get_rain_fall(None, begining, begining + timedelta(seconds=20)) == 2.0
+
+    prediction.add_point(timedelta(seconds=20), 5)
+    windows = [begining + timedelta(seconds=s) for s in (0, 10, 20)]
+    assert rain.get_rain_falls(None, windows, [w + timedelta(seconds=10) for w in windows]).tolist() == [1, 3, 5]
+
+
+def test_save_rain_data_sorts_points(tmp_path):
+    """Points out of order in a rain file are sorted by time"""
+    file = tmp_path / "Rain.csv"
+    file.write_text("0,1\n10,3\n20,2\n5,4\n", encoding="utf-8")
+    prediction = save_rain_data(str(file))
+    assert [prediction.get_prediction(i) for i in range(4)] == [
+        (timedelta(seconds=0), 1.0),
+        (timedelta(seconds=5), 4.0),
+        (timedelta(seconds=10), 3.0),
+        (timedelta(seconds=20), 2.0),
+    ]
+    assert prediction.compile().average(0, 10) == 2.5
+
+
+def test_from_arrays_matches_points():
+    """A prediction from arrays has the same points as one with the points added one at a time"""
+    times = np.array([20, 0, 10, 10, 2.0000015, 5])
+    rain = np.array([1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+    points = ArtificialVariableRainPrediction()
+    for time, value in zip(times.tolist(), rain.tolist()):
+        points.add_point(timedelta(seconds=time), value)
+    prediction = ArtificialVariableRainPrediction.from_arrays(times, rain)
+    assert [prediction.get_prediction(i) for i in range(6)] == [points.get_prediction(i) for i in range(6)]
+    assert np.array_equal(prediction.compile().times, points.compile().times)
+    assert prediction.get_closest_index(timedelta(seconds=10)) == 3
+
+    prediction.add_point(timedelta(seconds=30), 7.0)
+    assert prediction.compile().times[-1] == 30
+
+
+def test_from_arrays_rejects_invalid_times():
+    """Times must be a one dimensional array of numbers as long as the rain"""
+    for times, rain in [([0, np.nan], [1, 2]), ([0, 1], [1]), ([[0, 1]], [[1, 2]])]:
+        with pytest.raises(ValueError):
+            ArtificialVariableRainPrediction.from_arrays(np.array(times), np.array(rain))
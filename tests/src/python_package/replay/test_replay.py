@@ -0,0 +1,82 @@
+"""Testing of the replay engine"""
+
+from datetime import datetime
+import os
+import subprocess
+import sys
+
+import pytest
+from python_package.config import ExperimentConfig
+from python_package.out_mode import OutMode
+from python_package.rain.artificial_rain import ArtificialConstRain
+from python_package.replay import Replay, load_sensor_data
+from python_package.serial.serial_exceptions import serial_exceptions
+
+
+def write_sensor_data(path, rows: list[tuple[float, float]]) -> str:
+    """Writes a sensor csv file"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(f"{t},{reading}\n" for t, reading in rows)
+    return str(path)
+
+
+def test_load_sensor_data(tmp_path):
+    """Times and readings are truncated like the Headless device does"""
+    times, readings = load_sensor_data(write_sensor_data(tmp_path / "data.csv", [(0.0, 699.5), (10.7, -700.2)]))
+    assert times.tolist() == [0, 10]
+    assert readings.tolist() == [699, 700]
+
+
+def test_replay_uses_latest_sample(tmp_path):
+    """Every tick uses the latest sample that has arrived"""
+    data = write_sensor_data(tmp_path / "data.csv", [(t, 700 + t) for t in range(0, 100, 10)])
+    result = Replay(datetime.now(), ExperimentConfig(), ArtificialConstRain(0), data).run(40)
+
+    assert result.time.tolist() == [0.0, 11.0, 22.0, 33.0]
+    assert result.output == [700, 710, 720, 730]
+    assert result.change_array == []
+    assert result.sensor_error is None
+    assert len(result.trace) == 4
+    assert len(result.trace[0]) == 7 * (len(ExperimentConfig().faults) + 1) + 1
+    # The measured height keeps the type of the reading, like the trace of the KalmanBank
+    assert result.trace[0][-1] == 700 and isinstance(result.trace[0][-1], int)
+
+
+def test_replay_sensor_error(tmp_path):
+    """The replay switches to the virtual pond when the sensor stops responding"""
+    data = write_sensor_data(tmp_path / "data.csv", [(0, 700), (10, 700)])
+    result = Replay(datetime.now(), ExperimentConfig(), ArtificialConstRain(0), data).run(40)
+
+    assert result.sensor_error is serial_exceptions.Exceptions.NO_RESPONSE
+    assert result.change_array == [[OutMode.SENSOR_ERROR, 22.0]]
+    assert result.output[:2] == [700, 700]
+    assert result.output[2:] == result.virtual_height[2:].tolist()
+    assert len(result.trace) == 2
+
+
+@pytest.mark.parametrize("experiment", ["online_control_experiment1", "sensor_reads_zero/control_point_200"])
+def test_replay_mode_matches_headless(tmp_path, experiment):
+    """main.py writes the same output and kalman trace files with --mode=replay as with --mode=headless"""
+    folder = os.path.join("experiment_data", experiment)
+    env = dict(os.environ, PYTHONPATH="src", MPLBACKEND="Agg")
+    for mode in ["headless", "replay"]:
+        subprocess.run(
+            [
+                sys.executable,
+                os.path.join("src", "main.py"),
+                f"--rain={os.path.join(folder, 'Rain.csv')}",
+                f"--mode={mode}",
+                f"--data={os.path.join(folder, 'DepthSensor.csv')}",
+                f"--data-control={os.path.join(folder, 'DepthControl.csv')}",
+                "--time=700",
+                f"--output={tmp_path / mode}.csv",
+                f"--kalman-bank={tmp_path / mode}.kalman.csv",
+                f"--controler-cache={tmp_path / mode}-cache",
+                "--show=false",
+            ],
+            check=True,
+            capture_output=True,
+            env=env,
+        )
+    assert (tmp_path / "replay.csv").read_bytes() == (tmp_path / "headless.csv").read_bytes()
+    assert (tmp_path / "replay.kalman.csv").read_bytes() == (tmp_path / "headless.kalman.csv").read_bytes()
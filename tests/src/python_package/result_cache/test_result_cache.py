@@ -0,0 +1,81 @@
+"""Testing of the result cache"""
+
+from datetime import datetime
+import os
+import shutil
+
+from python_package.args import ARGS
+from python_package.checksum import ENTRY_SCRIPTS, source_checksum, tree_checksum
+from python_package.config import ExperimentConfig
+from python_package.result_cache import ResultCache
+from python_package.runner import Experiment, run_experiment
+
+DATASET = os.path.join("experiment_data", "sensor_reads_zero", "control_point_100")
+
+
+def copy_dataset(tmp_path) -> Experiment:
+    """Copies a dataset so its files can be changed"""
+    folder = tmp_path / "experiment" / "dataset"
+    shutil.copytree(DATASET, folder)
+    return Experiment(str(folder))
+
+
+def test_key(tmp_path):
+    """The key changes with the inputs and the arguments but not with the output paths"""
+    experiment = copy_dataset(tmp_path)
+    cache = ResultCache(str(tmp_path / "cache"))
+    config = ExperimentConfig()
+    key = cache.key(ARGS(datetime.now(), experiment.arguments(str(tmp_path / "a"), 100)), config)
+
+    assert key == cache.key(ARGS(datetime.now(), experiment.arguments(str(tmp_path / "b"), 100)), config)
+    assert key != cache.key(ARGS(datetime.now(), experiment.arguments(str(tmp_path / "a"), 200)), config)
+    assert key != cache.key(ARGS(datetime.now(), experiment.arguments(str(tmp_path / "a"), 100)), ExperimentConfig(0.5))
+
+    with open(os.path.join(experiment.folder, "DepthSensor.csv"), "a", encoding="utf-8") as f:
+        f.write("8000,700\n")
+    assert key != cache.key(ARGS(datetime.now(), experiment.arguments(str(tmp_path / "a"), 100)), config)
+
+
+def test_run_experiment_reuses_result(tmp_path):
+    """A second identical run restores the output files from the cache"""
+    experiment = copy_dataset(tmp_path)
+    out, cache = str(tmp_path / "out"), str(tmp_path / "cache")
+    os.makedirs(out)
+
+    first = run_experiment(experiment, out, 2000, cache)
+    assert first.status == "ok"
+    files = sorted(os.listdir(out))
+    with open(os.path.join(out, f"{experiment.name}.csv"), encoding="utf-8") as f:
+        output = f.read()
+    for file in files:
+        os.remove(os.path.join(out, file))
+
+    second = run_experiment(experiment, out, 2000, cache)
+    assert second.status == "cached"
+    assert (second.mode_changes, second.sensor_error) == (first.mode_changes, first.sensor_error)
+    assert sorted(os.listdir(out)) == files
+    with open(os.path.join(out, f"{experiment.name}.csv"), encoding="utf-8") as f:
+        assert f.read() == output
+
+
+def test_source_checksum_covers_scripts(tmp_path):
+    """Changing the package or a script that writes results changes the checksum of the source"""
+    package = tmp_path / "python_package"
+    package.mkdir()
+    (package / "__init__.py").write_text("A = 1\n", encoding="utf-8")
+    main = tmp_path / "main.py"
+    main.write_text("print(1)\n", encoding="utf-8")
+
+    checksum = tree_checksum(str(package), [str(main)])
+    main.write_text("print(2)\n", encoding="utf-8")
+    changed = tree_checksum(str(package), [str(main)])
+    assert changed != checksum
+    (package / "__init__.py").write_text("A = 2\n", encoding="utf-8")
+    assert tree_checksum(str(package), [str(main)]) != changed
+    assert tree_checksum(str(package), [str(tmp_path / "missing.py")]) == tree_checksum(str(package))
+
+    # The key of a cached result covers the scripts in src
+    src = os.path.join("src")
+    scripts = [os.path.join(src, script) for script in ENTRY_SCRIPTS]
+    assert "main.py" in ENTRY_SCRIPTS and all(os.path.isfile(script) for script in scripts)
+    assert source_checksum() == tree_checksum(os.path.join(src, "python_package"), scripts)
@@ -0,0 +1,33 @@
+"""Testing of the discovery of experiments"""
+
+from python_package.runner import EXPERIMENT_FILES, discover_experiments
+
+
+def make_experiment(folder) -> None:
+    """Writes empty experiment files to folder"""
+    folder.mkdir(parents=True)
+    for file in EXPERIMENT_FILES:
+        (folder / file).write_text("", encoding="utf-8")
+
+
+def test_discover_experiments(tmp_path):
+    make_experiment(tmp_path / "sensor_reads_zero" / "control_point_100")
+    make_experiment(tmp_path / "sensor_reads_zero" / "control_point_200")
+    # A control experiment has its files directly in the experiment folder
+    make_experiment(tmp_path / "online_control_experiment1")
+    (tmp_path / "empty").mkdir()
+    (tmp_path / "notes.txt").write_text("", encoding="utf-8")
+
+    experiments = discover_experiments(str(tmp_path))
+    assert [experiment.name for experiment in experiments] == [
+        "online_control_experiment1",
+        "sensor_reads_zero-control_point_100",
+        "sensor_reads_zero-control_point_200",
+    ]
+    assert experiments[0].folder == str(tmp_path / "online_control_experiment1")
+
+
+def test_discover_experiment_data():
+    names = [experiment.name for experiment in discover_experiments("experiment_data")]
+    assert len(names) == 89
+    assert "offline_control_experiment2" in names and "online_control_experiment1" in names
@@ -0,0 +1,187 @@
+"""Testing of the serial gateway"""
+
+import asyncio
+import queue
+from datetime import datetime, timedelta
+
+import serial
+from python_package.config import ExperimentConfig
+from python_package.output import OutputSink
+from python_package.rain.artificial_rain import ArtificialConstRain
+from python_package.runtime import TickScheduler
+from python_package.runtime.gateway import Device, SerialGateway
+from python_package.runtime.pipeline import PondPipeline
+from python_package.serial import SerialCom
+from python_package.time import FastClock, Time
+
+
+class ControllerPort:
+    """A port that answers every sensor request with a reading, until it is unplugged"""
+
+    def __init__(self, reading: int):
+        self.reading = reading
+        self.lines = queue.Queue()
+        self.unplugged = False
+
+    def read_until(self, expected=b"\n", size=None) -> bytes:
+        if self.unplugged:
+            raise serial.SerialException("device disconnected")
+        try:
+            return self.lines.get(timeout=0.02)
+        except queue.Empty:
+            return b""
+
+    def write(self, data) -> int:
+        if data == b"S\r":
+            self.lines.put(bytes(f"Rvd:{self.reading}\r", "utf-8"))
+            self.lines.put(b"invariance:3\r")
+        return len(data)
+
+    def close(self):
+        pass
+
+
+class FakeCom(SerialCom):
+    """A controller whose port fails to open the first failures times"""
+
+    def __init__(self, log_folder: str, reading: int, failures: int = 0):
+        super().__init__(log_folder, "fake")
+        self.reading = reading
+        self.failures = failures
+
+    def begin(self) -> None:
+        if self.failures > 0:
+            self.failures -= 1
+            raise serial.SerialException("could not open port")
+        self.arduino = ControllerPort(self.reading)
+        self.start_reader()
+
+
+class ListSink:
+    def __init__(self):
+        self.rows = []
+
+    def write(self, row: str) -> None:
+        self.rows.append(row)
+
+    def close(self) -> None:
+        pass
+
+
+def make_device(tmp_path, time: Time, name: str, reading: int, failures: int = 0) -> Device:
+    (tmp_path / name).mkdir()
+    pipeline = PondPipeline.from_config(
+        ExperimentConfig(), ArtificialConstRain(0), time, OutputSink(str(tmp_path / f"{name}.kalman.csv"))
+    )
+    return Device(name, FakeCom(str(tmp_path / name), reading, failures), pipeline, ListSink())
+
+
+def make_time() -> Time:
+    return Time(datetime(2000, 1, 1), timedelta(0), timedelta(seconds=11))
+
+
+def test_gateway_reads_every_device(tmp_path):
+    time = make_time()
+    devices = [make_device(tmp_path, time, "a", 700), make_device(tmp_path, time, "b", 650)]
+    gateway = SerialGateway(devices, time, TickScheduler(11, FastClock()))
+    asyncio.run(gateway.run(3))
+
+    assert devices[0].out_sink.rows == ["0.0,700\n", "11.0,700\n", "22.0,700\n"]
+    assert devices[1].out_sink.rows == ["0.0,650\n", "11.0,650\n", "22.0,650\n"]
+    assert time.get_current_time == timedelta(seconds=33)
+    assert not any(device.connected for device in devices)
+
+
+def test_gateway_reconnects(tmp_path):
+    time = make_time()
+    device = make_device(tmp_path, time, "a", 700, failures=2)
+    disconnects = []
+    gateway = SerialGateway(
+        [device], time, TickScheduler(11, FastClock()), 0, on_disconnect=lambda d, e: disconnects.append(e)
+    )
+    asyncio.run(gateway.run(4))
+
+    # The virtual pond is the output until the port opens
+    virtual = float(device.out_sink.rows[0].split(",")[1])
+    assert virtual != 700
+    assert device.out_sink.rows[2:] == ["22.0,700\n", "33.0,700\n"]
+    assert len(disconnects) == 2
+    assert device.connects == 1
+    assert device.pipeline.change_array == []
+
+
+def test_gateway_backoff(tmp_path):
+    time = make_time()
+    device = make_device(tmp_path, time, "a", 700, failures=5)
+    gateway = SerialGateway([device], time, TickScheduler(11), initial_backoff=1, max_backoff=3)
+
+    backoffs = []
+    for _ in range(4):
+        assert not gateway.connect(device)
+        backoffs.append(device.backoff)
+    assert backoffs == [2, 3, 3, 3]
+
+    # The backoff is reset by the first reading of the opened port
+    device.controler.failures = 0
+    assert gateway.connect(device)
+    assert device.backoff == 3
+    asyncio.run(gateway.tick())
+    assert device.backoff == 1
+    device.controler.close()
+
+
+class FlappingCom(FakeCom):
+    """A controller whose port opens but fails every time it is read"""
+
+    def begin(self) -> None:
+        super().begin()
+        self.arduino.unplugged = True
+
+
+def test_gateway_backoff_flapping_port(tmp_path):
+    time = make_time()
+    (tmp_path / "a").mkdir()
+    pipeline = PondPipeline.from_config(
+        ExperimentConfig(), ArtificialConstRain(0), time, OutputSink(str(tmp_path / "a.kalman.csv"))
+    )
+    device = Device("a", FlappingCom(str(tmp_path / "a"), 700), pipeline, ListSink())
+    disconnects = []
+    gateway = SerialGateway(
+        [device],
+        time,
+        TickScheduler(11, FastClock()),
+        initial_backoff=11,
+        max_backoff=44,
+        on_disconnect=lambda d, e: disconnects.append(e),
+    )
+    asyncio.run(gateway.run(8))
+
+    # The port is opened at 0, 11, 33 and 77 seconds, the backoff doubles after every failed read
+    assert device.connects == 4
+    assert len(disconnects) == 4
+    assert device.backoff == 44
+
+
+def test_gateway_port_fails_while_running(tmp_path):
+    time = make_time()
+    device = make_device(tmp_path, time, "a", 700)
+    disconnects = []
+    gateway = SerialGateway(
+        [device], time, TickScheduler(11, FastClock()), 0, on_disconnect=lambda d, e: disconnects.append(e)
+    )
+
+    async def run():
+        await gateway.tick()
+        device.controler.arduino.unplugged = True
+        await gateway.tick()
+        await gateway.tick()
+
+    asyncio.run(run())
+    device.controler.close()
+
+    assert device.out_sink.rows[0] == "0.0,700\n"
+    assert device.out_sink.rows[1] != "11.0,700\n"
+    assert device.out_sink.rows[2] == "22.0,700\n"
+    assert len(disconnects) == 1
+    assert isinstance(disconnects[0], serial.SerialException)
+    assert device.connects == 2
@@ -0,0 +1,133 @@
+"""Testing of the pond pipeline and the asyncio runtime"""
+
+import asyncio
+import copy
+import time
+from datetime import datetime, timedelta
+
+from python_package.config import ExperimentConfig
+from python_package.kalman_filter.vector_kalman_bank import VectorKalmanBank
+from python_package.out_mode import OutMode
+from python_package.output import OutputSink
+from python_package.rain.artificial_rain import ArtificialConstRain
+from python_package.runtime import PondPipeline, TickScheduler, run_async
+from python_package.serial.serial_exceptions import serial_exceptions
+from python_package.time import FastClock, Time
+from python_package.virtual_pond import VirtualPond
+
+
+class FakeControler:
+    """Returns the readings in order and raises NO_RESPONSE when they run out"""
+
+    def __init__(self, readings: list[int]):
+        self.readings = list(readings)
+        self.reads = 0
+
+    def read_sensor(self) -> tuple[int, int]:
+        self.reads += 1
+        if not self.readings:
+            raise serial_exceptions.Exceptions.NO_RESPONSE
+        return self.readings.pop(0), 3
+
+    async def read_sensor_async(self) -> tuple[int, int]:
+        await asyncio.sleep(0)
+        return self.read_sensor()
+
+
+def make_pipeline(time: Time, kalman_file: str) -> PondPipeline:
+    config = ExperimentConfig()
+    pond = VirtualPond(
+        config.urban_catchment_area,
+        config.surface_reaction_factor,
+        config.discharge_coeficent,
+        config.pond_area,
+        config.water_level,
+        config.water_level_min,
+        config.water_level_max,
+        copy.copy(time),
+        ArtificialConstRain(10),
+    )
+    bank = VectorKalmanBank(
+        config.faults,
+        config.water_level,
+        config.kalman_initial_variance,
+        copy.copy(time),
+        config.kalman_noice,
+        OutputSink(kalman_file),
+    )
+    return PondPipeline(pond, bank, config.pond_area, config.kalman_delay)
+
+
+def run_sequential(pipeline: PondPipeline, controler: FakeControler, out_file: str, ticks: int) -> None:
+    with OutputSink(out_file) as out_sink:
+        for _ in range(ticks):
+            seconds = pipeline.kalman_bank.time.get_current_time.total_seconds()
+            pond_data = pipeline.step_pond()
+            reading = None
+            if pipeline.reads_sensor:
+                try:
+                    reading = controler.read_sensor()
+                except serial_exceptions.Exceptions as e:
+                    reading = e
+            out = pipeline.step_filters(seconds, pond_data, reading)
+            out_sink.write(f"{seconds},{out}\n")
+            pipeline.virtual_pond.time.step()
+            pipeline.kalman_bank.time.step()
+
+
+def test_async_matches_sequential(tmp_path):
+    start = Time(datetime(2000, 1, 1), timedelta(0), timedelta(seconds=11))
+    readings = [700 + i for i in range(20)]
+
+    sequential = make_pipeline(start, str(tmp_path / "kalman-sequential.csv"))
+    run_sequential(sequential, FakeControler(readings), str(tmp_path / "sequential.csv"), 30)
+    sequential.kalman_bank.out_file.close()
+
+    pipeline = make_pipeline(start, str(tmp_path / "kalman-async.csv"))
+    controler = FakeControler(readings)
+    with OutputSink(str(tmp_path / "async.csv")) as out_sink:
+        scheduler = TickScheduler(11, FastClock())
+        asyncio.run(run_async(pipeline, controler, copy.copy(start), out_sink, 30, scheduler))
+    pipeline.kalman_bank.out_file.close()
+
+    # The sensor is not read after the reading that failed
+    assert controler.reads == len(readings) + 1
+    assert pipeline.change_array == sequential.change_array
+    assert pipeline.change_array[-1] == [OutMode.SENSOR_ERROR, 220.0]
+    for name in ("", "kalman-"):
+        with open(tmp_path / f"{name}sequential.csv", encoding="utf-8") as expected:
+            with open(tmp_path / f"{name}async.csv", encoding="utf-8") as actual:
+                assert actual.read() == expected.read()
+
+
+def test_pipeline_sensor_error(tmp_path):
+    pipeline = make_pipeline(Time(datetime(2000, 1, 1), timedelta(0), timedelta(seconds=11)), str(tmp_path / "k.csv"))
+    errors = []
+    pipeline.on_sensor_error = errors.append
+
+    pond_data = pipeline.step_pond()
+    assert pipeline.step_filters(0, pond_data, (700, 3)) == 700
+    pond_data = pipeline.step_pond()
+    assert pipeline.step_filters(11, pond_data, serial_exceptions.Exceptions.NO_RESPONSE) == pond_data.height
+    assert not pipeline.reads_sensor
+    assert errors == [serial_exceptions.Exceptions.NO_RESPONSE]
+    pond_data = pipeline.step_pond()
+    assert pipeline.step_filters(22, pond_data, None) == pond_data.height
+    assert pipeline.change_array == [[OutMode.SENSOR_ERROR, 11]]
+
+
+def test_tick_scheduler_compensates_drift():
+    scheduler = TickScheduler(0.05)
+
+    async def run():
+        begin = time.perf_counter()
+        for index in range(6):
+            await scheduler.wait(index)
+            if index == 1:
+                await asyncio.sleep(0.08)  # a slow tick
+        return time.perf_counter() - begin
+
+    elapsed = asyncio.run(run())
+    # The slow tick makes the next tick late, the ticks after it are back on schedule
+    assert scheduler.late == 1
+    assert 0.25 <= elapsed < 0.3
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+import pytest
+from python_package.serial import SerialCom
+from python_package.serial.headless import Headless
+from python_package.time import Time
+
+
+def make_headless(tmp_path, rows: list[str], speed: float = 1.0, chunk_size: int = 4) -> tuple[Headless, Time]:
+    file = tmp_path / "DepthSensor.csv"
+    file.write_text("".join(row + "\n" for row in rows), encoding="utf-8")
+    time = Time(datetime(2000, 1, 1), timedelta(0), timedelta(seconds=10))
+    return Headless(str(file), time, speed, chunk_size), time
+
+
+def read_tick(device: Headless) -> list[bytes]:
+    frames = []
+    while device.in_waiting:
+        frames.append(device.read_until(b"\r"))
+    return frames
+
+
+def test_framing(tmp_path):
+    device, time = make_headless(tmp_path, ["0,700.7", "5,-710", "10,720", "30,730"])
+    assert read_tick(device) == [b"Rvd:700", b"invariance:3"]
+    time.step()
+    assert read_tick(device) == [b"Rvd:-710", b"invariance:3", b"Rvd:720", b"invariance:3"]
+    time.step()
+    assert device.in_waiting == 0  # no sample arrived since the last tick
+    time.step()
+    assert device.available == 1
+    assert read_tick(device) == [b"Rvd:730", b"invariance:3"]
+
+
+def test_read_sensor(tmp_path):
+    device, time = make_headless(tmp_path, ["0,700", "10,710"])
+    com = SerialCom(str(tmp_path))
+    com.arduino = device
+    assert com.read_sensor() == (700, 3)
+    time.step()
+    assert com.read_sensor() == (710, 3)
+
+
+def test_seek_and_rewind(tmp_path):
+    device, time = make_headless(tmp_path, [f"{t},{700 + t}" for t in range(0, 100, 10)])
+    for _ in range(5):
+        time.step()
+    device.seek(timedelta(seconds=40))
+    assert read_tick(device) == [b"Rvd:740", b"invariance:3", b"Rvd:750", b"invariance:3"]
+
+    device.rewind()
+    assert device.available == 6
+    assert device.buffer[0] == (timedelta(seconds=0), b"Rvd:700")
+
+
+def test_speed(tmp_path):
+    device, time = make_headless(tmp_path, [f"{t},{700 + t}" for t in range(0, 100, 10)], speed=3)
+    time.step()
+    assert device.available == 4  # 10 seconds at three times the speed reaches the sample at 30 seconds
+    assert read_tick(device)[-2:] == [b"Rvd:730", b"invariance:3"]
+
+
+def test_unsorted_samples(tmp_path):
+    device, _ = make_headless(tmp_path, ["20,700", "0,710"])
+    # The device sends every sample up to the first that has arrived
+    assert read_tick(device) == [b"Rvd:700", b"invariance:3", b"Rvd:710", b"invariance:3"]
+    with pytest.raises(ValueError):
+        device.seek(timedelta(0))
+
+
+def test_buffer_setter(tmp_path):
+    device, _ = make_headless(tmp_path, [])
+    assert device.in_waiting == 0
+    device.buffer = [(timedelta(seconds=0), b"Rvd:42")]
+    assert read_tick(device) == [b"Rvd:42", b"invariance:3"]
+
+    com = SerialCom(str(tmp_path))
+    com.arduino = device
+    # Asked again within the same tick the device sends the last reading again
+    assert com.read_sensor() == (42, 3)
+
+
+def test_streams_samples(tmp_path):
+    device, time = make_headless(tmp_path, [f"{t},{t}" for t in range(0, 1000, 10)], chunk_size=8)
+    sent = []
+    for _ in range(100):
+        sent += read_tick(device)[::2]
+        time.step()
+        # Only the samples that have arrived and the chunk after them are kept
+        assert len(device._times) <= 16  # pylint: disable=W0212
+    assert sent == [b"Rvd:%d" % t for t in range(0, 1000, 10)]
+
+    # Seeking back reads the file again
+    device.seek(timedelta(seconds=20))
+    assert device.available == 98
+    assert read_tick(device)[0] == b"Rvd:20"
+
+
+def test_unsorted_chunk(tmp_path):
+    device, time = make_headless(tmp_path, ["0,700", "10,710", "20,720", "0,730"], chunk_size=2)
+    assert read_tick(device) == [b"Rvd:700", b"invariance:3"]
+    time.step()
+    # The rest of the file is read once a chunk out of order is read
+    assert device.available == 2
+    assert read_tick(device) == [b"Rvd:710", b"invariance:3", b"Rvd:720", b"invariance:3", b"Rvd:730", b"invariance:3"]
@@ -0,0 +1,134 @@
+import asyncio
+import queue
+import threading
+import pytest
+from python_package.serial import SerialCom
+from python_package.serial.reader import FrameType, SerialReader, parse_frame
+from python_package.serial.serial_exceptions import serial_exceptions
+
+
+class BlockingPort:
+    """A port whose reads block until a line is sent or the timeout passes, like a serial.Serial with a timeout"""
+
+    def __init__(self, timeout=0.05):
+        self.timeout = timeout
+        self.lines = queue.Queue()
+        self.written = []
+        self.on_write = lambda data: None
+        self.closed = False
+
+    def send(self, *lines):
+        for line in lines:
+            self.lines.put(bytes(line + "\r", "utf-8"))
+
+    def read_until(self, expected=b"\n", size=None) -> bytes:
+        try:
+            return self.lines.get(timeout=self.timeout)
+        except queue.Empty:
+            return b""
+
+    def write(self, data) -> int:
+        self.written.append(data)
+        self.on_write(data)
+        return len(data)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def com(tmp_path):
+    com = SerialCom(str(tmp_path))
+    com.arduino = BlockingPort()
+    com.start_reader()
+    yield com
+    com.close()
+
+
+def test_parse_frame():
+    frame = parse_frame(b"Rvd:111\r")
+    assert frame.line == "Rvd:111"
+    assert (frame.type, frame.value) == (FrameType.READING, 111)
+    assert parse_frame(b"invariance: 5\r").type is FrameType.INVARIANCE
+    assert parse_frame(b"pump update: 55\r").value == 55
+    assert parse_frame(b"Error:1 distance reading: -999").type is FrameType.ERROR
+    assert parse_frame(b"Error:1 distance reading: -999").value == 1
+    assert parse_frame(b"Rvd: abc").value is None
+    assert parse_frame(b"hello").type is FrameType.OTHER
+
+
+def test_reader():
+    port = BlockingPort()
+    reader = SerialReader(port)
+    reader.start()
+    port.send("1", "2", "3")
+    assert [frame.line for frame in reader.get_all(1)] == ["1", "2", "3"]
+
+    with pytest.raises(serial_exceptions.Exceptions) as excinfo:
+        reader.get(0.1)
+    assert excinfo.value is serial_exceptions.Exceptions.NO_RESPONSE
+
+    port.send("4")
+    reader.stop()
+    assert not reader.is_alive()
+    assert [frame.line for frame in reader.pending()] == ["4"]
+
+
+def test_line_split_over_reads():
+    port = BlockingPort()
+    reader = SerialReader(port)
+    # The read of the port times out in the middle of the first two lines
+    for chunk in [b"Rvd:7", b"00\rinvari", b"ance:5", b"\r"]:
+        port.lines.put(chunk)
+    reader.start()
+    assert [frame.line for frame in reader.get_all(1)] == ["Rvd:700", "invariance:5"]
+    reader.stop()
+
+
+def test_read_sensor(com):
+    com.arduino.on_write = lambda data: com.arduino.send("Rvd:111", "invariance: 5")
+    assert com.read_sensor() == (111, 5)
+
+    com.arduino.on_write = lambda data: com.arduino.send("Rvd: abc", "invariance:5")
+    with pytest.raises(serial_exceptions.Exceptions) as excinfo:
+        com.read_sensor()
+    assert excinfo.value is serial_exceptions.Exceptions.CONVERSION_ERROR
+
+    com.arduino.on_write = lambda data: com.arduino.send("Error:3 sensor did not read")
+    with pytest.raises(serial_exceptions.Exceptions) as excinfo:
+        com.read_sensor()
+    assert excinfo.value is serial_exceptions.Exceptions.NO_SENSOR_READINGS
+
+
+def test_response_arrives_later(com):
+    threading.Timer(0.2, com.arduino.send, ["pump update: 55"]).start()
+    assert com.set_pump(55) is None
+
+
+def test_async(com):
+    com.arduino.on_write = lambda data: com.arduino.send("Rvd:200", "invariance:5")
+
+    async def read():
+        return await asyncio.gather(com.read_sensor_async(), asyncio.sleep(0, "not blocked"))
+
+    assert asyncio.run(read()) == [(200, 5), "not blocked"]
+
+    com.arduino.send("pump update: 10")
+    assert asyncio.run(com.set_pump_async(10)) is None
+
+
+def test_log_error_reads_pending_frames(com):
+    com.arduino.send("buffered")
+    com.reader.get_all(1)
+    com.arduino.send("left over")
+    threading.Event().wait(0.2)
+    with pytest.raises(serial_exceptions.Exceptions):
+        com.log_error(serial_exceptions.Exceptions.NO_RESPONSE, "no response")
+    assert com.error_log.latest(1)[0].data_list == ["NO_RESPONSE", "no response", "left over"]
+
+
+def test_close(com):
+    reader = com.reader
+    com.close()
+    assert not reader.is_alive()
+    assert com.arduino.closed
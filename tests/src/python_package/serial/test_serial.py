@@ -158,3 +158,16 @@ def test_set_pump():
     with pytest.raises(serial_exceptions.Exceptions) as excinfo:
         test.set_pump(10)
     assert excinfo.value is serial_exceptions.Exceptions.COMUNICATION_ERROR
+
+
+def test_log_error(tmp_path):
+    com = SerialCom(str(tmp_path))
+    com.arduino = custom_serial
+    for _ in range(3):
+        custom_serial.buffer = ["buffered"]
+        with pytest.raises(serial_exceptions.Exceptions) as excinfo:
+            com.log_error(serial_exceptions.Exceptions.NO_RESPONSE, "no response")
+        assert excinfo.value is serial_exceptions.Exceptions.NO_RESPONSE
+
+    assert len(com.error_log) == 3
+    assert com.error_log.latest(1)[0].data_list == ["NO_RESPONSE", "no response", "buffered"]
@@ -0,0 +1,74 @@
+"""Testing of the parameter sweep"""
+
+import os
+
+import pytest
+
+from python_package.checksum import config_checksum
+from python_package.config import ExperimentConfig
+from python_package.runner import Experiment
+from python_package.sweep import DatasetResult, grid, make_config, run_sweep, sample
+
+DATASET = os.path.join("experiment_data", "sensor_reads_zero", "control_point_100")
+
+
+def test_make_config():
+    """The parameters replace the defaults, faults are replaced by index"""
+    config = make_config({"kalman_noice": 0.2, "fault_0": 30})
+    assert config.kalman_noice == 0.2
+    assert config.faults[0].get_value == 30
+    assert config.faults[1].get_value == ExperimentConfig().faults[1].get_value
+    assert config_checksum(config) != config_checksum(ExperimentConfig())
+    assert config_checksum(make_config({})) == config_checksum(ExperimentConfig())
+    with pytest.raises(ValueError):
+        make_config({"pond_size": 1})
+
+
+def test_grid_and_sample():
+    """A grid has every combination, samples are drawn from the ranges"""
+    assert grid({"a": [1, 2], "b": [3, 4]}) == [{"a": 1, "b": 3}, {"a": 1, "b": 4}, {"a": 2, "b": 3}, {"a": 2, "b": 4}]
+    assert grid({}) == [{}]
+    samples = sample({"a": (0, 1)}, 5, seed=1)
+    assert len(samples) == 5 and all(0 <= s["a"] <= 1 for s in samples)
+    assert samples == sample({"a": (0, 1)}, 5, seed=1)
+
+
+def test_dataset_result():
+    """Switches before the fault are false switches, switches after it are detections"""
+    assert DatasetResult("a", 100, 150).latency == 50
+    assert DatasetResult("a", 100, 50).false_switch
+    assert DatasetResult("a", None, 50).false_switch
+    assert DatasetResult("a", 100, None).missed
+    assert not DatasetResult("a", None, None).false_switch
+
+
+def test_run_sweep(tmp_path):
+    """Every configuration is run against every experiment and cached"""
+    experiments = [Experiment(DATASET)]
+    results = run_sweep([{"kalman_noice": 0.2}, {}], experiments, 2000, str(tmp_path), jobs=1)
+
+    assert [len(result.results) for result in results] == [1, 1]
+    assert all(result.results[0].fault_time == 1001 for result in results)
+    assert len(os.listdir(tmp_path)) == 2
+
+    cached = run_sweep([{}], experiments, 2000, str(tmp_path), jobs=1)
+    assert cached[0].results[0].to_json() in [result.results[0].to_json() for result in results]
+
+
+def test_run_sweep_records_failures(tmp_path):
+    """A replay that raises is recorded for its configuration and dataset, the other replays still run"""
+    broken = tmp_path / "broken"
+    broken.mkdir()
+    for file in ["Rain.csv", "DepthControl.csv"]:
+        (broken / file).write_text("0,1\n", encoding="utf-8")
+    (broken / "DepthSensor.csv").write_text("not,a,reading\n", encoding="utf-8")
+    experiments = [Experiment(DATASET), Experiment(str(broken), "broken")]
+
+    results = run_sweep([{}], experiments, 2000, str(tmp_path / "cache"), jobs=1)
+    result = results[0]
+    assert result.failed == 1
+    assert result.results[0].fault_time == 1001 and not result.results[0].failed
+    assert result.results[1].name == "broken" and result.results[1].error
+    assert result.row(1)[3] == 1 and result.row(1)[-1].startswith("broken: ")
+    # Only the replay that succeeded is cached
+    assert len(os.listdir(tmp_path / "cache")) == 1
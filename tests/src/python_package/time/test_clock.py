@@ -0,0 +1,75 @@
+"""Testing of the clocks that time is waited for on"""
+
+import asyncio
+from datetime import datetime, timedelta
+import time as wall
+import pytest
+from python_package.args import ARGS
+from python_package.serial import SerialCom
+from python_package.serial.serial_exceptions import serial_exceptions
+from python_package.time import FastClock, RealtimeClock, ScaledClock, Time, parse_clock
+
+START = datetime(2000, 1, 1)
+
+
+class SilentPort:
+    in_waiting = 0
+
+
+def test_fast_clock():
+    clock = FastClock(START)
+    begin = wall.monotonic()
+    clock.sleep(3600)
+    asyncio.run(clock.sleep_async(60))
+    assert wall.monotonic() - begin < 1
+    assert clock.monotonic() == 3660
+    assert clock.now() == START + timedelta(seconds=3660)
+
+
+def test_time_waits_on_clock():
+    clock = FastClock(START)
+    time = Time(START, timedelta(0), timedelta(seconds=10), clock)
+    for _ in range(6):
+        time.step()
+        time.wait()
+    assert clock.now() == time.get_current_datetime
+    # A time that is behind the clock does not wait
+    clock.sleep(100)
+    time.wait()
+    assert clock.now() == START + timedelta(seconds=160)
+
+
+def test_scaled_clock():
+    clock = ScaledClock(1000, START)
+    assert clock.wall_seconds(10) == 0.01
+    begin = wall.monotonic()
+    clock.sleep(100)
+    assert 0.1 <= wall.monotonic() - begin < 1
+    assert clock.now() >= START + timedelta(seconds=100)
+    with pytest.raises(ValueError):
+        ScaledClock(0)
+
+
+def test_parse_clock():
+    assert isinstance(parse_clock("realtime"), RealtimeClock)
+    assert isinstance(parse_clock("fast"), FastClock)
+    assert parse_clock("scaled:60").factor == 60
+    for value in ["scaled", "fast:2", "slow"]:
+        with pytest.raises(ValueError):
+            parse_clock(value)
+
+
+def test_default_clock_is_shared():
+    args = ARGS(START, ["--mode=headless"])
+    assert isinstance(args.clock, FastClock)
+    assert args.clock is args.clock
+
+
+def test_log_follows_clock(tmp_path):
+    clock = FastClock(START)
+    com = SerialCom(str(tmp_path), clock=clock)
+    com.arduino = SilentPort()
+    clock.sleep(90)
+    with pytest.raises(serial_exceptions.Exceptions):
+        com.log_error(serial_exceptions.Exceptions.NO_RESPONSE, "no response")
+    assert [entry.time for entry in com.error_log] == [START + timedelta(seconds=90)]
@@ -0,0 +1,72 @@
+"""Testing of the virtual pond ensemble"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from python_package.rain.artificial_rain import ArtificialConstRain
+from python_package.time import Time
+from python_package.virtual_pond import VirtualPond
+from python_package.virtual_pond.ensemble import VirtualPondEnsemble
+
+START = datetime(2024, 1, 1)
+PONDS = [
+    # catchment, reaction, discharge, area, level, min, max, orifice, rain
+    (1.85, 0.25, 0.6, 5572, 700, 100, 850, "med", 20),
+    (0.59, 0.25, 0.6, 5572, 200, 100, 300, "max", 20),
+    (1.2, 0.3, 0.5, 3000, 299, 100, 300, "min", 400),
+    (2.0, 0.2, 0.6, 8000, 100, 100, 500, "min", 0),
+]
+
+
+def make_time() -> Time:
+    """The time shared by the ponds"""
+    return Time(start=START, current_time=timedelta(seconds=0), delta=timedelta(seconds=11))
+
+
+def make_ponds(time: Time) -> list[VirtualPond]:
+    """A VirtualPond for every row of PONDS"""
+    ponds = []
+    for *parameters, orifice, rain in PONDS:
+        pond = VirtualPond(*parameters, time=time, rain_data_mm=ArtificialConstRain(rain))
+        pond.set_orifice(orifice)
+        ponds.append(pond)
+    return ponds
+
+
+def test_ensemble_matches_single_ponds():
+    """Every pond in the ensemble is stepped exactly like a VirtualPond"""
+    time = make_time()
+    ponds = make_ponds(time)
+    ensemble = VirtualPondEnsemble.from_ponds(make_ponds(make_time()), make_time())
+
+    for _ in range(30):
+        expected = [pond.generate_virtual_sensor_reading() for pond in ponds]
+        data = ensemble.generate_virtual_sensor_reading()
+        assert data.height.tolist() == [d.height for d in expected]
+        assert data.overflow.tolist() == [d.overflow for d in expected]
+        assert data.volume_out.tolist() == [d.volume_out for d in expected]
+        time.step()
+        ensemble.time.step()
+
+
+def test_simulate_and_shared_rain():
+    """Simulating returns a row per step, ponds sharing a rain source read it once"""
+    calls = []
+
+    class CountingRain(ArtificialConstRain):
+        """Counts the batched reads"""
+
+        def get_rain_falls(self, area, start_times, end_times):
+            calls.append(area.calc_area())
+            return super().get_rain_falls(area, start_times, end_times)
+
+    rain = CountingRain(10)
+    ensemble = VirtualPondEnsemble(1.85, 0.25, 0.6, 5572, [200, 400, 600], 100, 850, make_time(), [rain] * 3)
+    ensemble.set_orifice(["max", "med", "min"])
+    data = ensemble.simulate(5)
+
+    assert data.height.shape == (5, 3)
+    assert calls == [18500.0]
+    assert np.all(np.diff(data.height, axis=0) != 0)
+    assert ensemble.time.get_current_time == timedelta(seconds=55)
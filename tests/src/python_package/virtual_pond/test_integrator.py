@@ -0,0 +1,71 @@
+"""Testing of the virtual pond integrators"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from python_package.rain.artificial_rain import ArtificialConstRain
+from python_package.time import Time
+from python_package.virtual_pond import VirtualPond
+from python_package.virtual_pond.integrator import AdaptiveIntegrator, BatchedIntegrator, EulerIntegrator
+
+
+def make_pond(water_level: float = 200, rain: float = 20, integrator=None) -> VirtualPond:
+    """A pond with the parameters used by the experiments"""
+    time = Time(start=datetime(2024, 1, 1), current_time=timedelta(seconds=0), delta=timedelta(seconds=11))
+    pond = VirtualPond(1.85, 0.25, 0.6, 5572, water_level, 100, 300, time, ArtificialConstRain(rain), integrator)
+    pond.set_orifice("med")
+    return pond
+
+
+def test_euler_matches_sub_steps():
+    """The Euler integrator gives the same result as stepping calculate_water_volume every second"""
+    expected = make_pond()
+    for _ in range(11):
+        water_volume, _, _ = expected.calculate_water_volume()
+        expected.water_level = min(max(water_volume / expected.pond_area * 100, 100), 300)
+
+    pond = make_pond()
+    assert pond.generate_virtual_sensor_reading().height == expected.water_level
+
+
+@pytest.mark.parametrize("water_level, rain", [(200, 20), (101, 0), (299, 200)])
+def test_batched_matches_euler(water_level, rain):
+    """The batched integrator uses the same arithmetic as the Euler integrator"""
+    euler = make_pond(water_level, rain)
+    batched = make_pond(water_level, rain, BatchedIntegrator())
+    for _ in range(20):
+        a = euler.generate_virtual_sensor_reading()
+        b = batched.generate_virtual_sensor_reading()
+        assert (a.height, a.overflow, a.volume_in, a.volume_out) == (b.height, b.overflow, b.volume_in, b.volume_out)
+
+
+def test_batched_many_ponds():
+    """Every pond in a batch gets the result it would get on its own"""
+    ponds = [make_pond(level, rain) for level, rain in [(150, 0), (250, 50), (299, 500)]]
+    results = BatchedIntegrator().integrate_many(ponds, [0, 50, 500], 11)
+    assert results == [EulerIntegrator().integrate(pond, rain, 11) for pond, rain in zip(ponds, [0, 50, 500])]
+    assert results[2][1]
+
+
+def test_adaptive_is_close_to_euler():
+    """The adaptive integrator approximates the same model"""
+    euler = make_pond(200, 20)
+    adaptive = make_pond(200, 20, AdaptiveIntegrator())
+    for _ in range(100):
+        a = euler.generate_virtual_sensor_reading()
+        b = adaptive.generate_virtual_sensor_reading()
+    assert b.height == pytest.approx(a.height, abs=0.05)
+
+
+def test_simulate():
+    """Simulating many steps gives the same readings as generating them one at a time"""
+    stepped = make_pond()
+    expected = []
+    for _ in range(10):
+        expected.append(stepped.generate_virtual_sensor_reading().height)
+        stepped.time.step()
+
+    pond = make_pond()
+    assert [data.height for data in pond.simulate(10)] == expected
+    assert pond.time.get_current_time == timedelta(seconds=110)